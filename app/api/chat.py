@@ -1,18 +1,33 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import Response
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
 
-from app.models import ChatRequest, ChatResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.config import settings
+from app.models import BatchQueryRequest, ChatRequest, ChatResponse, RetrievedDocument
+from app.core.answer_cache import get_answer_cache
+from app.core.canonical_answers import get_canonical_store, match_canonical_section
 from app.core.retriever import get_retriever
+from app.core.groq_pool import Priority
 from app.core.llm_chain import get_llm_chain
-from app.core.chat_history import get_history_manager
+from app.core.chat_history import get_async_history_manager
 from app.core.query_condenser import get_query_condenser
 from app.core.context_expander import get_context_expander
-from app.dependencies import limiter, get_rate_limit_string, get_current_user
-from app.utils import get_logger, LegalAIException, InvalidSessionError
+from app.core.context_packer import count_tokens
+from app.core.popular_queries import get_popular_queries
+from app.core.rate_limiter import get_rate_limiter
+from app.dependencies import enforce_rate_limit, get_current_user, rate_limited_user
+from app.utils import get_logger, LegalAIException, InvalidSessionError, dependency, observe_stage, stage
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api", tags=["chat"])
 
+# Writes scheduled after the answer (history, token charges), kept referenced until done
+_pending_writes: set = set()
+
 
 # OPTIONS (CORS preflight)
 @router.options("/query")
@@ -20,12 +35,22 @@ async def options_query():
     return Response(status_code=200)
 
 
+@router.options("/query/stream")
+async def options_query_stream():
+    return Response(status_code=200)
+
+
+@router.options("/query/batch")
+async def options_query_batch():
+    return Response(status_code=200)
+
+
 # RESTORE last session (protected)
 @router.get("/session/latest")
 async def get_latest_session(user_id: str = Depends(get_current_user)):
     try:
-        history_manager = get_history_manager()
-        session = history_manager.get_latest_session(user_id)
+        history_manager = get_async_history_manager()
+        session = await history_manager.get_latest_session(user_id)
 
         if not session:
             return {"session_id": None, "history": []}
@@ -37,87 +62,274 @@ async def get_latest_session(user_id: str = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Failed to load history")
 
 
-# QUERY legal assistant (protected)
-@router.post("/query", response_model=ChatResponse)
-@limiter.limit(get_rate_limit_string())
-async def query_legal_assistant(
-    request: Request,
-    chat_request: ChatRequest,
+# LIST sessions, most recently active first (protected)
+@router.get("/sessions")
+async def list_sessions(
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
     user_id: str = Depends(get_current_user),
 ):
     try:
-        history_manager = get_history_manager()
+        history_manager = get_async_history_manager()
+        page = await history_manager.list_sessions(user_id, limit=limit, offset=offset)
+
+        next_offset = offset + limit
+        return {
+            **page,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": next_offset if next_offset < page["total"] else None,
+        }
+
+    except Exception as e:
+        logger.error("list_sessions_failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to list sessions")
+
+
+async def _prepare_turn(chat_request: ChatRequest, user_id: str) -> Dict[str, Any]:
+    """
+    Everything before generation: session, condensation, retrieval, expansion.
+
+    Every I/O step is awaited (redis.asyncio, AsyncGroq, async httpx/Qdrant),
+    so a slow upstream call never stalls other requests on this worker.
+    Each step is timed as a stage (histograms + Server-Timing).
+    """
+    history_manager = get_async_history_manager()
 
-        # ── Session management ────────────────────────────────────────────────
+    # ── Session management ────────────────────────────────────────────────
+    with stage("session"):
         if chat_request.session_id is None:
-            session_id = history_manager.create_session(user_id=user_id)
+            with dependency("redis", "create_session"):
+                session_id = await history_manager.create_session(user_id=user_id)
         else:
             session_id = chat_request.session_id
 
-        chat_history = history_manager.get_history(
-            user_id=user_id,
-            session_id=session_id,
-        )
+        with dependency("redis", "get_history"):
+            chat_history = await history_manager.get_history(
+                user_id=user_id,
+                session_id=session_id,
+            )
 
-        # ── Phase 9A: Query Condensation ──────────────────────────────────────
-        # For contextual follow-ups (e.g. "give me definition then"), rewrite
-        # the query into a standalone search query using lightweight LLM.
-        # Standalone queries skip LLM entirely (0ms overhead).
-        condenser = get_query_condenser()
-        condensation_result = condenser.condense(
+    # ── Phase 9A: Query Condensation ──────────────────────────────────────
+    # For contextual follow-ups (e.g. "give me definition then"), rewrite
+    # the query into a standalone search query using lightweight LLM.
+    # Standalone queries skip LLM entirely (0ms overhead).
+    condenser = get_query_condenser()
+    with stage("condense"):
+        condensation_result = await condenser.acondense(
             query=chat_request.query,
             chat_history=chat_history,
         )
-        search_query = condensation_result["search_query"]
-
-        if condensation_result["condensed"]:
-            logger.info(
-                "query_condensed",
-                original=condensation_result["original_query"],
-                rewritten=search_query,
-                rewrite_ms=condensation_result["rewrite_ms"],
-            )
+    search_query = condensation_result["search_query"]
 
-        # ── Retrieval ─────────────────────────────────────────────────────────
-        retriever = get_retriever()
-        documents = retriever.hybrid_search(search_query)
+    if condensation_result["condensed"]:
+        logger.info(
+            "query_condensed",
+            original=condensation_result["original_query"],
+            rewritten=search_query,
+            rewrite_ms=condensation_result["rewrite_ms"],
+        )
+
+    if settings.WARMUP_TOP_QUERIES > 0:
+        # Popularity for the next startup's cache priming (app/warmup.py)
+        _detach(get_popular_queries().record(search_query))
+
+    # ── Retrieval ─────────────────────────────────────────────────────────
+    retriever = get_retriever()
+    with stage("retrieve"):
+        documents, retrieval_meta = await retriever.ahybrid_search_with_trace(search_query)
 
-        # ── Phase 9B: Context Expansion ───────────────────────────────────────
-        # Add semantically related IPC sections to the document list.
-        # Runs AFTER retrieval and BEFORE the LLM chain — fully decoupled.
-        expander = get_context_expander()
+    # ── Phase 9B: Context Expansion ───────────────────────────────────────
+    # Add semantically related IPC sections to the document list.
+    # Runs AFTER retrieval and BEFORE the LLM chain — fully decoupled.
+    expander = get_context_expander()
+    with stage("context_expansion"):
         documents = expander.expand(documents)
 
-        # ── LLM Generation ────────────────────────────────────────────────────
-        # Always pass the original (user-facing) query to the LLM, not the
-        # condensed search query, so the answer remains grounded to what
-        # the user actually asked.
-        llm_chain = get_llm_chain()
-        answer = llm_chain.generate_answer(
-            query=chat_request.query,
-            documents=documents,
-            chat_history=chat_history,
+    # Packed once: generation sends this context, metadata reports it
+    with stage("pack"):
+        packed = get_llm_chain().pack_context(documents)
+
+    return {
+        "session_id": session_id,
+        "chat_history": chat_history,
+        "search_query": search_query,
+        "documents": documents,
+        "packed": packed,
+        "metadata": {
+            "retrieval": retrieval_meta,
+            "context": packed.report(),
+        },
+    }
+
+
+# ── Answers that skip the LLM (history-free turns only) ─────────────────────
+async def _lookup_prepared_answer(chat_request: ChatRequest, turn: Dict[str, Any]) -> Optional[str]:
+    """
+    Tries the canonical section answers, then the answer cache.
+    Records turn["metadata"]["answer_source"]: "canonical", "cache" or "live".
+    """
+    turn["metadata"]["answer_source"] = "live"
+    if chat_request.force_live or turn["chat_history"]:
+        return None
+
+    canonical = _lookup_canonical_answer(chat_request.query, turn)
+    if canonical is not None:
+        turn["metadata"]["answer_source"] = "canonical"
+        return canonical
+
+    hit = await _lookup_cached_answer(turn)
+    if hit is not None:
+        turn["metadata"]["answer_source"] = "cache"
+        return hit["answer"]
+    return None
+
+
+def _lookup_canonical_answer(query: str, turn: Dict[str, Any]) -> Optional[str]:
+    if not settings.CANONICAL_ANSWERS_ENABLED:
+        return None
+    section = match_canonical_section(query)
+    if section is None:
+        return None
+    store = get_canonical_store()
+    if store is None:
+        return None
+    entry = store.get(section, [doc.section for doc in turn["documents"]])
+    if entry is None:
+        return None
+    logger.info("canonical_answer_served", section=section)
+    return entry["answer"]
+
+
+def _answer_cacheable(turn: Dict[str, Any]) -> bool:
+    return settings.ANSWER_CACHE_ENABLED and not turn["chat_history"]
+
+
+async def _query_vector(turn: Dict[str, Any]) -> Optional[List[float]]:
+    if "query_vector" not in turn:
+        try:
+            turn["query_vector"] = await get_retriever().aquery_vector(turn["search_query"])
+        except Exception as e:
+            # Exact-match lookups still work without a vector
+            turn["query_vector"] = None
+            logger.warning("answer_cache_vector_unavailable", error=str(e))
+    return turn["query_vector"]
+
+
+async def _lookup_cached_answer(turn: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Checks the answer cache; records the outcome in turn["metadata"]."""
+    if not _answer_cacheable(turn):
+        return None
+
+    query_vector = await _query_vector(turn)
+    with stage("answer_cache"), dependency("redis", "answer_cache_lookup"):
+        hit = await get_answer_cache().lookup(
+            turn["search_query"],
+            [doc.section for doc in turn["documents"]],
+            query_vector,
         )
+    turn["metadata"]["answer_cache"] = (
+        {"hit": True, "match": hit["match"], "similarity": hit["similarity"]}
+        if hit
+        else {"hit": False}
+    )
+    return hit
 
-        # ── Persist conversation turn ─────────────────────────────────────────
-        history_manager.add_message(
-            user_id=user_id,
-            session_id=session_id,
-            role="user",
-            content=chat_request.query,
+
+async def _store_answer(turn: Dict[str, Any], answer: str, usage: Optional[Dict[str, int]]) -> None:
+    if not _answer_cacheable(turn):
+        return
+    query_vector = await _query_vector(turn)
+    with dependency("redis", "answer_cache_store"):
+        await get_answer_cache().store(
+            turn["search_query"],
+            [doc.section for doc in turn["documents"]],
+            query_vector,
+            answer,
+            usage,
         )
-        history_manager.add_message(
+
+
+async def _charge_tokens(user_id: str, usage: Optional[Dict[str, int]]) -> None:
+    if usage:
+        await get_rate_limiter().charge(user_id, usage.get("total_tokens") or 0)
+
+
+def _estimate_usage(turn: Dict[str, Any], streamed: str) -> Dict[str, int]:
+    """Usage of a stream cut short before Groq reported it: packed context plus the streamed text."""
+    prompt_tokens = turn["packed"].used_tokens if turn["packed"] is not None else 0
+    completion_tokens = count_tokens(streamed)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _detach(coro) -> "asyncio.Task":
+    """Runs a post-answer write as a task a cancelled request cannot interrupt."""
+    task = asyncio.create_task(coro)
+    _pending_writes.add(task)
+    task.add_done_callback(_write_done)
+    return task
+
+
+def _write_done(task: "asyncio.Task") -> None:
+    _pending_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("background_write_failed", error=str(task.exception()))
+
+
+async def _persist_turn(
+    user_id: str, session_id: str, query: str, answer: str, status: Optional[str] = None
+) -> None:
+    # Both messages in one atomic script call (one round trip); status marks
+    # a reply cut short ("cancelled" / "failed")
+    reply = ("assistant", answer) if status is None else ("assistant", answer, status)
+    with stage("persist"), dependency("redis", "add_turn"):
+        await get_async_history_manager().add_turn(
             user_id=user_id,
             session_id=session_id,
-            role="assistant",
-            content=answer,
+            messages=[("user", query), reply],
         )
 
+
+# QUERY legal assistant (protected)
+@router.post("/query", response_model=ChatResponse)
+async def query_legal_assistant(
+    chat_request: ChatRequest,
+    user_id: str = Depends(rate_limited_user),
+):
+    try:
+        turn = await _prepare_turn(chat_request, user_id)
+
+        # ── LLM Generation ────────────────────────────────────────────────────
+        # Always pass the original (user-facing) query to the LLM, not the
+        # condensed search query, so the answer remains grounded to what
+        # the user actually asked.
+        answer = await _lookup_prepared_answer(chat_request, turn)
+        if answer is None:
+            llm_chain = get_llm_chain()
+            with stage("llm"):
+                answer = await llm_chain.agenerate_answer(
+                    query=chat_request.query,
+                    documents=turn["documents"],
+                    chat_history=turn["chat_history"],
+                    packed=turn["packed"],
+                )
+            usage = llm_chain.last_token_usage
+            _detach(_charge_tokens(user_id, usage))
+            await _store_answer(turn, answer, usage)
+
+        # ── Persist conversation turn ─────────────────────────────────────────
+        await _persist_turn(user_id, turn["session_id"], chat_request.query, answer)
+
         return ChatResponse(
             answer=answer,
-            sources=documents,
-            session_id=session_id,
+            sources=turn["documents"],
+            session_id=turn["session_id"],
             query=chat_request.query,
+            metadata=turn["metadata"],
         )
 
     except InvalidSessionError as e:
@@ -129,3 +341,293 @@ async def query_legal_assistant(
     except Exception as e:
         logger.error("chat_endpoint_failed", error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Streaming (Server-Sent Events)
+# ─────────────────────────────────────────────────────────────────────────────
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _observe_ttft(started: float) -> int:
+    """Records time to first token in /metrics; returns it in ms for the done event."""
+    elapsed = time.perf_counter() - started
+    observe_stage("ttft", elapsed)
+    return int(elapsed * 1000)
+
+
+async def _stream_answer(
+    chat_request: ChatRequest,
+    user_id: str,
+    turn: Dict[str, Any],
+    started: float,
+    prepared: Optional[str] = None,
+):
+    """
+    prepared is a canonical or cached answer resolved before the stream
+    opened; it is sent as the only token.
+
+    Event sequence:
+        sources  {session_id, sources, metadata}   before generation starts
+        token    {text}                            one per streamed delta
+                                                   (a canonical/cached answer is one token)
+        done     {ttft_ms, total_ms, usage}        after the last token
+        error    {message}                         generation failed mid-stream
+    """
+    documents: List[RetrievedDocument] = turn["documents"]
+    session_id = turn["session_id"]
+    parts: List[str] = []
+    ttft_ms = None
+    usage = None
+    status = "cancelled"
+
+    try:
+        yield _sse(
+            "sources",
+            {
+                "session_id": session_id,
+                "sources": [doc.model_dump() for doc in documents],
+                "metadata": turn["metadata"],
+            },
+        )
+
+        llm_chain = get_llm_chain()
+        if prepared is not None:
+            ttft_ms = _observe_ttft(started)
+            parts.append(prepared)
+            yield _sse("token", {"text": prepared})
+        else:
+            # Headers are already sent: generation reaches the histograms,
+            # not the Server-Timing header
+            generation_started = time.perf_counter()
+            async for delta in llm_chain.astream_answer(
+                query=chat_request.query,
+                documents=documents,
+                chat_history=turn["chat_history"],
+                packed=turn["packed"],
+            ):
+                if ttft_ms is None:
+                    ttft_ms = _observe_ttft(started)
+                parts.append(delta)
+                yield _sse("token", {"text": delta})
+            observe_stage("llm", time.perf_counter() - generation_started)
+            usage = llm_chain.last_token_usage
+            await _store_answer(turn, "".join(parts).strip(), usage)
+
+        status = "completed"
+        elapsed = time.perf_counter() - started
+        observe_stage("stream_total", elapsed)
+        total_ms = int(elapsed * 1000)
+        yield _sse(
+            "done",
+            {"ttft_ms": ttft_ms, "total_ms": total_ms, "usage": usage},
+        )
+
+    except LegalAIException as e:
+        status = "failed"
+        yield _sse("error", {"message": str(e)})
+
+    except Exception as e:
+        status = "failed"
+        logger.error("chat_stream_failed", error=str(e))
+        yield _sse("error", {"message": "Internal server error"})
+
+    finally:
+        total_ms = int((time.perf_counter() - started) * 1000)
+        logger.info(
+            "stream_finished",
+            status=status,
+            session_id=session_id,
+            ttft_ms=ttft_ms,
+            total_ms=total_ms,
+            chars=sum(len(p) for p in parts),
+        )
+
+        # Groq has spent the tokens however the stream ended: a cancelled or
+        # failed stream is charged an estimate
+        if prepared is None:
+            _detach(_charge_tokens(user_id, usage or _estimate_usage(turn, "".join(parts))))
+
+        # Persist the turn however the stream ended: the user's message always,
+        # the reply (possibly partial or empty) marked unless it completed.
+        # Run as a task and shield it so the cancellation that ends this
+        # generator cannot interrupt the Redis writes.
+        await asyncio.shield(
+            _detach(
+                _persist_turn(
+                    user_id,
+                    session_id,
+                    chat_request.query,
+                    "".join(parts).strip(),
+                    status=None if status == "completed" else status,
+                )
+            )
+        )
+
+
+@router.post("/query/stream")
+async def stream_legal_assistant(
+    chat_request: ChatRequest,
+    user_id: str = Depends(rate_limited_user),
+):
+    started = time.perf_counter()
+    try:
+        # Session, condensation, retrieval and prepared-answer errors still map
+        # to plain HTTP errors — the stream only opens once there is something
+        # to send.
+        turn = await _prepare_turn(chat_request, user_id)
+        prepared = await _lookup_prepared_answer(chat_request, turn)
+
+    except InvalidSessionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except LegalAIException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    except Exception as e:
+        logger.error("chat_stream_failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return StreamingResponse(
+        _stream_answer(chat_request, user_id, turn, started, prepared),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch (newline-delimited JSON)
+# ─────────────────────────────────────────────────────────────────────────────
+async def _answer_batch_item(
+    index: int,
+    item_request: ChatRequest,
+    turn: Dict[str, Any],
+    semaphore: asyncio.Semaphore,
+) -> Dict[str, Any]:
+    try:
+        answer = await _lookup_prepared_answer(item_request, turn)
+        if answer is None:
+            async with semaphore:
+                llm_chain = get_llm_chain()
+                with stage("llm"):
+                    answer = await llm_chain.agenerate_answer(
+                        query=item_request.query,
+                        documents=turn["documents"],
+                        priority=Priority.BACKGROUND,
+                        packed=turn["packed"],
+                    )
+                # Read before the next await: the chain is shared across tasks
+                usage = llm_chain.last_token_usage
+            # Charged per answer: a batch can run up to BATCH_MAX_QUERIES generations
+            _detach(_charge_tokens(item_request.user_id, usage))
+            await _store_answer(turn, answer, usage)
+        return {
+            "index": index,
+            "query": item_request.query,
+            "answer": answer,
+            "sources": [doc.model_dump() for doc in turn["documents"]],
+            "metadata": turn["metadata"],
+        }
+    except LegalAIException as e:
+        return {"index": index, "query": item_request.query, "error": str(e)}
+
+    except Exception as e:
+        logger.error("batch_item_failed", index=index, error=str(e))
+        return {"index": index, "query": item_request.query, "error": "Internal server error"}
+
+
+async def _stream_batch(
+    batch_request: BatchQueryRequest,
+    user_id: str,
+    turns: List[Dict[str, Any]],
+    started: float,
+):
+    """
+    One JSON line per question, in completion order (each carries its
+    "index" in the request), then a summary line:
+        {"index", "query", "answer", "sources", "metadata"}
+        {"index", "query", "error"}                         generation failed
+        {"done": true, "total", "failed", "total_ms"}
+    """
+    semaphore = asyncio.Semaphore(max(settings.BATCH_LLM_CONCURRENCY, 1))
+    tasks = [
+        asyncio.create_task(
+            _answer_batch_item(
+                index,
+                ChatRequest(user_id=user_id, query=query, force_live=batch_request.force_live),
+                turn,
+                semaphore,
+            )
+        )
+        for index, (query, turn) in enumerate(zip(batch_request.queries, turns))
+    ]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            failed += "error" in item
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+        total_ms = int((time.perf_counter() - started) * 1000)
+        logger.info("batch_finished", total=len(tasks), failed=failed, total_ms=total_ms)
+        yield json.dumps({"done": True, "total": len(tasks), "failed": failed, "total_ms": total_ms}) + "\n"
+    finally:
+        # Client went away: stop generating answers nobody will read
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/query/batch")
+async def batch_legal_assistant(
+    batch_request: BatchQueryRequest,
+    request: Request,
+    user_id: str = Depends(get_current_user),
+):
+    """
+    Answers independent, history-free questions in one request.
+
+    Retrieval for the whole batch is batched (embedding, Qdrant and BM25);
+    answers are generated with at most BATCH_LLM_CONCURRENCY concurrent LLM
+    calls and streamed back as NDJSON as they complete. Nothing is written
+    to chat history. Each question costs one request of the rate limit.
+    """
+    await enforce_rate_limit(request, user_id, cost=len(batch_request.queries))
+    started = time.perf_counter()
+    try:
+        with stage("retrieve"):
+            retrieved = await get_retriever().ahybrid_search_batch(batch_request.queries)
+
+    except LegalAIException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    except Exception as e:
+        logger.error("chat_batch_failed", error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    expander = get_context_expander()
+    llm_chain = get_llm_chain()
+    turns = []
+    for query, (documents, retrieval_meta) in zip(batch_request.queries, retrieved):
+        documents = expander.expand(documents)
+        packed = llm_chain.pack_context(documents)
+        turns.append(
+            {
+                "session_id": None,
+                "chat_history": [],
+                "search_query": query,
+                "documents": documents,
+                "packed": packed,
+                "metadata": {
+                    "retrieval": retrieval_meta,
+                    "context": packed.report(),
+                },
+            }
+        )
+    logger.info("batch_retrieved", total=len(turns), retrieval_ms=int((time.perf_counter() - started) * 1000))
+
+    return StreamingResponse(
+        _stream_batch(batch_request, user_id, turns, started),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,13 @@
 """Health check API endpoints."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
 
 from app.models import HealthResponse
 from app.config import settings
 from app.core import get_retriever
-from app.utils import get_logger
+from app.utils import get_logger, metrics_response
+from app.warmup import get_warmup_state
 
 logger = get_logger(__name__)
 
@@ -25,11 +27,11 @@ async def health_check():
     # -------------------------
     try:
         retriever = get_retriever()
-        collections = retriever.client.get_collections()
+        collections = await retriever.aclient.get_collections()
         collection_names = [c.name for c in collections.collections]
 
         if retriever.collection_name in collection_names:
-            collection_info = retriever.client.get_collection(
+            collection_info = await retriever.aclient.get_collection(
                 collection_name=retriever.collection_name
             )
             services["qdrant"] = {
@@ -50,14 +52,42 @@ async def health_check():
         }
 
     # -------------------------
-    # EMBEDDING (HF Inference API)
+    # DENSE BACKEND
     # -------------------------
-    services["embedding"] = {
-        "status": "configured",
-        "model": settings.EMBEDDING_MODEL,
-        "provider": "huggingface_inference_api",
-        "note": "Embeddings are generated on-demand via HF API",
-    }
+    try:
+        dense_index = get_retriever().dense_index
+        services["dense_index"] = {
+            "backend": "local" if dense_index is not None else "qdrant",
+            "configured_backend": settings.DENSE_BACKEND,
+            "rows": len(dense_index.sections) if dense_index is not None else None,
+        }
+    except Exception as e:
+        services["dense_index"] = {"status": "unavailable", "error": str(e)[:120]}
+
+    # -------------------------
+    # EMBEDDING (HF Inference API or local CPU model)
+    # -------------------------
+    if settings.EMBEDDING_PROVIDER == "local":
+        services["embedding"] = {
+            "status": "configured",
+            "model": settings.EMBEDDING_MODEL,
+            "provider": "local",
+            "backend": settings.LOCAL_EMBEDDING_BACKEND,
+            "note": "Embeddings are generated in-process on CPU",
+        }
+    else:
+        services["embedding"] = {
+            "status": "configured",
+            "model": settings.EMBEDDING_MODEL,
+            "provider": "huggingface_inference_api",
+            "note": "Embeddings are generated on-demand via HF API",
+        }
+
+    try:
+        from app.core.embedding_cache import get_embedding_cache
+        services["embedding"]["cache"] = get_embedding_cache().stats()
+    except Exception as e:
+        services["embedding"]["cache"] = {"status": "unavailable", "error": str(e)[:120]}
 
     # -------------------------
     # LLM (Groq)
@@ -68,9 +98,40 @@ async def health_check():
         "provider": "groq",
     }
 
+    try:
+        from app.core.groq_pool import get_groq_pool
+        services["llm"]["key_pool"] = get_groq_pool().stats()
+    except Exception as e:
+        services["llm"]["key_pool"] = {"status": "unavailable", "error": str(e)[:120]}
+
+    if settings.ANSWER_CACHE_ENABLED:
+        try:
+            from app.core.answer_cache import get_answer_cache
+            services["llm"]["answer_cache"] = get_answer_cache().stats()
+        except Exception as e:
+            services["llm"]["answer_cache"] = {"status": "unavailable", "error": str(e)[:120]}
+
+    # -------------------------
+    # AUTH (Supabase JWT)
+    # -------------------------
+    try:
+        from app.dependencies import auth_stats, jwks_manager, token_cache
+        services["auth"] = {
+            "jwks": jwks_manager.stats(),
+            "token_cache_entries": len(token_cache),
+            "latency": auth_stats.stats(),
+        }
+    except Exception as e:
+        services["auth"] = {"status": "unavailable", "error": str(e)[:120]}
+
+    services["warmup"] = get_warmup_state().stats()
+
+    # Section lookups are served locally; with a local dense index Qdrant is
+    # not on the query path at all.
     overall_status = (
         "healthy"
         if services.get("qdrant", {}).get("status") == "healthy"
+        or services.get("dense_index", {}).get("backend") == "local"
         else "degraded"
     )
 
@@ -81,6 +142,26 @@ async def health_check():
     )
 
 
+@router.get("/ready", include_in_schema=False)
+async def readiness():
+    """
+    Readiness for the load balancer: 503 until the startup warmup has
+    finished, 200 after. Unlike /health it makes no remote calls.
+    """
+    warmup = get_warmup_state()
+    return JSONResponse(
+        status_code=200 if warmup.ready else 503,
+        content={"status": "ready" if warmup.ready else "warming_up", **warmup.stats()},
+    )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (stage, dependency and request latency histograms)."""
+    body, content_type = metrics_response()
+    return Response(content=body, media_type=content_type)
+
+
 @router.get("/")
 async def root():
     return {
@@ -89,4 +170,6 @@ async def root():
         "description": "Indian Penal Code AI Assistant with RAG",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics",
     }
\ No newline at end of file
@@ -59,26 +59,140 @@ class Settings(BaseSettings):
         default="intfloat/multilingual-e5-base"
     )
     EMBEDDING_DIMENSION: int = Field(default=768)
+    EMBEDDING_PROVIDER: str = Field(
+        default="huggingface",
+        description="Query embedding backend: huggingface (Inference API) or local (in-process CPU)",
+    )
+    LOCAL_EMBEDDING_BACKEND: str = Field(
+        default="torch",
+        description="Local embedding runtime: torch or onnx",
+    )
+    LOCAL_EMBEDDING_ONNX_FILE: Optional[str] = Field(
+        default=None,
+        description="ONNX graph inside the model repo, e.g. an int8-quantized file",
+    )
+    LOCAL_EMBEDDING_THREADS: Optional[int] = Field(
+        default=None,
+        description="CPU threads for local embeddings (default: runtime decides)",
+    )
+    EMBEDDING_BATCH_SIZE: int = Field(
+        default=32,
+        description="Queries per embedding request when embedding a batch",
+    )
 
     LLM_MODEL: str = Field(
         default="llama-3.3-70b-versatile",
         description="Groq model ID",
     )
 
+    # =====================
+    # GROQ KEY POOL
+    # =====================
+    GROQ_POOL_MAX_WAIT_SECONDS: float = Field(
+        default=30.0,
+        description="Longest a call queues for a key with headroom before failing",
+    )
+    GROQ_POOL_INTERACTIVE_RESERVE: float = Field(
+        default=0.1,
+        description="Fraction of each key's request/token budget held back for interactive answers",
+    )
+
+    # =====================
+    # EMBEDDING CACHE
+    # =====================
+    EMBEDDING_CACHE_SIZE: int = Field(default=1024, description="In-process LRU entries")
+    EMBEDDING_CACHE_TTL_SECONDS: int = Field(default=3600)
+    EMBEDDING_CACHE_REDIS_ENABLED: bool = Field(default=True, description="Share vectors across workers via REDIS_URL")
+    EMBEDDING_CACHE_REDIS_TTL_SECONDS: int = Field(default=86400)
+
+    # =====================
+    # ANSWER CACHE (first-turn questions)
+    # =====================
+    ANSWER_CACHE_ENABLED: bool = Field(default=True)
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = Field(
+        default=0.95,
+        description="Min cosine between query vectors to reuse an answer for the same sections",
+    )
+    ANSWER_CACHE_TTL_SECONDS: int = Field(default=604800)
+    ANSWER_CACHE_MAX_PER_BUCKET: int = Field(default=32, description="Cached questions per section set")
+
+    CANONICAL_ANSWERS_ENABLED: bool = Field(
+        default=True,
+        description="Serve bare 'What is Section N' questions from data/canonical_answers.json",
+    )
+
+    # =====================
+    # OUTBOUND HTTP POOL
+    # =====================
+    HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10)
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=60.0)
+
     # =====================
     # SEARCH / LIMITS
     # =====================
+    DENSE_BACKEND: str = Field(
+        default="qdrant",
+        description="Dense retrieval backend: qdrant (Cloud) or local (exact search over data/ipc_vectors.npy)",
+    )
+    SECTION_LOOKUP_QDRANT_FALLBACK: bool = Field(
+        default=True,
+        description="Query Qdrant for detected sections missing from the local corpus",
+    )
+    DENSE_TIMEOUT_SECONDS: float = Field(
+        default=3.0,
+        description="Deadline for the dense branch of hybrid search; past it results are BM25-only",
+    )
+    RETRIEVAL_WORKERS: int = Field(default=8, description="Threads for concurrent dense retrieval")
     DEFAULT_TOP_K: int = Field(default=5)
     DENSE_CANDIDATES: int = Field(default=20)
     BM25_CANDIDATES: int = Field(default=20)
     RRF_K: int = Field(default=60)
-    MAX_CONTEXT_LENGTH: int = Field(default=4000)
-    RATE_LIMIT_PER_MINUTE: int = Field(default=30)
+    MAX_CONTEXT_TOKENS: int = Field(
+        default=1000,
+        description="Token budget for the IPC context block; filled with whole sections / section parts",
+    )
+    RATE_LIMIT_PER_MINUTE: int = Field(default=30, description="Requests per user per minute")
+    RATE_LIMIT_TOKENS_PER_MINUTE: int = Field(
+        default=20000,
+        description="Groq tokens (prompt + completion) per user per minute",
+    )
+
+    # =====================
+    # BATCH QUERY API
+    # =====================
+    BATCH_MAX_QUERIES: int = Field(default=100, description="Max questions per /api/query/batch request")
+    BATCH_LLM_CONCURRENCY: int = Field(default=4, description="Concurrent LLM calls per batch request")
 
     # =====================
     # SUPABASE AUTH
     # =====================
     SUPABASE_URL: str = Field(..., description="Supabase project URL")
+    JWKS_REFRESH_SECONDS: float = Field(
+        default=600.0,
+        description="Background JWKS refresh interval when the response sends no Cache-Control max-age",
+    )
+    AUTH_TOKEN_CACHE_SIZE: int = Field(default=4096, description="Verified JWTs kept in memory (until exp)")
+
+    # =====================
+    # STARTUP WARMUP
+    # =====================
+    WARMUP_ENABLED: bool = Field(
+        default=True,
+        description="Warm remote dependencies and caches in the background at startup; /ready is 503 until done",
+    )
+    WARMUP_STEP_TIMEOUT_SECONDS: float = Field(
+        default=60.0,
+        description="Bound on each warmup step; a step past it is abandoned and logged",
+    )
+    WARMUP_TOP_QUERIES: int = Field(
+        default=50,
+        description="Most popular recent search queries embedded into the cache at startup (0: not recorded)",
+    )
+    COLD_START_BUDGET_SECONDS: float = Field(
+        default=4.0,
+        description="Budget from process start to the first accepted request (tests/test_startup.py, scripts/profile_startup.py)",
+    )
 
     # =====================
     # VALIDATORS
@@ -90,6 +204,27 @@ class Settings(BaseSettings):
             return [x.strip() for x in v.split(",") if x.strip()]
         return v
 
+    @field_validator("EMBEDDING_PROVIDER")
+    @classmethod
+    def validate_embedding_provider(cls, v: str) -> str:
+        if v not in {"huggingface", "local"}:
+            raise ValueError("EMBEDDING_PROVIDER must be one of: huggingface, local")
+        return v
+
+    @field_validator("LOCAL_EMBEDDING_BACKEND")
+    @classmethod
+    def validate_local_embedding_backend(cls, v: str) -> str:
+        if v not in {"torch", "onnx"}:
+            raise ValueError("LOCAL_EMBEDDING_BACKEND must be one of: torch, onnx")
+        return v
+
+    @field_validator("DENSE_BACKEND")
+    @classmethod
+    def validate_dense_backend(cls, v: str) -> str:
+        if v not in {"qdrant", "local"}:
+            raise ValueError("DENSE_BACKEND must be one of: qdrant, local")
+        return v
+
     @field_validator("ENVIRONMENT")
     @classmethod
     def validate_env(cls, v: str) -> str:
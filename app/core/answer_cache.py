@@ -0,0 +1,266 @@
+"""
+Semantic answer cache for first-turn questions.
+
+Pipeline position:
+    condensed query + fused/expanded sections
+        │
+        ▼
+    [bucket: sections + model + embedding model + prompt version + corpus checksum]
+        │
+        ├── exact normalized query ────────────► cached answer
+        ├── cosine(query vector) ≥ threshold ──► cached answer
+        │
+        ▼ miss
+    LLMChain ──► answer (stored in the bucket)
+
+Design decisions:
+- The bucket pins everything the answer depends on besides the wording of
+  the question: the exact set of sections the LLM sees, the model, the
+  prompt version and the corpus checksum. A paraphrase can only reuse an
+  answer generated from the same context, and a corpus or prompt change
+  moves every lookup to fresh buckets (old ones age out via TTL). The
+  embedding model is part of the bucket too, as in the embedding cache:
+  stored vectors are only ever compared with vectors of the same model.
+- Near-duplicates are matched on the same query vector the dense branch
+  searched with (served from the embedding cache), so a similarity lookup
+  normally costs no extra embedding call.
+- Only history-free turns are cached: follow-up answers depend on the
+  conversation, not just on the condensed query.
+- Redis is best-effort, as in the embedding cache: errors count as misses.
+  So do entries that fail to decode or whose vector has another dimension;
+  they are skipped without spoiling the rest of their bucket.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.core.embedding_cache import normalize_cache_text
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def _pack_vector(vector: List[float]) -> str:
+    return base64.b64encode(np.asarray(vector, dtype="<f2").tobytes()).decode("ascii")
+
+
+def _unpack_vector(packed: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(packed), dtype="<f2").astype(np.float32)
+
+
+class AnswerCache:
+    """Redis hash per context bucket; fields are normalized-query hashes."""
+
+    def __init__(
+        self,
+        redis_client,
+        model: str,
+        embedding_model: str,
+        prompt_version: str,
+        corpus_checksum: str,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: int = 604800,
+        max_per_bucket: int = 32,
+    ):
+        self.redis_client = redis_client
+        self.model = model
+        self.embedding_model = embedding_model
+        self.prompt_version = prompt_version
+        self.corpus_checksum = corpus_checksum
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_per_bucket = max_per_bucket
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "errors": 0,
+            "saved_tokens": 0,
+        }
+
+    # ------------------------
+    # Helpers
+    # ------------------------
+    def bucket_key(self, sections: Iterable[str]) -> str:
+        context = "|".join(sorted(set(str(s) for s in sections)))
+        pinned = (self.model, self.embedding_model, self.prompt_version, self.corpus_checksum, context)
+        digest = hashlib.sha1("|".join(pinned).encode("utf-8")).hexdigest()
+        return f"anscache:{digest}"
+
+    @staticmethod
+    def _field(query: str) -> str:
+        return hashlib.sha1(normalize_cache_text(query).encode("utf-8")).hexdigest()
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def _decode(self, raw: str) -> Optional[Dict]:
+        """A stored entry with its vector unpacked; None (an error) if it is corrupt."""
+        try:
+            entry = json.loads(raw)
+            return dict(entry, vector=_unpack_vector(entry["vector"]))
+        except (ValueError, KeyError, TypeError) as e:
+            self._count("errors")
+            logger.warning("answer_cache_entry_corrupt", error=str(e))
+            return None
+
+    def _match(self, query: str, entries: Dict[str, str], vector: Optional[List[float]]) -> Optional[Dict]:
+        exact = entries.get(self._field(query))
+        entry = self._decode(exact) if exact is not None else None
+        if entry is not None:
+            return dict(entry, match="exact", similarity=1.0)
+        if vector is None or not entries:
+            return None
+
+        query_vector = np.asarray(vector, dtype=np.float32)
+        best_score, best = -1.0, None
+        for raw in entries.values():
+            entry = self._decode(raw)
+            if entry is None or entry["vector"].shape != query_vector.shape:
+                continue
+            score = float(entry["vector"] @ query_vector)
+            if score > best_score:
+                best_score, best = score, entry
+        if best_score >= self.similarity_threshold:
+            return dict(best, match="similar", similarity=round(best_score, 4))
+        return None
+
+    # ------------------------
+    # Public API
+    # ------------------------
+    async def lookup(
+        self,
+        query: str,
+        sections: Iterable[str],
+        vector: Optional[List[float]] = None,
+    ) -> Optional[Dict]:
+        """
+        Returns {"answer", "usage", "match": "exact"|"similar", "similarity"}
+        or None on a miss.
+        """
+        try:
+            entries = await self.redis_client.hgetall(self.bucket_key(sections))
+            hit = self._match(query, entries, vector)
+        except Exception as e:
+            self._count("errors")
+            logger.warning("answer_cache_lookup_failed", error=str(e))
+            hit = None
+
+        if hit is None:
+            self._count("misses")
+            return None
+
+        self._count("exact_hits" if hit["match"] == "exact" else "similar_hits")
+        self._count("saved_tokens", int((hit.get("usage") or {}).get("total_tokens", 0)))
+        logger.info(
+            "answer_cache_hit",
+            match=hit["match"],
+            similarity=hit["similarity"],
+            cached_query=hit.get("query"),
+        )
+        hit.pop("vector", None)
+        return hit
+
+    async def store(
+        self,
+        query: str,
+        sections: Iterable[str],
+        vector: Optional[List[float]],
+        answer: str,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> None:
+        if vector is None:
+            return
+        key = self.bucket_key(sections)
+        entry = {
+            "query": query,
+            "answer": answer,
+            "usage": usage,
+            "vector": _pack_vector(vector),
+            "stored_at": time.time(),
+        }
+        try:
+            await self.redis_client.hset(key, self._field(query), json.dumps(entry))
+            await self.redis_client.expire(key, self.ttl_seconds)
+            if await self.redis_client.hlen(key) > self.max_per_bucket:
+                await self._evict_oldest(key)
+            self._count("stores")
+        except Exception as e:
+            self._count("errors")
+            logger.warning("answer_cache_store_failed", error=str(e))
+
+    async def _evict_oldest(self, key: str) -> None:
+        entries = await self.redis_client.hgetall(key)
+        # A corrupt entry sorts as oldest and goes first
+        by_age = sorted(entries.items(), key=lambda kv: (self._decode(kv[1]) or {}).get("stored_at", 0))
+        excess = len(by_age) - self.max_per_bucket
+        if excess > 0:
+            await self.redis_client.hdel(key, *[field for field, _ in by_age[:excess]])
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+        hits = s["exact_hits"] + s["similar_hits"]
+        lookups = hits + s["misses"]
+        return {
+            **s,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    Returns the singleton AnswerCache.
+    Built from the retriever's corpus checksum and the LLM chain's prompt
+    version, so both must be importable (they are created on first use).
+    """
+    global _cache
+    if _cache is None:
+        import redis.asyncio as aioredis
+
+        from app.core.llm_chain import get_llm_chain
+        from app.core.retriever import get_retriever
+
+        llm_chain = get_llm_chain()
+        _cache = AnswerCache(
+            redis_client=aioredis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+            ),
+            model=llm_chain.model,
+            embedding_model=settings.EMBEDDING_MODEL,
+            prompt_version=llm_chain.prompt_version,
+            corpus_checksum=get_retriever().corpus_checksum,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_per_bucket=settings.ANSWER_CACHE_MAX_PER_BUCKET,
+        )
+        logger.info(
+            "answer_cache_initialized",
+            prompt_version=_cache.prompt_version,
+            threshold=_cache.similarity_threshold,
+        )
+    return _cache
+
+
+async def close_answer_cache() -> None:
+    global _cache
+    if _cache is not None:
+        await _cache.redis_client.aclose()
+        _cache = None
@@ -0,0 +1,390 @@
+"""
+Inverted-index BM25 engine for sparse retrieval.
+
+Drop-in replacement for rank_bm25.BM25Okapi scoring that only touches the
+postings of the query terms instead of scanning every document.
+
+Layout (CSR):
+    vocab            term -> term id
+    indptr[t]        start offset of term t's postings (len = n_terms + 1)
+    postings_doc     doc ids, grouped by term
+    postings_tf      term frequency of the term in that doc
+    idf[t]           precomputed Okapi IDF (with the epsilon floor)
+    doc_norm[d]      precomputed k1 * (1 - b + b * doc_len / avgdl)
+
+Design decisions:
+- Scoring formula, IDF floor and tie-breaking match BM25Okapi + a stable
+  descending sort, so rankings are identical to the previous full-scan path.
+- Per-query work is a single vectorized pass over the matched postings plus
+  argpartition for top-k selection.
+- The index can be saved as a versioned binary artifact and memory-mapped
+  zero-copy at startup (see scripts/build_index_artifacts.py). The artifact
+  records the corpus checksum; a stale or missing artifact makes load()
+  return None so the caller can rebuild in-process.
+
+Artifact layout (little-endian):
+    8 bytes   magic b"IPCBM25\0"
+    uint32    format version
+    uint32    header length
+    header    JSON (corpus checksum, tokenizer, k1/b, array offsets/dtypes)
+    arrays    raw array data, each aligned to 64 bytes
+"""
+
+import hashlib
+import json
+import math
+import mmap
+import re
+import struct
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Okapi defaults used by rank_bm25.BM25Okapi
+_K1 = 1.5
+_B = 0.75
+_EPSILON = 0.25
+
+# Tokenizer shared by index build and query time. Changing it invalidates artifacts.
+TOKEN_PATTERN = r"[a-z0-9]+"
+
+_MAGIC = b"IPCBM25\0"
+FORMAT_VERSION = 1
+_ALIGN = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and extract alphanumeric words."""
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def document_tokens(doc: dict) -> List[str]:
+    """Tokens indexed for one IPC section: section number + title + text."""
+    return tokenize(
+        f"section {doc.get('section_number', '')} {doc.get('title', '')} {doc.get('text', '')}"
+    )
+
+
+def corpus_checksum(raw_corpus: bytes) -> str:
+    """Checksum of the raw corpus file, used to detect stale artifacts."""
+    return hashlib.sha256(raw_corpus).hexdigest()
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR postings layout."""
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        postings_doc: np.ndarray,
+        postings_tf: np.ndarray,
+        idf: np.ndarray,
+        doc_len: np.ndarray,
+        k1: float = _K1,
+        b: float = _B,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.idf = idf
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+
+        self.num_docs = int(doc_len.shape[0])
+        avgdl = float(doc_len.sum()) / self.num_docs if self.num_docs else 0.0
+        self.avgdl = avgdl
+        self.doc_norm = k1 * (1.0 - b + b * doc_len.astype(np.float64) / (avgdl or 1.0))
+
+    # --------------------------------------------------
+    # Construction
+    # --------------------------------------------------
+    @classmethod
+    def build(
+        cls,
+        corpus_tokens: Sequence[Sequence[str]],
+        k1: float = _K1,
+        b: float = _B,
+        epsilon: float = _EPSILON,
+    ) -> "BM25Index":
+        """Build the index from pre-tokenized documents."""
+        num_docs = len(corpus_tokens)
+        doc_len = np.fromiter((len(doc) for doc in corpus_tokens), dtype=np.int32, count=num_docs)
+
+        # Flat (term_id, doc_id, tf) triples; terms get ids in first-seen order
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        for doc_id, doc in enumerate(corpus_tokens):
+            for term, tf in Counter(doc).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_arr = np.array(term_ids, dtype=np.int64)
+        # Stable sort keeps doc ids ascending within each term's postings
+        order = np.argsort(term_arr, kind="stable")
+        postings_doc = np.array(doc_ids, dtype=np.int32)[order]
+        postings_tf = np.array(tfs, dtype=np.int32)[order]
+
+        df = np.bincount(term_arr, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        idf = cls._okapi_idf(df, num_docs, epsilon)
+        return cls(vocab, indptr, postings_doc, postings_tf, idf, doc_len, k1=k1, b=b)
+
+    @classmethod
+    def build_from_docs(cls, docs: Sequence[dict]) -> "BM25Index":
+        """Build the index over IPC section dicts using document_tokens()."""
+        return cls.build([document_tokens(doc) for doc in docs])
+
+    @staticmethod
+    def _okapi_idf(df: np.ndarray, num_docs: int, epsilon: float) -> np.ndarray:
+        # Same arithmetic as BM25Okapi._calc_idf: log(N - n + 0.5) - log(n + 0.5),
+        # with negative values floored to epsilon * average_idf.
+        idf = np.array(
+            [math.log(num_docs - n + 0.5) - math.log(n + 0.5) for n in df.tolist()],
+            dtype=np.float64,
+        )
+        if idf.size:
+            average_idf = sum(idf.tolist()) / idf.size
+            idf[idf < 0] = epsilon * average_idf
+        return idf
+
+    # --------------------------------------------------
+    # Scoring
+    # --------------------------------------------------
+    def score(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """Dense score vector over all documents (zeros for unmatched docs)."""
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        cache: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+        # Accumulate in query-token order (repeats included) so the float sums
+        # are bit-identical to BM25Okapi.get_scores.
+        for term in query_tokens:
+            if term not in cache:
+                cache[term] = self._term_contrib(term)
+            hit = cache[term]
+            if hit is None:
+                continue
+            docs, contrib = hit
+            scores[docs] += contrib
+        return scores
+
+    def top_k(self, query_tokens: Sequence[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (doc_ids, scores) of the k best documents, best first.
+
+        Ties are broken by ascending doc id, matching a stable descending sort
+        over the full score list.
+        """
+        scores = self.score(query_tokens)
+        doc_ids = self._select(scores, k)
+        return doc_ids, scores[doc_ids]
+
+    def score_batch(self, queries: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        Score matrix [len(queries), num_docs]; row i equals score(queries[i]).
+
+        Each distinct term's postings and contributions are computed once for
+        the whole batch. Accumulation walks token positions: at position j
+        every query's j-th token is scattered into the flat score matrix in
+        one vectorized add, so each row sees the same additions in the same
+        order as score() and the results stay bit-identical.
+        """
+        num_queries = len(queries)
+        scores = np.zeros(num_queries * self.num_docs, dtype=np.float64)
+        contribs: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+        for tokens in queries:
+            for term in tokens:
+                if term not in contribs:
+                    contribs[term] = self._term_contrib(term)
+
+        max_len = max((len(tokens) for tokens in queries), default=0)
+        for position in range(max_len):
+            flat_ids, values = [], []
+            for row, tokens in enumerate(queries):
+                if position >= len(tokens):
+                    continue
+                hit = contribs[tokens[position]]
+                if hit is None:
+                    continue
+                docs, contrib = hit
+                flat_ids.append(docs + row * self.num_docs)
+                values.append(contrib)
+            if flat_ids:
+                # One token per query per position: indices are unique
+                scores[np.concatenate(flat_ids)] += np.concatenate(values)
+
+        return scores.reshape(num_queries, self.num_docs)
+
+    def top_k_batch(
+        self, queries: Sequence[Sequence[str]], k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """top_k for every query in one scoring pass."""
+        matrix = self.score_batch(queries)
+        results = []
+        for row in matrix:
+            doc_ids = self._select(row, k)
+            results.append((doc_ids, row[doc_ids]))
+        return results
+
+    def _term_contrib(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            return None
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        docs = self.postings_doc[start:end].astype(np.int64)
+        tf = self.postings_tf[start:end].astype(np.float64)
+        return docs, self.idf[term_id] * (tf * (self.k1 + 1) / (tf + self.doc_norm[docs]))
+
+    def _select(self, scores: np.ndarray, k: int) -> np.ndarray:
+        n = scores.shape[0]
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        if k < n:
+            part = np.argpartition(-scores, k - 1)[:k]
+            kth = scores[part].min()
+            candidates = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[: k - candidates.size]
+            candidates = np.concatenate([candidates, ties])
+        else:
+            candidates = np.arange(n)
+
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order][:k]
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+    def save(self, path: Union[str, Path], corpus_checksum: str) -> None:
+        """Writes the index as a versioned, mmap-friendly binary artifact."""
+        terms = sorted(self.vocab, key=self.vocab.get)
+        arrays = {
+            "vocab": np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+            "indptr": self.indptr.astype("<i8"),
+            "postings_doc": self.postings_doc.astype("<i4"),
+            "postings_tf": self.postings_tf.astype("<i4"),
+            "idf": self.idf.astype("<f8"),
+            "doc_len": self.doc_len.astype("<i4"),
+        }
+
+        layout = {}
+        offset = 0
+        for name, arr in arrays.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            layout[name] = {"dtype": arr.dtype.str, "offset": offset, "count": int(arr.size)}
+            offset += arr.nbytes
+
+        header = json.dumps(
+            {
+                "corpus_checksum": corpus_checksum,
+                "tokenizer": TOKEN_PATTERN,
+                "k1": self.k1,
+                "b": self.b,
+                "num_docs": self.num_docs,
+                "num_terms": len(terms),
+                "arrays": layout,
+            }
+        ).encode("utf-8")
+        prefix = _MAGIC + struct.pack("<II", FORMAT_VERSION, len(header)) + header
+        data_start = -(-len(prefix) // _ALIGN) * _ALIGN
+
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(prefix.ljust(data_start, b"\0"))
+            for name, arr in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(arr.tobytes())
+        tmp_path.replace(path)
+
+        logger.info(
+            "bm25_index_saved",
+            path=str(path),
+            num_docs=self.num_docs,
+            num_terms=len(terms),
+            postings=int(self.postings_doc.size),
+        )
+
+    @classmethod
+    def load(
+        cls, path: Union[str, Path], expected_checksum: Optional[str] = None
+    ) -> Optional["BM25Index"]:
+        """
+        Memory-maps a saved artifact. Arrays are zero-copy views over the map.
+
+        Returns None when the file is missing, has another format version or
+        tokenizer, or was built from a different corpus than expected_checksum.
+        """
+        path = Path(path)
+        if not path.exists():
+            logger.info("bm25_index_artifact_missing", path=str(path))
+            return None
+
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mm[: len(_MAGIC)] != _MAGIC:
+            logger.warning("bm25_index_artifact_invalid", path=str(path), reason="bad_magic")
+            return None
+
+        version, header_len = struct.unpack_from("<II", mm, len(_MAGIC))
+        if version != FORMAT_VERSION:
+            logger.warning(
+                "bm25_index_artifact_stale",
+                path=str(path),
+                reason="format_version",
+                found=version,
+                expected=FORMAT_VERSION,
+            )
+            return None
+
+        header_start = len(_MAGIC) + 8
+        header = json.loads(bytes(mm[header_start : header_start + header_len]))
+        if header["tokenizer"] != TOKEN_PATTERN:
+            logger.warning("bm25_index_artifact_stale", path=str(path), reason="tokenizer")
+            return None
+        if expected_checksum is not None and header["corpus_checksum"] != expected_checksum:
+            logger.warning("bm25_index_artifact_stale", path=str(path), reason="corpus_checksum")
+            return None
+
+        data_start = -(-(header_start + header_len) // _ALIGN) * _ALIGN
+        views = {
+            name: np.frombuffer(
+                mm, dtype=np.dtype(spec["dtype"]), count=spec["count"], offset=data_start + spec["offset"]
+            )
+            for name, spec in header["arrays"].items()
+        }
+
+        terms = views["vocab"].tobytes().decode("utf-8").split("\n") if views["vocab"].size else []
+        vocab = {term: idx for idx, term in enumerate(terms)}
+
+        index = cls(
+            vocab,
+            views["indptr"],
+            views["postings_doc"],
+            views["postings_tf"],
+            views["idf"],
+            views["doc_len"],
+            k1=header["k1"],
+            b=header["b"],
+        )
+        logger.info(
+            "bm25_index_loaded",
+            path=str(path),
+            num_docs=index.num_docs,
+            num_terms=len(vocab),
+        )
+        return index
@@ -0,0 +1,135 @@
+"""
+Pre-generated canonical answers for "What is Section N" questions.
+
+Pipeline position:
+    history-free query matching the "what is section N" shape
+        │
+        ▼
+    [CanonicalAnswerStore]  ← data/canonical_answers.json
+        │ hit (same model, prompt version, corpus and context sections)
+        ▼
+    answer served without an LLM call
+
+Artifact (written by scripts/generate_canonical_answers.py):
+    {
+      "format_version": 1,
+      "model": ..., "prompt_version": ..., "corpus_checksum": ...,
+      "answers": {"302": {"answer": ..., "sections": [...], "usage": {...}}}
+    }
+
+Design decisions:
+- Only the bare section question is served ("What is Section 302?",
+  "explain sec 420 of IPC"). "Is section 302 bailable?" names a single
+  section too, but asks something the canonical answer may not focus on.
+- An answer is served only when the sections it was generated from equal
+  the sections the live pipeline would pass to the LLM right now, so a
+  change to related_sections.json quietly falls back to live generation.
+- A header mismatch (model, prompt version, corpus checksum) disables the
+  whole artifact at load time; it must be regenerated.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+
+CANONICAL_ANSWERS_PATH = Path(__file__).parent.parent.parent / "data" / "canonical_answers.json"
+
+_CANONICAL_QUERY = re.compile(
+    r"^\s*(?:what\s+is|what's|explain|tell\s+me\s+about|define|describe)?\s*"
+    r"(?:ipc\s+)?(?:section|sec\.?|u/s)\s*([0-9]{1,3}[A-Z]?)\s*"
+    r"(?:of\s+(?:the\s+)?(?:ipc|indian\s+penal\s+code)|ipc)?\s*[?.]*\s*$",
+    re.IGNORECASE,
+)
+
+
+def canonical_question(section: str) -> str:
+    """The question each canonical answer is generated for."""
+    return f"What is Section {section} of IPC?"
+
+
+def artifact_header(model: str, prompt_version: str, corpus_checksum: str) -> Dict:
+    return {
+        "format_version": FORMAT_VERSION,
+        "model": model,
+        "prompt_version": prompt_version,
+        "corpus_checksum": corpus_checksum,
+    }
+
+
+def match_canonical_section(query: str) -> Optional[str]:
+    """Returns the section number if `query` is a bare "what is section N" question."""
+    match = _CANONICAL_QUERY.match(query)
+    return match.group(1).upper() if match else None
+
+
+class CanonicalAnswerStore:
+    """Read-only view over a validated canonical answers artifact."""
+
+    def __init__(self, answers: Dict[str, Dict], header: Dict):
+        self.answers = answers
+        self.header = header
+
+    def get(self, section: str, context_sections: Iterable[str]) -> Optional[Dict]:
+        entry = self.answers.get(str(section))
+        if entry is None:
+            return None
+        if sorted(entry.get("sections", [])) != sorted(str(s) for s in context_sections):
+            logger.info("canonical_answer_context_changed", section=section)
+            return None
+        return entry
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        model: str,
+        prompt_version: str,
+        corpus_checksum: str,
+    ) -> Optional["CanonicalAnswerStore"]:
+        path = Path(path)
+        if not path.exists():
+            logger.info("canonical_answers_missing", path=str(path))
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        expected = artifact_header(model, prompt_version, corpus_checksum)
+        stale = {k: data.get(k) for k, v in expected.items() if data.get(k) != v}
+        if stale:
+            logger.warning("canonical_answers_stale", path=str(path), mismatched=stale)
+            return None
+
+        answers = data.get("answers", {})
+        logger.info("canonical_answers_loaded", path=str(path), sections=len(answers))
+        header = {k: v for k, v in data.items() if k != "answers"}
+        return cls(answers, header)
+
+
+_store: Optional[CanonicalAnswerStore] = None
+_store_loaded = False
+
+
+def get_canonical_store() -> Optional[CanonicalAnswerStore]:
+    """Returns the loaded store, or None when the artifact is missing or stale."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        from app.core.llm_chain import get_llm_chain
+        from app.core.retriever import get_retriever
+
+        llm_chain = get_llm_chain()
+        _store = CanonicalAnswerStore.load(
+            CANONICAL_ANSWERS_PATH,
+            model=llm_chain.model,
+            prompt_version=llm_chain.prompt_version,
+            corpus_checksum=get_retriever().corpus_checksum,
+        )
+        _store_loaded = True
+    return _store
@@ -2,15 +2,48 @@
 Chat history management using Redis for persistence.
 
 Multi-user, ownership-enforced, auth-ready design.
+
+ChatHistoryManager (redis-py) and AsyncChatHistoryManager (redis.asyncio,
+used by the async request path) share the key layout and session document
+helpers, so both read and write the same sessions.
+
+Key layout:
+    session:{id}:meta      hash  user_id, created_at, last_activity
+    session:{id}:messages  list  JSON {"role", "content"}, oldest first; an
+                                 assistant reply cut short also has
+                                 "status": "cancelled" or "failed"
+    user_sessions:{user}   zset  session ids scored by last activity (epoch s)
+
+Design decisions:
+- A turn is appended by one Lua script (_ADD_TURN_LUA): ownership check,
+  RPUSH of both messages, LTRIM to max_history_length, last_activity and
+  EXPIRE, atomically and in a single round trip. Concurrent turns on the
+  same session can no longer overwrite each other.
+- Reads are one pipelined HGET + LRANGE; nothing re-serializes the history.
+- Sessions written by the previous layout (one JSON string at session:{id})
+  are migrated lazily by _MIGRATE_SESSION_LUA the first time they are read
+  or written, or in bulk with scripts/migrate_sessions.py. The migration
+  keeps the remaining TTL.
+- The per-user index is a sorted set, bumped by the same turn script, so the
+  latest session is a ZREVRANGE plus one fetch and a page of sessions is a
+  ZREVRANGE slice. Session keys expire on their own; index members whose
+  score is older than the session TTL are reaped (ZREMRANGEBYSCORE) whenever
+  the index is read, and members whose keys have vanished early are removed
+  when a read finds them missing. The index itself expires with its newest
+  session.
+- A user index still in the old plain-set layout is converted to the sorted
+  set (under WATCH) the first time a command hits WRONGTYPE on it; until then
+  the turn script leaves it alone.
 """
 
 import json
 import uuid
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
 from datetime import datetime
 
 import redis
-from redis.exceptions import RedisError
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
 
 from app.config import settings
 from app.utils import get_logger, InvalidSessionError
@@ -18,17 +51,211 @@ from app.utils import get_logger, InvalidSessionError
 logger = get_logger(__name__)
 
 
-class ChatHistoryManager:
+# KEYS: meta, messages, user index
+# ARGV: user_id, session_id, last_activity, activity_score, ttl_seconds,
+#       max_history_length, message...
+# Returns the new history length, -1 if the session is missing, -2 if not owned.
+_ADD_TURN_LUA = """
+local owner = redis.call('HGET', KEYS[1], 'user_id')
+if not owner then
+    return -1
+end
+if owner ~= ARGV[1] then
+    return -2
+end
+for i = 7, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[6]), -1)
+redis.call('HSET', KEYS[1], 'last_activity', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+-- A legacy plain-set index is converted by the next read that touches it
+if redis.call('TYPE', KEYS[3])['ok'] ~= 'set' then
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[2])
+    redis.call('EXPIRE', KEYS[3], ARGV[5])
+end
+return redis.call('LLEN', KEYS[2])
+"""
+
+# KEYS: legacy session key, meta, messages
+# ARGV: max_history_length
+# Returns 1 if migrated, 0 if already in the new layout, -1 if no session.
+_MIGRATE_SESSION_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+local raw = redis.call('GET', KEYS[1])
+if not raw then
+    return -1
+end
+local ttl = redis.call('TTL', KEYS[1])
+local data = cjson.decode(raw)
+redis.call('HSET', KEYS[2],
+    'user_id', data['user_id'],
+    'created_at', data['created_at'] or '',
+    'last_activity', data['last_activity'] or '')
+local history = data['history'] or {}
+for i = math.max(1, #history - tonumber(ARGV[1]) + 1), #history do
+    redis.call('RPUSH', KEYS[3], cjson.encode({role = history[i]['role'], content = history[i]['content']}))
+end
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[2], ttl)
+    if #history > 0 then
+        redis.call('EXPIRE', KEYS[3], ttl)
+    end
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+_SESSION_MISSING = -1
+_SESSION_NOT_OWNED = -2
+
+# Index members fetched per round trip while looking for the latest live session
+_LATEST_SCAN_WINDOW = 4
+
+
+def _activity_score(last_activity: Optional[str]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(last_activity).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_wrong_type(error: ResponseError) -> bool:
+    # Pipeline errors are prefixed with the failing command
+    return "WRONGTYPE" in str(error)
+
+
+class _SessionStoreBase:
+    def __init__(self, max_history_length: int, session_ttl_hours: int):
+        self.max_history_length = max_history_length
+        self.session_ttl_seconds = session_ttl_hours * 3600
+
+    # ------------------------
+    # Helpers
+    # ------------------------
+    def _legacy_session_key(self, session_id: str) -> str:
+        return f"session:{session_id}"
+
+    def _meta_key(self, session_id: str) -> str:
+        return f"session:{session_id}:meta"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"session:{session_id}:messages"
+
+    def _user_sessions_key(self, user_id: str) -> str:
+        return f"user_sessions:{user_id}"
+
+    def _session_keys(self, session_id: str) -> List[str]:
+        return [
+            self._legacy_session_key(session_id),
+            self._meta_key(session_id),
+            self._messages_key(session_id),
+        ]
+
+    @staticmethod
+    def _new_session_meta(user_id: str) -> Dict[str, str]:
+        now = datetime.now().isoformat()
+        return {
+            "user_id": user_id,
+            "created_at": now,
+            "last_activity": now,
+        }
+
+    @staticmethod
+    def _check_owner(owner: Optional[str], user_id: str) -> None:
+        if owner is None:
+            raise InvalidSessionError("Session not found or expired")
+        if owner != user_id:
+            raise InvalidSessionError("Session does not belong to user")
+
+    def _check_add_result(self, result: int) -> None:
+        if result == _SESSION_MISSING:
+            raise InvalidSessionError("Session not found or expired")
+        if result == _SESSION_NOT_OWNED:
+            raise InvalidSessionError("Session does not belong to user")
+
+    def _add_turn_keys(self, user_id: str, session_id: str) -> List[str]:
+        return [
+            self._meta_key(session_id),
+            self._messages_key(session_id),
+            self._user_sessions_key(user_id),
+        ]
+
+    def _add_turn_args(
+        self,
+        user_id: str,
+        session_id: str,
+        messages: Sequence[Tuple[str, ...]],
+    ) -> List:
+        now = datetime.now()
+        return [
+            user_id,
+            session_id,
+            now.isoformat(),
+            now.timestamp(),
+            self.session_ttl_seconds,
+            self.max_history_length,
+            *(self._message_json(*message) for message in messages),
+        ]
+
+    @staticmethod
+    def _message_json(role: str, content: str, status: Optional[str] = None) -> str:
+        message = {"role": role, "content": content}
+        if status is not None:
+            message["status"] = status
+        return json.dumps(message)
+
+    def _queue_create(self, pipe, user_id: str, session_id: str) -> None:
+        meta = self._new_session_meta(user_id)
+        index_key = self._user_sessions_key(user_id)
+        pipe.hset(self._meta_key(session_id), mapping=meta)
+        pipe.expire(self._meta_key(session_id), self.session_ttl_seconds)
+        pipe.zadd(index_key, {session_id: _activity_score(meta["last_activity"])})
+        pipe.expire(index_key, self.session_ttl_seconds)
+
+    def _queue_reap(self, pipe, user_id: str) -> None:
+        """Drops index members idle for longer than the session TTL (their keys are gone)."""
+        cutoff = datetime.now().timestamp() - self.session_ttl_seconds
+        pipe.zremrangebyscore(self._user_sessions_key(user_id), "-inf", f"({cutoff}")
+
+    def _index_scores(self, session_ids: Sequence[str], metas, user_id: str) -> Dict[str, float]:
+        """Sorted-set scores for the live, owned sessions of a legacy set index."""
+        scores = {}
+        for session_id, (owner, last_activity) in zip(session_ids, metas):
+            score = _activity_score(last_activity)
+            if owner == user_id and score is not None:
+                scores[session_id] = score
+        return scores
+
+    @staticmethod
+    def _session_summary(session_id: str, score: float, meta, message_count: int) -> Dict:
+        _, created_at, last_activity = meta
+        return {
+            "session_id": session_id,
+            "created_at": created_at,
+            "last_activity": last_activity or datetime.fromtimestamp(score).isoformat(),
+            "message_count": message_count,
+        }
+
+    @staticmethod
+    def _decode_history(raws: Iterable[str]) -> List[Dict[str, str]]:
+        return [json.loads(raw) for raw in raws]
+
+
+class ChatHistoryManager(_SessionStoreBase):
     def __init__(
         self,
         max_history_length: int = 10,
         session_ttl_hours: int = 24,
+        redis_client: Optional[redis.Redis] = None,
     ):
-        self.max_history_length = max_history_length
-        self.session_ttl_seconds = session_ttl_hours * 3600
+        super().__init__(max_history_length, session_ttl_hours)
 
         try:
-            self.redis_client = redis.Redis.from_url(
+            self.redis_client = redis_client or redis.Redis.from_url(
                 settings.REDIS_URL,
                 decode_responses=True,
                 socket_timeout=5,
@@ -46,14 +273,8 @@ class ChatHistoryManager:
             logger.error("redis_connection_failed", error=str(e))
             raise RuntimeError(f"Redis unavailable: {e}")
 
-    # ------------------------
-    # Helpers
-    # ------------------------
-    def _session_key(self, session_id: str) -> str:
-        return f"session:{session_id}"
-
-    def _user_sessions_key(self, user_id: str) -> str:
-        return f"user_sessions:{user_id}"
+        self._add_turn_script = self.redis_client.register_script(_ADD_TURN_LUA)
+        self._migrate_script = self.redis_client.register_script(_MIGRATE_SESSION_LUA)
 
     # ------------------------
     # Session lifecycle
@@ -61,22 +282,18 @@ class ChatHistoryManager:
     def create_session(self, user_id: str) -> str:
         session_id = str(uuid.uuid4())
 
-        session_data = {
-            "user_id": user_id,
-            "history": [],
-            "created_at": datetime.now().isoformat(),
-            "last_activity": datetime.now().isoformat(),
-        }
-
         try:
-            pipe = self.redis_client.pipeline()
-            pipe.setex(
-                self._session_key(session_id),
-                self.session_ttl_seconds,
-                json.dumps(session_data),
-            )
-            pipe.sadd(self._user_sessions_key(user_id), session_id)
-            pipe.execute()
+            try:
+                pipe = self.redis_client.pipeline()
+                self._queue_create(pipe, user_id, session_id)
+                pipe.execute()
+            except ResponseError as e:
+                if not _is_wrong_type(e):
+                    raise
+                self.migrate_user_index(user_id)
+                pipe = self.redis_client.pipeline()
+                self._queue_create(pipe, user_id, session_id)
+                pipe.execute()
 
             logger.info(
                 "session_created",
@@ -89,23 +306,83 @@ class ChatHistoryManager:
             logger.error("session_creation_failed", error=str(e))
             raise InvalidSessionError("Failed to create session")
 
+    def migrate_session(self, session_id: str) -> bool:
+        """Moves a legacy JSON session into the hash + list layout; True if it now exists there."""
+        result = self._migrate_script(
+            keys=self._session_keys(session_id),
+            args=[self.max_history_length],
+        )
+        if result == 1:
+            logger.info("session_migrated", session_id=session_id)
+        return result != _SESSION_MISSING
+
+    def migrate_user_index(self, user_id: str) -> bool:
+        """Converts a legacy set index to the sorted set; True if it was converted."""
+        index_key = self._user_sessions_key(user_id)
+
+        def convert(pipe) -> bool:
+            if pipe.type(index_key) != "set":
+                return False
+            session_ids = list(pipe.smembers(index_key))
+            for session_id in session_ids:
+                self.migrate_session(session_id)
+            scores = self._index_scores(session_ids, self._session_metas(session_ids), user_id)
+
+            pipe.multi()
+            pipe.delete(index_key)
+            if scores:
+                pipe.zadd(index_key, scores)
+                pipe.expire(index_key, self.session_ttl_seconds)
+            return True
+
+        converted = self.redis_client.transaction(convert, index_key, value_from_callable=True)
+        if converted:
+            logger.info("session_index_migrated", user_id=user_id)
+        return converted
+
+    def _read_session(self, session_id: str):
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hget(self._meta_key(session_id), "user_id")
+        pipe.lrange(self._messages_key(session_id), 0, -1)
+        return pipe.execute()
+
     def get_history(self, user_id: str, session_id: str) -> List[Dict[str, str]]:
         try:
-            raw = self.redis_client.get(self._session_key(session_id))
-            if raw is None:
-                raise InvalidSessionError("Session not found or expired")
-
-            session_data = json.loads(raw)
+            owner, raws = self._read_session(session_id)
+            if owner is None and self.migrate_session(session_id):
+                owner, raws = self._read_session(session_id)
 
-            if session_data["user_id"] != user_id:
-                raise InvalidSessionError("Session does not belong to user")
-
-            return session_data["history"]
+            self._check_owner(owner, user_id)
+            return self._decode_history(raws)
 
         except (RedisError, json.JSONDecodeError) as e:
             logger.error("get_history_failed", error=str(e))
             raise InvalidSessionError("Failed to retrieve session history")
 
+    def add_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        messages: Sequence[Tuple[str, ...]],
+    ) -> None:
+        """
+        Appends (role, content) or (role, content, status) messages atomically,
+        trimming to max_history_length.
+        """
+        try:
+            keys = self._add_turn_keys(user_id, session_id)
+            args = self._add_turn_args(user_id, session_id, messages)
+
+            result = self._add_turn_script(keys=keys, args=args)
+            if result == _SESSION_MISSING and self.migrate_session(session_id):
+                result = self._add_turn_script(keys=keys, args=args)
+
+            self._check_add_result(result)
+
+        except (RedisError, json.JSONDecodeError) as e:
+            logger.error("add_message_failed", error=str(e))
+            raise InvalidSessionError("Failed to update session")
+
     def add_message(
         self,
         user_id: str,
@@ -113,79 +390,277 @@ class ChatHistoryManager:
         role: str,
         content: str,
     ) -> None:
+        self.add_turn(user_id, session_id, [(role, content)])
+
+    # ------------------------
+    # Session index
+    # ------------------------
+    def _session_metas(self, session_ids: Sequence[str]) -> List:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hmget(self._meta_key(session_id), "user_id", "last_activity")
+        return pipe.execute()
+
+    def _index_page(self, user_id: str, start: int, stop: int) -> Tuple[int, List[Tuple[str, float]]]:
+        """Reaps the index, then returns (total, [(session_id, score)]) newest first."""
+        index_key = self._user_sessions_key(user_id)
+        for attempt in range(2):
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_reap(pipe, user_id)
+                pipe.zcard(index_key)
+                pipe.zrevrange(index_key, start, stop, withscores=True)
+                _, total, page = pipe.execute()
+                return total, page
+            except ResponseError as e:
+                if attempt or not _is_wrong_type(e):
+                    raise
+                self.migrate_user_index(user_id)
+
+    def list_sessions(self, user_id: str, limit: int = 20, offset: int = 0) -> Dict:
+        """The user's sessions, most recently active first: {"total", "sessions"}."""
+        total, page = self._index_page(user_id, offset, offset + limit - 1)
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for session_id, _ in page:
+            pipe.hmget(self._meta_key(session_id), "user_id", "created_at", "last_activity")
+            pipe.llen(self._messages_key(session_id))
+        replies = pipe.execute()
+
+        sessions, stale = [], []
+        for (session_id, score), meta, count in zip(page, replies[::2], replies[1::2]):
+            if meta[0] != user_id:
+                stale.append(session_id)
+                continue
+            sessions.append(self._session_summary(session_id, score, meta, count))
+
+        if stale:
+            self.redis_client.zrem(self._user_sessions_key(user_id), *stale)
+        return {"total": total - len(stale), "sessions": sessions}
+
+    # ------------------------
+    # NEW: restore latest session
+    # ------------------------
+    def get_latest_session(self, user_id: str) -> Optional[Dict]:
         try:
-            key = self._session_key(session_id)
-            raw = self.redis_client.get(key)
+            while True:
+                _, page = self._index_page(user_id, 0, _LATEST_SCAN_WINDOW - 1)
+                if not page:
+                    return None
+
+                for session_id, _ in page:
+                    owner, raws = self._read_session(session_id)
+                    if owner == user_id:
+                        return {
+                            "session_id": session_id,
+                            "history": self._decode_history(raws),
+                        }
+                    # Expired (or foreign) before its score aged out: reap it now
+                    self.redis_client.zrem(self._user_sessions_key(user_id), session_id)
 
-            if raw is None:
-                raise InvalidSessionError("Session not found or expired")
+        except Exception as e:
+            logger.error("get_latest_session_failed", error=str(e))
+            return None
 
-            session_data = json.loads(raw)
 
-            if session_data["user_id"] != user_id:
-                raise InvalidSessionError("Session does not belong to user")
+class AsyncChatHistoryManager(_SessionStoreBase):
+    """redis.asyncio twin of ChatHistoryManager (connects lazily; see ping())."""
 
-            session_data["history"].append(
-                {"role": role, "content": content}
-            )
+    def __init__(
+        self,
+        max_history_length: int = 10,
+        session_ttl_hours: int = 24,
+        redis_client: Optional[aioredis.Redis] = None,
+    ):
+        super().__init__(max_history_length, session_ttl_hours)
+        self.redis_client = redis_client or aioredis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+        )
+        self._add_turn_script = self.redis_client.register_script(_ADD_TURN_LUA)
+        self._migrate_script = self.redis_client.register_script(_MIGRATE_SESSION_LUA)
+
+    async def ping(self) -> None:
+        try:
+            await self.redis_client.ping()
+        except RedisError as e:
+            logger.error("redis_connection_failed", error=str(e))
+            raise RuntimeError(f"Redis unavailable: {e}")
 
-            if len(session_data["history"]) > self.max_history_length:
-                session_data["history"] = session_data["history"][
-                    -self.max_history_length :
-                ]
+    async def close(self) -> None:
+        await self.redis_client.aclose()
 
-            session_data["last_activity"] = datetime.now().isoformat()
+    # ------------------------
+    # Session lifecycle
+    # ------------------------
+    async def create_session(self, user_id: str) -> str:
+        session_id = str(uuid.uuid4())
 
-            self.redis_client.setex(
-                key,
-                self.session_ttl_seconds,
-                json.dumps(session_data),
+        try:
+            try:
+                pipe = self.redis_client.pipeline()
+                self._queue_create(pipe, user_id, session_id)
+                await pipe.execute()
+            except ResponseError as e:
+                if not _is_wrong_type(e):
+                    raise
+                await self.migrate_user_index(user_id)
+                pipe = self.redis_client.pipeline()
+                self._queue_create(pipe, user_id, session_id)
+                await pipe.execute()
+
+            logger.info(
+                "session_created",
+                user_id=user_id,
+                session_id=session_id,
             )
+            return session_id
 
-        except (RedisError, json.JSONDecodeError) as e:
-            logger.error("add_message_failed", error=str(e))
-            raise InvalidSessionError("Failed to update session")
+        except RedisError as e:
+            logger.error("session_creation_failed", error=str(e))
+            raise InvalidSessionError("Failed to create session")
 
-    def list_user_sessions(self, user_id: str) -> List[str]:
+    async def migrate_session(self, session_id: str) -> bool:
+        result = await self._migrate_script(
+            keys=self._session_keys(session_id),
+            args=[self.max_history_length],
+        )
+        if result == 1:
+            logger.info("session_migrated", session_id=session_id)
+        return result != _SESSION_MISSING
+
+    async def migrate_user_index(self, user_id: str) -> bool:
+        index_key = self._user_sessions_key(user_id)
+
+        async def convert(pipe) -> bool:
+            if await pipe.type(index_key) != "set":
+                return False
+            session_ids = list(await pipe.smembers(index_key))
+            for session_id in session_ids:
+                await self.migrate_session(session_id)
+            scores = self._index_scores(session_ids, await self._session_metas(session_ids), user_id)
+
+            pipe.multi()
+            pipe.delete(index_key)
+            if scores:
+                pipe.zadd(index_key, scores)
+                pipe.expire(index_key, self.session_ttl_seconds)
+            return True
+
+        converted = await self.redis_client.transaction(convert, index_key, value_from_callable=True)
+        if converted:
+            logger.info("session_index_migrated", user_id=user_id)
+        return converted
+
+    async def _read_session(self, session_id: str):
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hget(self._meta_key(session_id), "user_id")
+        pipe.lrange(self._messages_key(session_id), 0, -1)
+        return await pipe.execute()
+
+    async def get_history(self, user_id: str, session_id: str) -> List[Dict[str, str]]:
         try:
-            return list(
-                self.redis_client.smembers(
-                    self._user_sessions_key(user_id)
-                )
-            )
-        except RedisError:
-            return []
+            owner, raws = await self._read_session(session_id)
+            if owner is None and await self.migrate_session(session_id):
+                owner, raws = await self._read_session(session_id)
 
-    # ------------------------
-    # NEW: restore latest session
-    # ------------------------
-    def get_latest_session(self, user_id: str) -> Optional[Dict]:
+            self._check_owner(owner, user_id)
+            return self._decode_history(raws)
+
+        except (RedisError, json.JSONDecodeError) as e:
+            logger.error("get_history_failed", error=str(e))
+            raise InvalidSessionError("Failed to retrieve session history")
+
+    async def add_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        messages: Sequence[Tuple[str, ...]],
+    ) -> None:
         try:
-            session_ids = self.list_user_sessions(user_id)
-            if not session_ids:
-                return None
+            keys = self._add_turn_keys(user_id, session_id)
+            args = self._add_turn_args(user_id, session_id, messages)
 
-            latest_session = None
-            latest_time = None
+            result = await self._add_turn_script(keys=keys, args=args)
+            if result == _SESSION_MISSING and await self.migrate_session(session_id):
+                result = await self._add_turn_script(keys=keys, args=args)
 
-            for session_id in session_ids:
-                raw = self.redis_client.get(self._session_key(session_id))
-                if not raw:
-                    continue
+            self._check_add_result(result)
 
-                data = json.loads(raw)
-                last_activity = data.get("last_activity")
+        except (RedisError, json.JSONDecodeError) as e:
+            logger.error("add_message_failed", error=str(e))
+            raise InvalidSessionError("Failed to update session")
 
-                if last_activity and (
-                    latest_time is None or last_activity > latest_time
-                ):
-                    latest_time = last_activity
-                    latest_session = {
-                        "session_id": session_id,
-                        "history": data.get("history", []),
-                    }
+    async def add_message(
+        self,
+        user_id: str,
+        session_id: str,
+        role: str,
+        content: str,
+    ) -> None:
+        await self.add_turn(user_id, session_id, [(role, content)])
 
-            return latest_session
+    # ------------------------
+    # Session index
+    # ------------------------
+    async def _session_metas(self, session_ids: Sequence[str]) -> List:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hmget(self._meta_key(session_id), "user_id", "last_activity")
+        return await pipe.execute()
+
+    async def _index_page(self, user_id: str, start: int, stop: int) -> Tuple[int, List[Tuple[str, float]]]:
+        index_key = self._user_sessions_key(user_id)
+        for attempt in range(2):
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_reap(pipe, user_id)
+                pipe.zcard(index_key)
+                pipe.zrevrange(index_key, start, stop, withscores=True)
+                _, total, page = await pipe.execute()
+                return total, page
+            except ResponseError as e:
+                if attempt or not _is_wrong_type(e):
+                    raise
+                await self.migrate_user_index(user_id)
+
+    async def list_sessions(self, user_id: str, limit: int = 20, offset: int = 0) -> Dict:
+        total, page = await self._index_page(user_id, offset, offset + limit - 1)
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for session_id, _ in page:
+            pipe.hmget(self._meta_key(session_id), "user_id", "created_at", "last_activity")
+            pipe.llen(self._messages_key(session_id))
+        replies = await pipe.execute()
+
+        sessions, stale = [], []
+        for (session_id, score), meta, count in zip(page, replies[::2], replies[1::2]):
+            if meta[0] != user_id:
+                stale.append(session_id)
+                continue
+            sessions.append(self._session_summary(session_id, score, meta, count))
+
+        if stale:
+            await self.redis_client.zrem(self._user_sessions_key(user_id), *stale)
+        return {"total": total - len(stale), "sessions": sessions}
+
+    async def get_latest_session(self, user_id: str) -> Optional[Dict]:
+        try:
+            while True:
+                _, page = await self._index_page(user_id, 0, _LATEST_SCAN_WINDOW - 1)
+                if not page:
+                    return None
+
+                for session_id, _ in page:
+                    owner, raws = await self._read_session(session_id)
+                    if owner == user_id:
+                        return {
+                            "session_id": session_id,
+                            "history": self._decode_history(raws),
+                        }
+                    await self.redis_client.zrem(self._user_sessions_key(user_id), session_id)
 
         except Exception as e:
             logger.error("get_latest_session_failed", error=str(e))
@@ -194,6 +669,7 @@ class ChatHistoryManager:
 
 # Singleton
 _history_manager: Optional[ChatHistoryManager] = None
+_async_history_manager: Optional[AsyncChatHistoryManager] = None
 
 
 def get_history_manager() -> ChatHistoryManager:
@@ -201,3 +677,17 @@ def get_history_manager() -> ChatHistoryManager:
     if _history_manager is None:
         _history_manager = ChatHistoryManager()
     return _history_manager
+
+
+def get_async_history_manager() -> AsyncChatHistoryManager:
+    global _async_history_manager
+    if _async_history_manager is None:
+        _async_history_manager = AsyncChatHistoryManager()
+    return _async_history_manager
+
+
+async def close_async_history_manager() -> None:
+    global _async_history_manager
+    if _async_history_manager is not None:
+        await _async_history_manager.close()
+        _async_history_manager = None
@@ -15,16 +15,20 @@ Pipeline position:
 
 Design decisions:
 - Fully decoupled from both the retriever and LLM chain.
-- Related sections loaded from ipc_by_section (BM25 in-memory cache in retriever).
+- Related sections are resolved to SectionStore ids once, at init, and read
+  from the retriever's in-memory store; only the sections actually added are
+  materialized.
 - Prevents duplicate sections — already-retrieved sections are not re-added.
 - Expanded docs are tagged with source="expansion" for observability.
-- Falls back gracefully if a related section is not in the BM25 index.
+- Falls back gracefully if a related section is not in the corpus (logged
+  once at init, then skipped).
 """
 
 import json
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 
+from app.core.section_store import SectionStore
 from app.models import RetrievedDocument
 from app.utils import get_logger
 
@@ -41,20 +45,35 @@ _EXPANSION_SCORE = 0.85
 class ContextExpander:
     """Expands a list of retrieved documents with related IPC sections."""
 
-    def __init__(self, ipc_by_section: Dict[str, dict]):
+    def __init__(self, store: SectionStore):
         """
         Args:
-            ipc_by_section: The in-memory section lookup dict from DocumentRetriever.
-                            Keys are string section numbers, values are raw dicts
-                            with 'title', 'text', 'section_number' fields.
+            store: The in-memory SectionStore from DocumentRetriever.
         """
-        self.ipc_by_section = ipc_by_section
+        self.store = store
         self.section_map = self._load_section_map()
+        self.related_ids = self._resolve_related_ids()
         logger.info(
             "context_expander_initialized",
             mapped_sections=len(self.section_map),
         )
 
+    def _resolve_related_ids(self) -> Dict[str, List[int]]:
+        """section -> store ids of its related sections, in mapping order."""
+        related_ids: Dict[str, List[int]] = {}
+        not_found: Set[str] = set()
+        for section, related in self.section_map.items():
+            ids, missing = self.store.ids_of(related)
+            related_ids[str(section)] = ids
+            not_found.update(missing)
+        if not_found:
+            logger.warning(
+                "expansion_sections_not_found",
+                count=len(not_found),
+                sections=sorted(not_found),
+            )
+        return related_ids
+
     def _load_section_map(self) -> Dict[str, List[str]]:
         """Loads the related sections mapping from JSON."""
         try:
@@ -92,34 +111,15 @@ class ContextExpander:
         added_sections: List[str] = []
 
         for doc in documents:
-            section_key = str(doc.section)
-            related = self.section_map.get(section_key, [])
-
-            for related_sec in related:
-                related_sec_str = str(related_sec)
+            for related_id in self.related_ids.get(str(doc.section), []):
+                related_sec_str = self.store.sections[related_id]
 
                 # Skip if already in result set
                 if related_sec_str in already_retrieved:
                     continue
 
-                # Fetch from in-memory BM25 index
-                raw = self.ipc_by_section.get(related_sec_str)
-                if raw is None:
-                    logger.warning(
-                        "expansion_section_not_found",
-                        section=related_sec_str,
-                        triggered_by=section_key,
-                    )
-                    continue
-
-                expanded_docs.append(
-                    RetrievedDocument(
-                        section=related_sec_str,
-                        title=raw.get("title", ""),
-                        text=raw.get("text", ""),
-                        score=_EXPANSION_SCORE,
-                    )
-                )
+                # Materialize from the in-memory store
+                expanded_docs.append(self.store.document(related_id, _EXPANSION_SCORE))
                 already_retrieved.add(related_sec_str)
                 added_sections.append(related_sec_str)
 
@@ -140,7 +140,7 @@ class ContextExpander:
 
 
 # ---------------------------------------------------------------------------
-# Singleton factory — requires retriever's ipc_by_section at first init
+# Singleton factory — requires retriever's section store at first init
 # ---------------------------------------------------------------------------
 _expander: Optional[ContextExpander] = None
 
@@ -149,11 +149,11 @@ def get_context_expander() -> ContextExpander:
     """
     Returns the singleton ContextExpander.
     Must be called AFTER the DocumentRetriever has been initialized
-    (so ipc_by_section is already populated in memory).
+    (so its section store is already populated in memory).
     """
     global _expander
     if _expander is None:
         from app.core.retriever import get_retriever
         retriever = get_retriever()
-        _expander = ContextExpander(ipc_by_section=retriever.ipc_by_section)
+        _expander = ContextExpander(store=retriever.store)
     return _expander
@@ -0,0 +1,289 @@
+"""
+Token-budgeted context packing for the LLM prompt.
+
+Pipeline position:
+    Retrieved + expanded documents (rank order)
+        │
+        ▼
+    [ContextPacker]  ← data/ipc_tokens.json (per-part token counts)
+        │
+        ├── "[Source n] Section ..." blocks ──► LLMChain prompt
+        └── included / partial / dropped ────► response metadata
+
+Artifact (written by scripts/build_index_artifacts.py):
+    {
+      "format_version": 1, "tokenizer": ..., "corpus_checksum": ...,
+      "sections": {"378": {"header": 9, "parts": [["body", 0, 197, 41], ...]}}
+    }
+    Each part is [kind, start, end, tokens] over the section's text.
+
+Design decisions:
+- A section's text is split once, at index time, into whole parts: the body,
+  then every Explanation / Exception / Proviso / Illustration block. A part is
+  sent whole or not at all, so the prompt never ends mid-sentence.
+- Documents are packed in rank order (the retriever's score order, expansion
+  sections after the results they were expanded from). A section goes in
+  whole when it fits; otherwise its body plus the sub-parts that still fit,
+  explanations, exceptions and provisos before illustrations. A section whose
+  body does not fit is dropped and packing moves on to the next one, so one
+  long section cannot crowd out the short punishment section after it.
+- The top-ranked body is always sent, even past the budget: answering from
+  nothing is worse than a slightly long prompt.
+- Token counts approximate Llama-3's BPE without shipping its vocabulary
+  (short words are one token, long words, digit runs and punctuation cost
+  more). The tokenizer name is pinned in the artifact, so changing the
+  estimator invalidates it. A missing or stale artifact is rebuilt in memory
+  at startup, and text that is not in the corpus (Qdrant fallback payloads)
+  is split and counted on the fly.
+- Entries are held by SectionStore id, and the corpus text they index into
+  is read from the store: a document is packed from its artifact entry only
+  when its text is the store's text for that id.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.section_store import SectionStore
+from app.models import RetrievedDocument
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+TOKENIZER = "approx-llama3-v1"
+
+TOKEN_COUNTS_PATH = Path(__file__).parent.parent.parent / "data" / "ipc_tokens.json"
+
+# "[Source n]\n" plus the blank line between sources
+_SOURCE_OVERHEAD_TOKENS = 6
+
+# Sub-part markers; a marker must follow punctuation (the corpus text has no
+# line breaks) and look like a heading, not a reference such as
+# "Explanation 1 to section 376".
+_PART_MARKER = re.compile(
+    r"(?:(?<=[.:;,—)\]])|(?<=[.:;,—)\]]\s))"
+    r"(?:"
+    r"(?P<illustration>Illustrations?(?=\s*[(A-Z—]))"
+    r"|(?P<explanation>Explanations?\s*\d*\s*(?=[.\-—]))"
+    r"|(?P<exception>(?:(?:First|Second|Third|Fourth|Fifth|Sixth|Seventh|Eighth|Ninth|Tenth)\s+)?"
+    r"Exceptions?\s*\d*\s*(?=[.\-—]))"
+    r"|(?P<proviso>Provisos?(?=\s*[—\-:.])|Provided(?=\s*(?:[—\-,]|that\b|further\b|also\b)))"
+    r")"
+)
+# A marker followed by almost nothing ("Provisos— ") heads the next part
+_MIN_PART_CHARS = 25
+
+# Sub-parts kept first when a section only partly fits
+_PART_PRIORITY = {"explanation": 0, "exception": 0, "proviso": 0, "illustration": 1}
+
+_TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d+|\S")
+
+
+# ---------------------------------------------------------------------------
+# Token counting and section splitting
+# ---------------------------------------------------------------------------
+def count_tokens(text: str) -> int:
+    """Approximate Llama-3 token count of `text`."""
+    tokens = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        if piece[0].isdigit():
+            # Llama-3 splits digit runs into groups of up to three
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isascii() and piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 8
+        else:
+            tokens += 1
+    return tokens
+
+
+def split_parts(text: str) -> List[Tuple[str, int, int]]:
+    """[(kind, start, end)] covering `text`: the body, then each sub-part."""
+    bounds: List[Tuple[str, int]] = [("body", 0)]
+    for match in _PART_MARKER.finditer(text):
+        if match.start() > 0:
+            bounds.append((match.lastgroup, match.start()))
+
+    parts: List[List] = []
+    for (kind, start), (_, end) in zip(bounds, bounds[1:] + [("", len(text))]):
+        if parts and parts[-1][0] != "body" and len(text[parts[-1][1]:parts[-1][2]].strip()) < _MIN_PART_CHARS:
+            parts[-1][2] = end
+            continue
+        parts.append([kind, start, end])
+    return [(kind, start, end) for kind, start, end in parts]
+
+
+def section_header(section: str, title: Optional[str]) -> str:
+    return f"Section {section}: {title}"
+
+
+def section_entry(section: str, title: Optional[str], text: str) -> Dict:
+    """Token artifact entry for one section."""
+    return {
+        "header": count_tokens(section_header(section, title)) + _SOURCE_OVERHEAD_TOKENS,
+        "parts": [
+            [kind, start, end, count_tokens(text[start:end])]
+            for kind, start, end in split_parts(text)
+        ],
+    }
+
+
+def build_token_counts(docs: Sequence[Dict], corpus_checksum: str) -> Dict:
+    return {
+        "format_version": FORMAT_VERSION,
+        "tokenizer": TOKENIZER,
+        "corpus_checksum": corpus_checksum,
+        "sections": {
+            str(doc["section_number"]): section_entry(
+                str(doc["section_number"]), doc.get("title"), doc.get("text") or ""
+            )
+            for doc in docs
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Packing
+# ---------------------------------------------------------------------------
+@dataclass
+class PackedContext:
+    """The context string sent to the LLM and what went into it."""
+
+    text: str
+    budget_tokens: int
+    used_tokens: int = 0
+    included: List[str] = field(default_factory=list)
+    partial: List[Dict] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    def report(self) -> Dict:
+        return {
+            "budget_tokens": self.budget_tokens,
+            "used_tokens": self.used_tokens,
+            "included": self.included,
+            "partial": self.partial,
+            "dropped": self.dropped,
+        }
+
+
+class ContextPacker:
+    """Fills a token budget with whole sections or whole section parts."""
+
+    def __init__(self, store: SectionStore, entries: List[Optional[Dict]]):
+        # Corpus text each entry's offsets refer to
+        self.store = store
+        # Token entry of each store id (None: not in the artifact)
+        self.entries = entries
+
+    @classmethod
+    def from_sections(cls, store: SectionStore, sections: Dict[str, Dict]) -> "ContextPacker":
+        """Indexes artifact entries (keyed by section number) by store id."""
+        return cls(store, [sections.get(section) for section in store.sections])
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        store: SectionStore,
+        corpus_checksum: str,
+    ) -> "ContextPacker":
+        """Loads the token artifact, or counts the corpus in memory if it is missing or stale."""
+        path = Path(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                artifact = json.load(f)
+            stale = [
+                name
+                for name, expected in (
+                    ("format_version", FORMAT_VERSION),
+                    ("tokenizer", TOKENIZER),
+                    ("corpus_checksum", corpus_checksum),
+                )
+                if artifact.get(name) != expected
+            ]
+            if not stale:
+                logger.info("token_counts_loaded", path=str(path), sections=len(artifact["sections"]))
+                return cls.from_sections(store, artifact["sections"])
+            logger.warning("token_counts_artifact_stale", path=str(path), reason=stale)
+        except FileNotFoundError:
+            logger.info("token_counts_artifact_missing", path=str(path))
+
+        sections = build_token_counts(list(store.iter_dicts()), corpus_checksum)["sections"]
+        return cls.from_sections(store, sections)
+
+    def _entry(self, doc: RetrievedDocument) -> Tuple[Dict, str]:
+        text = doc.text or ""
+        sid = self.store.id_of(doc.section)
+        entry = self.entries[sid] if sid is not None else None
+        if entry is not None and self.store.text(sid) == text:
+            return entry, text
+        return section_entry(doc.section, doc.title, text), text
+
+    @staticmethod
+    def _fit_parts(parts: List[List], room: int) -> List[int]:
+        """Indices of the sub-parts (after the body) that fit in `room`, in priority order."""
+        chosen = []
+        for idx in sorted(range(1, len(parts)), key=lambda i: (_PART_PRIORITY.get(parts[i][0], 1), i)):
+            if parts[idx][3] <= room:
+                chosen.append(idx)
+                room -= parts[idx][3]
+        return sorted(chosen)
+
+    def pack(self, documents: List[RetrievedDocument], budget_tokens: int) -> PackedContext:
+        packed = PackedContext(text="", budget_tokens=budget_tokens)
+        if not documents:
+            packed.text = "No relevant IPC sections were found."
+            return packed
+
+        blocks = []
+        for doc in documents:
+            entry, text = self._entry(doc)
+            parts = entry["parts"]
+            room = budget_tokens - packed.used_tokens - entry["header"]
+            total = sum(part[3] for part in parts)
+
+            if total <= room:
+                chosen = list(range(len(parts)))
+            elif parts and (parts[0][3] <= room or not blocks):
+                chosen = [0] + self._fit_parts(parts, room - parts[0][3])
+            else:
+                packed.dropped.append(doc.section)
+                continue
+
+            packed.used_tokens += entry["header"] + sum(parts[i][3] for i in chosen)
+            if len(chosen) == len(parts):
+                packed.included.append(doc.section)
+            else:
+                packed.partial.append(
+                    {
+                        "section": doc.section,
+                        "kept": [parts[i][0] for i in chosen],
+                        "omitted": [parts[i][0] for i in range(len(parts)) if i not in chosen],
+                    }
+                )
+
+            body = "\n".join(text[parts[i][1]:parts[i][2]].strip() for i in chosen)
+            blocks.append(
+                f"[Source {len(blocks) + 1}]\n"
+                f"{section_header(doc.section, doc.title)}\n"
+                f"{body}"
+            )
+
+        packed.text = "\n\n".join(blocks)
+        return packed
+
+
+_packer: Optional[ContextPacker] = None
+
+
+def get_context_packer() -> ContextPacker:
+    global _packer
+    if _packer is None:
+        from app.core.retriever import get_retriever
+
+        retriever = get_retriever()
+        _packer = ContextPacker.load(TOKEN_COUNTS_PATH, retriever.store, retriever.corpus_checksum)
+    return _packer
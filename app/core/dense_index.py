@@ -0,0 +1,167 @@
+"""
+Local exact dense index over a snapshot of the Qdrant collection.
+
+The IPC corpus is ~548 x 768 float32 (~1.6 MB), small enough that an exact
+top-k over a memory-mapped matrix (one matrix-vector product + argpartition)
+is faster than a network hop to Qdrant Cloud.
+
+Files (written by scripts/build_index_artifacts.py --dense, or by
+scripts/index_data.py at index time):
+    data/ipc_vectors.npy    float32 [num_sections, dimension], L2-normalized
+    data/ipc_vectors.json   {"model", "dimension", "sections": [...]} row -> section
+
+Design decisions:
+- Rows are L2-normalized at export, so the dot product equals the cosine
+  similarity that the COSINE Qdrant collection returns as its score.
+- Selected with settings.DENSE_BACKEND=local. A missing or mismatched
+  snapshot makes load() return None so the retriever keeps using Qdrant.
+"""
+
+import json
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class LocalDenseIndex:
+    """Exact inner-product search over an in-memory (or memmapped) matrix."""
+
+    def __init__(self, vectors: np.ndarray, sections: Sequence[str], model: str = ""):
+        if vectors.shape[0] != len(sections):
+            raise ValueError(
+                f"Vector rows ({vectors.shape[0]}) do not match section ids ({len(sections)})"
+            )
+        self.vectors = vectors
+        self.sections = list(sections)
+        self.model = model
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    # --------------------------------------------------
+    # Search
+    # --------------------------------------------------
+    def search(self, vector: Sequence[float], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (row ids, cosine scores) of the top_k rows, best first."""
+        scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+        n = scores.shape[0]
+        k = min(top_k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if k < n:
+            rows = np.argpartition(-scores, k - 1)[:k]
+        else:
+            rows = np.arange(n)
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
+
+    def search_batch(
+        self, vectors: Sequence[Sequence[float]], top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for every query vector with one matrix-matrix product."""
+        queries = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        scores = queries @ self.vectors.T
+        n = scores.shape[1]
+        k = min(top_k, n)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in queries]
+        if k < n:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n), scores.shape)
+
+        results = []
+        for row_scores, rows in zip(scores, candidates):
+            rows = rows[np.argsort(-row_scores[rows], kind="stable")]
+            results.append((rows, row_scores[rows]))
+        return results
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+    @staticmethod
+    def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def save(self, vectors_path: Union[str, Path]) -> None:
+        vectors_path = Path(vectors_path)
+        np.save(vectors_path, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        meta = {"model": self.model, "dimension": self.dimension, "sections": self.sections}
+        with open(vectors_path.with_suffix(".json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        logger.info(
+            "dense_index_saved",
+            path=str(vectors_path),
+            rows=len(self.sections),
+            dimension=self.dimension,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        vectors_path: Union[str, Path],
+        expected_model: Optional[str] = None,
+        expected_dimension: Optional[int] = None,
+    ) -> Optional["LocalDenseIndex"]:
+        """Memory-maps a saved snapshot; returns None if missing or built for another model."""
+        vectors_path = Path(vectors_path)
+        meta_path = vectors_path.with_suffix(".json")
+        if not vectors_path.exists() or not meta_path.exists():
+            logger.info("dense_index_snapshot_missing", path=str(vectors_path))
+            return None
+
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if expected_model and meta.get("model") != expected_model:
+            logger.warning(
+                "dense_index_snapshot_stale",
+                reason="model",
+                found=meta.get("model"),
+                expected=expected_model,
+            )
+            return None
+        if expected_dimension and meta.get("dimension") != expected_dimension:
+            logger.warning(
+                "dense_index_snapshot_stale",
+                reason="dimension",
+                found=meta.get("dimension"),
+                expected=expected_dimension,
+            )
+            return None
+
+        vectors = np.load(vectors_path, mmap_mode="r")
+        index = cls(vectors, meta["sections"], model=meta.get("model", ""))
+        logger.info("dense_index_loaded", path=str(vectors_path), rows=len(index.sections))
+        return index
+
+    @classmethod
+    def from_qdrant(cls, client, collection_name: str, model: str = "", batch_size: int = 256) -> "LocalDenseIndex":
+        """Exports every point's vector and section_number from a Qdrant collection."""
+        sections: List[str] = []
+        rows: List[List[float]] = []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["section_number"],
+                with_vectors=True,
+            )
+            for p in points:
+                sections.append(str(p.payload.get("section_number")))
+                rows.append(p.vector)
+            if offset is None:
+                break
+
+        return cls(cls.normalize_rows(np.array(rows, dtype=np.float32)), sections, model=model)
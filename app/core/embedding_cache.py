@@ -0,0 +1,356 @@
+"""
+Two-tier query-embedding cache.
+
+Pipeline position:
+    expanded query
+        │
+        ▼
+    [L1: in-process LRU + TTL] ── hit ──► vector
+        │ miss
+        ▼
+    [L2: Redis, float16-packed] ── hit ──► vector (promoted to L1)
+        │ miss
+        ▼
+    [EmbeddingProvider] ──► vector (written to L1 + L2)
+
+Design decisions:
+- Keys are the normalized expanded query (NFKC, lowercase, collapsed
+  whitespace) plus the embedding model id, so every worker and provider
+  producing the same model's vectors shares hits.
+- Redis stores float16 bytes (1.5 KB per 768-d vector); the precision loss is
+  far below what changes a cosine ranking.
+- The Redis tier is best-effort: short socket timeouts, and any error is
+  counted and treated as a miss so the cache can never fail a request.
+  The client connects lazily, so Redis being down when the cache is built
+  does not turn the tier off for the life of the worker.
+- aget_or_compute serves the async request path: L1 stays inline (a dict
+  lookup), the Redis round trips run in a worker thread.
+- The *_many variants serve batches: one MGET for every L1 miss, one
+  provider call for every Redis miss, one pipelined write-back.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_cache_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class EmbeddingCache:
+    """Bounded LRU with TTL in front of an optional shared Redis tier."""
+
+    def __init__(
+        self,
+        model_id: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        redis_client=None,
+        redis_ttl_seconds: int = 86400,
+    ):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_client = redis_client
+        self.redis_ttl_seconds = redis_ttl_seconds
+
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "redis_errors": 0,
+            "lookup_ms_total": 0.0,
+            "compute_ms_total": 0.0,
+        }
+
+    # ------------------------
+    # Helpers
+    # ------------------------
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_cache_text(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.model_id}:{digest}"
+
+    def _count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    # ------------------------
+    # L1 (in-process)
+    # ------------------------
+    def _local_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, vector = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def _local_put(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ------------------------
+    # L2 (Redis)
+    # ------------------------
+    def _redis_get(self, key: str) -> Optional[np.ndarray]:
+        if self.redis_client is None:
+            return None
+        try:
+            raw = self.redis_client.get(key)
+        except Exception as e:
+            self._count("redis_errors")
+            logger.warning("embedding_cache_redis_get_failed", error=str(e))
+            return None
+        if raw is None:
+            return None
+        return np.frombuffer(raw, dtype="<f2").astype(np.float32)
+
+    def _redis_get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        if self.redis_client is None or not keys:
+            return [None] * len(keys)
+        try:
+            raws = self.redis_client.mget(keys)
+        except Exception as e:
+            self._count("redis_errors")
+            logger.warning("embedding_cache_redis_get_failed", error=str(e))
+            return [None] * len(keys)
+        return [
+            np.frombuffer(raw, dtype="<f2").astype(np.float32) if raw is not None else None
+            for raw in raws
+        ]
+
+    def _redis_put_many(self, items: List[Tuple[str, np.ndarray]]) -> None:
+        if self.redis_client is None or not items:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, vector in items:
+                pipe.setex(key, self.redis_ttl_seconds, vector.astype("<f2").tobytes())
+            pipe.execute()
+        except Exception as e:
+            self._count("redis_errors")
+            logger.warning("embedding_cache_redis_set_failed", error=str(e))
+
+    def _redis_put(self, key: str, vector: np.ndarray) -> None:
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.setex(key, self.redis_ttl_seconds, vector.astype("<f2").tobytes())
+        except Exception as e:
+            self._count("redis_errors")
+            logger.warning("embedding_cache_redis_set_failed", error=str(e))
+
+    # ------------------------
+    # Public API
+    # ------------------------
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self._key(text)
+        t0 = time.perf_counter()
+        vector = self._local_get(key)
+        if vector is not None:
+            self._count("local_hits")
+        else:
+            vector = self._redis_get(key)
+            if vector is not None:
+                self._count("redis_hits")
+                self._local_put(key, vector)
+        self._count("lookup_ms_total", (time.perf_counter() - t0) * 1000)
+        return vector.tolist() if vector is not None else None
+
+    def put(self, text: str, vector: List[float]) -> None:
+        key = self._key(text)
+        arr = np.asarray(vector, dtype=np.float32)
+        self._local_put(key, arr)
+        self._redis_put(key, arr)
+
+    def get_or_compute(self, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        cached = self.get(text)
+        if cached is not None:
+            return cached
+
+        self._count("misses")
+        t0 = time.perf_counter()
+        vector = compute(text)
+        self._count("compute_ms_total", (time.perf_counter() - t0) * 1000)
+        self.put(text, vector)
+        return vector
+
+    async def aget_or_compute(
+        self, text: str, compute: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        key = self._key(text)
+        t0 = time.perf_counter()
+        vector = self._local_get(key)
+        if vector is not None:
+            self._count("local_hits")
+        elif self.redis_client is not None:
+            vector = await asyncio.to_thread(self._redis_get, key)
+            if vector is not None:
+                self._count("redis_hits")
+                self._local_put(key, vector)
+        self._count("lookup_ms_total", (time.perf_counter() - t0) * 1000)
+        if vector is not None:
+            return vector.tolist()
+
+        self._count("misses")
+        t0 = time.perf_counter()
+        result = await compute(text)
+        self._count("compute_ms_total", (time.perf_counter() - t0) * 1000)
+        arr = np.asarray(result, dtype=np.float32)
+        self._local_put(key, arr)
+        if self.redis_client is not None:
+            await asyncio.to_thread(self._redis_put, key, arr)
+        return result
+
+    def get_or_compute_many(
+        self, texts: List[str], compute_many: Callable[[List[str]], List[List[float]]]
+    ) -> List[List[float]]:
+        """get_or_compute for a batch; duplicate texts are looked up and computed once."""
+        t0 = time.perf_counter()
+        keys, found, pending = self._local_many(texts)
+        for key, vector in zip(pending, self._redis_get_many(pending)):
+            if vector is not None:
+                found[key] = vector
+                self._local_put(key, vector)
+        self._finish_lookup_many(keys, found, pending, t0)
+
+        missing = self._missing_texts(texts, keys, found)
+        if missing:
+            t0 = time.perf_counter()
+            vectors = compute_many(list(missing.values()))
+            self._count("compute_ms_total", (time.perf_counter() - t0) * 1000)
+            self._redis_put_many(self._store_computed(missing, vectors, found))
+        return [found[key].tolist() for key in keys]
+
+    async def aget_or_compute_many(
+        self, texts: List[str], compute_many: Callable[[List[str]], Awaitable[List[List[float]]]]
+    ) -> List[List[float]]:
+        t0 = time.perf_counter()
+        keys, found, pending = self._local_many(texts)
+        if pending and self.redis_client is not None:
+            for key, vector in zip(pending, await asyncio.to_thread(self._redis_get_many, pending)):
+                if vector is not None:
+                    found[key] = vector
+                    self._local_put(key, vector)
+        self._finish_lookup_many(keys, found, pending, t0)
+
+        missing = self._missing_texts(texts, keys, found)
+        if missing:
+            t0 = time.perf_counter()
+            vectors = await compute_many(list(missing.values()))
+            self._count("compute_ms_total", (time.perf_counter() - t0) * 1000)
+            written = self._store_computed(missing, vectors, found)
+            if self.redis_client is not None:
+                await asyncio.to_thread(self._redis_put_many, written)
+        return [found[key].tolist() for key in keys]
+
+    def _local_many(self, texts: List[str]) -> Tuple[List[str], Dict[str, np.ndarray], List[str]]:
+        keys = [self._key(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        pending: List[str] = []
+        for key in dict.fromkeys(keys):
+            vector = self._local_get(key)
+            if vector is not None:
+                found[key] = vector
+                self._count("local_hits")
+            else:
+                pending.append(key)
+        return keys, found, pending
+
+    def _finish_lookup_many(
+        self, keys: List[str], found: Dict[str, np.ndarray], pending: List[str], t0: float
+    ) -> None:
+        redis_hits = sum(1 for key in pending if key in found)
+        self._count("redis_hits", redis_hits)
+        self._count("misses", len(pending) - redis_hits)
+        self._count("lookup_ms_total", (time.perf_counter() - t0) * 1000)
+
+    @staticmethod
+    def _missing_texts(texts: List[str], keys: List[str], found: Dict[str, np.ndarray]) -> Dict[str, str]:
+        missing: Dict[str, str] = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return missing
+
+    def _store_computed(
+        self, missing: Dict[str, str], vectors: List[List[float]], found: Dict[str, np.ndarray]
+    ) -> List[Tuple[str, np.ndarray]]:
+        written = []
+        for key, vector in zip(missing, vectors):
+            arr = np.asarray(vector, dtype=np.float32)
+            found[key] = arr
+            self._local_put(key, arr)
+            written.append((key, arr))
+        return written
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+            size = len(self._entries)
+        lookups = s["local_hits"] + s["redis_hits"] + s["misses"]
+        hits = s["local_hits"] + s["redis_hits"]
+        return {
+            "local_hits": int(s["local_hits"]),
+            "redis_hits": int(s["redis_hits"]),
+            "misses": int(s["misses"]),
+            "redis_errors": int(s["redis_errors"]),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "avg_lookup_ms": round(s["lookup_ms_total"] / lookups, 3) if lookups else 0.0,
+            "avg_compute_ms": round(s["compute_ms_total"] / s["misses"], 1) if s["misses"] else 0.0,
+            "local_entries": size,
+        }
+
+
+def _create_redis_client():
+    import redis
+
+    # No ping: redis-py connects on first use and get/put count failures as misses
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=False,
+        socket_timeout=0.5,
+        socket_connect_timeout=0.5,
+    )
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(
+            model_id=settings.EMBEDDING_MODEL,
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            redis_client=_create_redis_client() if settings.EMBEDDING_CACHE_REDIS_ENABLED else None,
+            redis_ttl_seconds=settings.EMBEDDING_CACHE_REDIS_TTL_SECONDS,
+        )
+        logger.info(
+            "embedding_cache_initialized",
+            max_entries=_cache.max_entries,
+            redis_tier=_cache.redis_client is not None,
+        )
+    return _cache
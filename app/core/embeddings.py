@@ -0,0 +1,277 @@
+"""
+Query embedding providers.
+
+Selected via settings.EMBEDDING_PROVIDER:
+    huggingface  HF Inference router (network call, default)
+    local        intfloat/multilingual-e5-base on CPU via sentence-transformers
+                 (PyTorch or ONNX Runtime backend, optionally int8-quantized)
+
+Design decisions:
+- Every provider applies the same input contract: the E5 "query: " prefix,
+  a 512-character cut, and L2 normalization. Vectors are therefore
+  interchangeable with the "passage: " embeddings stored in Qdrant by
+  scripts/index_data.py, whichever provider produced them.
+- sentence-transformers is an optional dependency (requirements.local.txt)
+  and is only imported when the local provider is selected.
+- aembed_query is the event-loop-safe variant used by the async request path:
+  native async HTTP for HuggingFace, a worker thread for CPU-bound providers.
+- embed_queries / aembed_queries embed a whole batch per request (one HF
+  call per EMBEDDING_BATCH_SIZE inputs, one encode() call locally); the
+  base class falls back to one call per query.
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Union
+
+from app.config import settings
+from app.utils import get_logger, get_http_client, get_async_http_client, timeout_for
+from app.utils import count_retry, dependency
+
+logger = get_logger(__name__)
+
+HF_EMBEDDING_URL_TEMPLATE = (
+    "https://router.huggingface.co/hf-inference/models/{model}/pipeline/feature-extraction"
+)
+
+# Character cut applied before tokenization, identical across providers
+_MAX_INPUT_CHARS = 512
+
+
+def _as_query_text(text: str) -> str:
+    # Prepend query: prefix as required by E5
+    query_text = text if text.startswith("query: ") else f"query: {text}"
+    return query_text[:_MAX_INPUT_CHARS]
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    # Normalize manually (same as normalize_embeddings=True)
+    norm = sum(x * x for x in vector) ** 0.5
+    if norm > 0:
+        vector = [x / norm for x in vector]
+    return vector
+
+
+class EmbeddingProvider(ABC):
+    """Base class: turns a search query into a normalized E5 query vector."""
+
+    name = "base"
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+
+    @abstractmethod
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_queries, texts)
+
+
+class HuggingFaceEmbeddingProvider(EmbeddingProvider):
+    """Embeddings via the HuggingFace Inference router."""
+
+    name = "huggingface"
+
+    def __init__(self, model_id: str):
+        super().__init__(model_id)
+        self.url = HF_EMBEDDING_URL_TEMPLATE.format(model=model_id)
+
+    def _request(self, inputs: Union[str, List[str]]):
+        headers = {"Content-Type": "application/json"}
+
+        # Use HF token if available (handles rate-limited endpoints)
+        if settings.HF_API_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.HF_API_TOKEN}"
+
+        payload = {
+            "inputs": inputs,
+            "options": {"wait_for_model": True},
+        }
+        return headers, payload
+
+    @staticmethod
+    def _parse(result) -> List[float]:
+        # HF returns nested list for batched or flat list for single
+        if isinstance(result[0], list):
+            vector = result[0]
+        else:
+            vector = result
+
+        return _normalize(vector)
+
+    @staticmethod
+    def _parse_batch(result, expected: int) -> List[List[float]]:
+        if len(result) != expected:
+            raise ValueError(f"HF returned {len(result)} embeddings for {expected} inputs")
+        return [_normalize(vector) for vector in result]
+
+    @staticmethod
+    def _batches(texts: List[str]) -> List[List[str]]:
+        size = max(settings.EMBEDDING_BATCH_SIZE, 1)
+        return [
+            [_as_query_text(t) for t in texts[i:i + size]]
+            for i in range(0, len(texts), size)
+        ]
+
+    def _post(self, inputs: Union[str, List[str]]):
+        headers, payload = self._request(inputs)
+
+        client = get_http_client()
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("huggingface", "embed"):
+                    response = client.post(
+                        self.url,
+                        headers=headers,
+                        json=payload,
+                        timeout=timeout_for(self.url),
+                    )
+                    response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("hf_embedding_failed", error=str(e))
+                    raise
+                logger.warning("hf_embedding_retry", attempt=attempt+1, error=str(e))
+                count_retry("huggingface")
+                time.sleep(1.0)
+
+    async def _apost(self, inputs: Union[str, List[str]]):
+        headers, payload = self._request(inputs)
+
+        client = get_async_http_client()
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("huggingface", "embed"):
+                    response = await client.post(
+                        self.url,
+                        headers=headers,
+                        json=payload,
+                        timeout=timeout_for(self.url),
+                    )
+                    response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("hf_embedding_failed", error=str(e))
+                    raise
+                logger.warning("hf_embedding_retry", attempt=attempt+1, error=str(e))
+                count_retry("huggingface")
+                await asyncio.sleep(1.0)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._parse(self._post(_as_query_text(text)))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self._parse(await self._apost(_as_query_text(text)))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for batch in self._batches(texts):
+            vectors.extend(self._parse_batch(self._post(batch), len(batch)))
+        return vectors
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for batch in self._batches(texts):
+            vectors.extend(self._parse_batch(await self._apost(batch), len(batch)))
+        return vectors
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """In-process CPU embeddings with sentence-transformers."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        model_id: str,
+        backend: str = "torch",
+        onnx_file: Optional[str] = None,
+        num_threads: Optional[int] = None,
+    ):
+        super().__init__(model_id)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_PROVIDER=local requires sentence-transformers "
+                "(pip install -r requirements.local.txt)"
+            ) from e
+
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+
+        kwargs = {"device": "cpu"}
+        if backend == "onnx":
+            kwargs["backend"] = "onnx"
+            if onnx_file:
+                # e.g. "onnx/model_qint8_avx512_vnni.onnx" for an int8-quantized graph
+                kwargs["model_kwargs"] = {"file_name": onnx_file}
+
+        t0 = time.perf_counter()
+        self.model = SentenceTransformer(model_id, **kwargs)
+        self.backend = backend
+        logger.info(
+            "local_embedding_model_loaded",
+            model=model_id,
+            backend=backend,
+            onnx_file=onnx_file,
+            load_ms=int((time.perf_counter() - t0) * 1000),
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.model.encode(
+            _as_query_text(text),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vector.tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            [_as_query_text(t) for t in texts],
+            batch_size=max(settings.EMBEDDING_BATCH_SIZE, 1),
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+
+def create_embedding_provider(provider: str) -> EmbeddingProvider:
+    if provider == "huggingface":
+        return HuggingFaceEmbeddingProvider(settings.EMBEDDING_MODEL)
+    if provider == "local":
+        return LocalEmbeddingProvider(
+            settings.EMBEDDING_MODEL,
+            backend=settings.LOCAL_EMBEDDING_BACKEND,
+            onnx_file=settings.LOCAL_EMBEDDING_ONNX_FILE,
+            num_threads=settings.LOCAL_EMBEDDING_THREADS,
+        )
+    raise ValueError(f"Unknown embedding provider: {provider!r}")
+
+
+_provider: Optional[EmbeddingProvider] = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        _provider = create_embedding_provider(settings.EMBEDDING_PROVIDER)
+        logger.info(
+            "embedding_provider_initialized",
+            provider=_provider.name,
+            model=_provider.model_id,
+        )
+    return _provider
@@ -0,0 +1,558 @@
+"""
+Shared Groq API key pool.
+
+Pipeline position:
+    LLMChain (interactive answers) ──┐
+    QueryCondenser (rewrites) ───────┼──► [GroqKeyPool] ──► key with most headroom ──► Groq
+    LLMJudge / batch / offline jobs ─┘
+
+Design decisions:
+- One persistent Groq and AsyncGroq client per key, built once, so keep-alive
+  connections survive across calls instead of being rebuilt on rotation.
+- Every response (and every 429) refreshes the key's remaining requests and
+  tokens from Groq's x-ratelimit-* headers; retry-after puts the key in
+  cooldown. Between responses the pool debits its own estimate so concurrent
+  callers spread across keys instead of all picking the same one.
+- acquire() picks the key with the most headroom (the smaller of the
+  remaining request and token fractions). When no key can take the call the
+  caller queues until the earliest reset, or until a response frees
+  headroom, instead of sleeping a fixed interval.
+- Waiters are served by priority class, FIFO within a class: INTERACTIVE
+  answers before CONDENSER rewrites before BACKGROUND (evaluation, batch,
+  offline) traffic. Non-interactive calls also leave the last
+  GROQ_POOL_INTERACTIVE_RESERVE of each key's known budget to interactive
+  answers.
+- Callers keep their own retry policy; a rate-limited attempt simply loops
+  back into acquire(), which routes around the cooling key.
+- Key waits, call latency per priority class and cooldowns (traffic
+  rotating off a key) are exported as Prometheus metrics.
+- The pool is per process. Groq's headers carry the cross-process truth, so
+  each worker's view corrects itself on the next response.
+"""
+
+import asyncio
+import heapq
+import itertools
+import re
+import threading
+import time
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple
+
+from app.config import settings
+from app.utils import get_logger, LLMError, dependency, observe_stage
+from app.utils.metrics import GROQ_KEY_ROTATIONS
+
+if TYPE_CHECKING:
+    # The SDK is imported when the pool builds its clients, not at app import
+    from groq import AsyncGroq, Groq
+
+logger = get_logger(__name__)
+
+# Cooldown for a 429 without retry-after, and for an overloaded (5xx) key
+_DEFAULT_COOLDOWN_SECONDS = 2.0
+_OVERLOAD_COOLDOWN_SECONDS = 1.0
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SCALE = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class Priority(IntEnum):
+    """Scheduling class; lower values are served first."""
+
+    INTERACTIVE = 0
+    CONDENSER = 1
+    BACKGROUND = 2
+
+
+class KeyPoolExhausted(LLMError):
+    """No key gained headroom within the caller's max wait."""
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def groq_api_keys() -> List[str]:
+    """GROQ_API_KEY plus GROQ_API_KEY_2..9, deduplicated, in order."""
+    keys: List[str] = []
+    if getattr(settings, "GROQ_API_KEY", None):
+        keys.append(settings.GROQ_API_KEY)
+    for idx in range(2, 10):
+        val = getattr(settings, f"GROQ_API_KEY_{idx}", None)
+        if val and val not in keys:
+            keys.append(val)
+    return keys
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Groq reset / retry-after values ("7.66s", "2m59.56s", "120ms", "3") in seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_SCALE[unit] for n, unit in parts)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int = 0) -> int:
+    """Prompt (~4 characters per token) plus the completion budget."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + max_tokens
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    import groq
+
+    err_msg = str(e).upper()
+    return (
+        isinstance(e, groq.RateLimitError)
+        or "429" in err_msg
+        or "RATE_LIMIT" in err_msg
+        or "TOO MANY REQUESTS" in err_msg
+    )
+
+
+def is_overloaded_error(e: Exception) -> bool:
+    err_msg = str(e).upper()
+    return "503" in err_msg or "OVERLOADED" in err_msg or "SERVICE_UNAVAILABLE" in err_msg or "500" in err_msg
+
+
+def _error_headers(e: Exception) -> Optional[Mapping[str, str]]:
+    response = getattr(e, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Per-key state
+# ---------------------------------------------------------------------------
+class _KeyState:
+    """Rate-limit view and persistent clients of one API key."""
+
+    def __init__(self, index: int, api_key: str):
+        from groq import AsyncGroq, Groq
+
+        self.index = index
+        self.client = Groq(api_key=api_key, max_retries=0)
+        self.async_client = AsyncGroq(api_key=api_key, max_retries=0)
+
+        # None until the first response tells us
+        self.limit_requests: Optional[float] = None
+        self.limit_tokens: Optional[float] = None
+        self.remaining_requests: Optional[float] = None
+        self.remaining_tokens: Optional[float] = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.cooldown_until = 0.0
+
+        self.in_flight = 0
+        self.last_used = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def refresh(self, now: float) -> None:
+        """A window past its reset time is assumed full again."""
+        if self.remaining_requests is not None and now >= self.requests_reset_at:
+            self.remaining_requests = self.limit_requests
+        if self.remaining_tokens is not None and now >= self.tokens_reset_at:
+            self.remaining_tokens = self.limit_tokens
+
+    def headroom(self) -> float:
+        fractions = [1.0]
+        if self.remaining_requests is not None and self.limit_requests:
+            fractions.append(max(self.remaining_requests, 0.0) / self.limit_requests)
+        if self.remaining_tokens is not None and self.limit_tokens:
+            fractions.append(max(self.remaining_tokens, 0.0) / self.limit_tokens)
+        return min(fractions)
+
+    def wait_time(self, now: float, priority: Priority, tokens: int) -> float:
+        """Seconds until this key can take the call; 0.0 means now."""
+        reserve = settings.GROQ_POOL_INTERACTIVE_RESERVE if priority > Priority.INTERACTIVE else 0.0
+        waits = [self.cooldown_until - now]
+
+        if self.remaining_requests is not None:
+            floor = reserve * (self.limit_requests or 0)
+            if self.remaining_requests - 1 < floor:
+                waits.append(self.requests_reset_at - now)
+
+        if self.remaining_tokens is not None:
+            need = tokens
+            if self.limit_tokens:
+                # A prompt bigger than the whole budget must still be sendable
+                need = min(need, self.limit_tokens * (1.0 - reserve))
+            floor = reserve * (self.limit_tokens or 0)
+            if self.remaining_tokens - need < floor:
+                waits.append(self.tokens_reset_at - now)
+
+        return max(max(waits), 0.0)
+
+    def debit(self, tokens: int, now: float) -> None:
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= tokens
+        self.in_flight += 1
+        self.requests += 1
+        self.last_used = now
+
+    def update(self, headers: Mapping[str, str], now: float) -> None:
+        limit_requests = _header_number(headers, "x-ratelimit-limit-requests")
+        limit_tokens = _header_number(headers, "x-ratelimit-limit-tokens")
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+
+        if limit_requests is not None:
+            self.limit_requests = limit_requests
+        if limit_tokens is not None:
+            self.limit_tokens = limit_tokens
+        if remaining_requests is not None:
+            self.remaining_requests = remaining_requests
+            self.requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0.0)
+        if remaining_tokens is not None:
+            self.remaining_tokens = remaining_tokens
+            self.tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "key_index": self.index,
+            "utilization": round(1.0 - self.headroom(), 3),
+            "remaining_requests": self.remaining_requests,
+            "limit_requests": self.limit_requests,
+            "remaining_tokens": self.remaining_tokens,
+            "limit_tokens": self.limit_tokens,
+            "cooldown_s": round(max(self.cooldown_until - now, 0.0), 2),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+        }
+
+
+class KeyLease:
+    """A key handed out by acquire(); give it back with GroqKeyPool.release()."""
+
+    __slots__ = ("key", "priority", "tokens")
+
+    def __init__(self, key: _KeyState, priority: Priority, tokens: int):
+        self.key = key
+        self.priority = priority
+        self.tokens = tokens
+
+    @property
+    def index(self) -> int:
+        return self.key.index
+
+    @property
+    def client(self) -> "Groq":
+        return self.key.client
+
+    @property
+    def async_client(self) -> "AsyncGroq":
+        return self.key.async_client
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+class GroqKeyPool:
+    """Header-aware scheduler over every configured Groq API key."""
+
+    def __init__(self, api_keys: List[str]):
+        if not api_keys:
+            raise LLMError("No Groq API keys found in settings.")
+        self._keys = [_KeyState(idx, key) for idx, key in enumerate(api_keys)]
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Heap of (priority, seq) tickets; only the head may take a key
+        self._waiters: List[Tuple[int, int]] = []
+        self._async_waiters: Dict[Tuple[int, int], Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+        self._seq = itertools.count()
+
+        self._served = {p.name.lower(): 0 for p in Priority}
+        self._queued = {p.name.lower(): 0 for p in Priority}
+        self._wait_ms = {p.name.lower(): 0.0 for p in Priority}
+        self._exhausted = {p.name.lower(): 0 for p in Priority}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # --------------------------------------------------
+    # Scheduling (callers hold self._lock)
+    # --------------------------------------------------
+    def _enqueue(self, priority: Priority) -> Tuple[int, int]:
+        ticket = (int(priority), next(self._seq))
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: Tuple[int, int]) -> None:
+        if self._waiters and self._waiters[0] == ticket:
+            heapq.heappop(self._waiters)
+        elif ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+        self._async_waiters.pop(ticket, None)
+        self._notify()
+
+    def _notify(self) -> None:
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; its waiter is gone
+                pass
+
+    def _try_take(
+        self, ticket: Tuple[int, int], priority: Priority, tokens: int
+    ) -> Tuple[Optional[_KeyState], Optional[float]]:
+        """(key, None) when granted, else (None, seconds until a key frees up or None)."""
+        if self._waiters[0] != ticket:
+            return None, None
+
+        now = time.monotonic()
+        best = None
+        best_rank = None
+        soonest = None
+        for key in self._keys:
+            key.refresh(now)
+            wait = key.wait_time(now, priority, tokens)
+            if wait > 0:
+                soonest = wait if soonest is None else min(soonest, wait)
+                continue
+            rank = (key.headroom(), -key.in_flight, -key.last_used)
+            if best is None or rank > best_rank:
+                best, best_rank = key, rank
+
+        if best is None:
+            return None, soonest
+        best.debit(tokens, now)
+        return best, None
+
+    def _granted(self, key: _KeyState, priority: Priority, tokens: int, started: float, waited: bool) -> KeyLease:
+        name = priority.name.lower()
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._served[name] += 1
+        self._wait_ms[name] += wait_ms
+        observe_stage("groq_key_wait", wait_ms / 1000)
+        if waited:
+            self._queued[name] += 1
+            logger.info(
+                "groq_pool_waited",
+                priority=name,
+                key_index=key.index,
+                wait_ms=int(wait_ms),
+            )
+        return KeyLease(key, priority, tokens)
+
+    def _no_key(self, priority: Priority, started: float) -> KeyPoolExhausted:
+        name = priority.name.lower()
+        self._exhausted[name] += 1
+        waited_s = round(time.perf_counter() - started, 2)
+        logger.warning("groq_pool_exhausted", priority=name, waited_s=waited_s)
+        return KeyPoolExhausted(
+            "All Groq API keys are rate limited",
+            details={"priority": name, "waited_s": waited_s},
+        )
+
+    @staticmethod
+    def _deadline(max_wait: Optional[float]) -> float:
+        limit = settings.GROQ_POOL_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        return time.monotonic() + limit
+
+    # --------------------------------------------------
+    # Acquire / release
+    # --------------------------------------------------
+    def acquire(self, priority: Priority, tokens: int = 0, max_wait: Optional[float] = None) -> KeyLease:
+        """Blocks until a key can take a call of ~tokens; raises KeyPoolExhausted past max_wait."""
+        started = time.perf_counter()
+        deadline = self._deadline(max_wait)
+        waited = False
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    key, wait = self._try_take(ticket, priority, tokens)
+                    if key is not None:
+                        return self._granted(key, priority, tokens, started, waited)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._no_key(priority, started)
+                    waited = True
+                    self._cond.wait(min(wait, remaining) if wait is not None else remaining)
+            finally:
+                self._dequeue(ticket)
+
+    async def aacquire(self, priority: Priority, tokens: int = 0, max_wait: Optional[float] = None) -> KeyLease:
+        """acquire() for the event loop: queues on an asyncio.Event, never blocks the loop."""
+        started = time.perf_counter()
+        deadline = self._deadline(max_wait)
+        waited = False
+        event = asyncio.Event()
+        with self._lock:
+            ticket = self._enqueue(priority)
+            self._async_waiters[ticket] = (asyncio.get_running_loop(), event)
+        try:
+            while True:
+                with self._lock:
+                    event.clear()
+                    key, wait = self._try_take(ticket, priority, tokens)
+                    if key is not None:
+                        return self._granted(key, priority, tokens, started, waited)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._no_key(priority, started)
+                waited = True
+                try:
+                    await asyncio.wait_for(event.wait(), min(wait, remaining) if wait is not None else remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self._dequeue(ticket)
+
+    def release(
+        self,
+        lease: KeyLease,
+        headers: Optional[Mapping[str, str]] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """Returns the key, applying response headers and any error to its state."""
+        key = lease.key
+        cooldown = None
+        reason = None
+        with self._lock:
+            now = time.monotonic()
+            key.in_flight -= 1
+            if headers is None and error is not None:
+                headers = _error_headers(error)
+            if headers:
+                key.update(headers, now)
+
+            if error is not None:
+                if is_rate_limit_error(error):
+                    key.rate_limited += 1
+                    reason = "rate_limited"
+                    cooldown = (
+                        parse_duration(headers.get("retry-after")) if headers else None
+                    ) or _DEFAULT_COOLDOWN_SECONDS
+                elif is_overloaded_error(error):
+                    key.errors += 1
+                    reason = "overloaded"
+                    cooldown = _OVERLOAD_COOLDOWN_SECONDS
+                else:
+                    key.errors += 1
+                if cooldown is not None:
+                    key.cooldown_until = max(key.cooldown_until, now + cooldown)
+            self._notify()
+
+        if cooldown is not None:
+            GROQ_KEY_ROTATIONS.labels(reason=reason).inc()
+            logger.warning(
+                "groq_key_cooling_down",
+                key_index=key.index,
+                priority=lease.priority.name.lower(),
+                cooldown_s=round(cooldown, 2),
+                error=str(error)[:200],
+            )
+
+    # --------------------------------------------------
+    # Chat completions
+    # --------------------------------------------------
+    @staticmethod
+    def _estimate(kwargs: Dict[str, Any]) -> int:
+        return estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens") or 0)
+
+    def create(self, priority: Priority, max_wait: Optional[float] = None, **kwargs):
+        """One chat.completions.create attempt on the key with the most headroom."""
+        lease = self.acquire(priority, self._estimate(kwargs), max_wait)
+        try:
+            with dependency("groq", priority.name.lower()):
+                raw = lease.client.chat.completions.with_raw_response.create(**kwargs)
+        except Exception as e:
+            self.release(lease, error=e)
+            raise
+        self.release(lease, headers=raw.headers)
+        return raw.parse()
+
+    async def acreate(self, priority: Priority, max_wait: Optional[float] = None, **kwargs):
+        """Async create(); with stream=True returns the open stream (headers arrive first)."""
+        lease = await self.aacquire(priority, self._estimate(kwargs), max_wait)
+        try:
+            with dependency("groq", priority.name.lower()):
+                raw = await lease.async_client.chat.completions.with_raw_response.create(**kwargs)
+        except Exception as e:
+            self.release(lease, error=e)
+            raise
+        self.release(lease, headers=raw.headers)
+        return await raw.parse()
+
+    # --------------------------------------------------
+    # Warmup
+    # --------------------------------------------------
+    async def awarm(self) -> int:
+        """
+        Opens every key's AsyncGroq connection (TLS handshake, keep-alive)
+        with a models.list call: authenticated, but spends no tokens.
+        Returns the number of keys that answered.
+        """
+
+        async def one(key: _KeyState) -> bool:
+            try:
+                with dependency("groq", "models"):
+                    await key.async_client.models.list()
+                return True
+            except Exception as e:
+                logger.warning("groq_key_warmup_failed", key_index=key.index, error=str(e)[:200])
+                return False
+
+        return sum(await asyncio.gather(*(one(key) for key in self._keys)))
+
+    # --------------------------------------------------
+    # Metrics
+    # --------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            for key in self._keys:
+                key.refresh(now)
+            return {
+                "num_keys": len(self._keys),
+                "waiting": len(self._waiters),
+                "keys": [key.stats(now) for key in self._keys],
+                "served": dict(self._served),
+                "queued": dict(self._queued),
+                "exhausted": dict(self._exhausted),
+                "avg_wait_ms": {
+                    name: round(self._wait_ms[name] / served, 2) if served else 0.0
+                    for name, served in self._served.items()
+                },
+            }
+
+
+_pool: Optional[GroqKeyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_groq_pool() -> GroqKeyPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = GroqKeyPool(groq_api_keys())
+                logger.info("groq_pool_initialized", num_keys=len(_pool))
+    return _pool
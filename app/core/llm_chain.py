@@ -1,15 +1,32 @@
 """
 LLM chain for generating answers using Groq API.
 Uses the official Groq SDK with LPU-accelerated inference.
+
+generate_answer (Groq), agenerate_answer (AsyncGroq, asyncio.sleep backoff)
+and astream_answer (AsyncGroq, stream=True) share prompt building, retry
+classification and response handling. Keys and clients come from the shared
+GroqKeyPool; answers default to the INTERACTIVE priority class. The context
+block is packed into MAX_CONTEXT_TOKENS by the ContextPacker; a caller that
+already packed the documents (to report the packing) passes that
+PackedContext, so the report describes the prompt actually sent.
 """
 
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
+import asyncio
+import hashlib
+import json
+import time
 import traceback
 
-from groq import Groq
-
 from app.config import settings
-from app.utils import get_logger, LLMError
+from app.core.context_packer import (
+    FORMAT_VERSION as PACKER_FORMAT_VERSION,
+    TOKENIZER,
+    PackedContext,
+    get_context_packer,
+)
+from app.core.groq_pool import Priority, get_groq_pool, is_overloaded_error, is_rate_limit_error
+from app.utils import get_logger, LLMError, count_retry
 from app.models import RetrievedDocument
 
 logger = get_logger(__name__)
@@ -20,53 +37,23 @@ class LLMChain:
 
     def __init__(self):
         try:
-            self._init_api_keys()
-            self.client = Groq(api_key=self.api_keys[self.current_key_idx], max_retries=0)
+            self.pool = get_groq_pool()
             self.model = settings.LLM_MODEL
             self.last_token_usage = None
+            self.prompt_version = self._prompt_version()
 
-            logger.info("llm_chain_initialized", model=self.model, provider="groq", num_keys=len(self.api_keys))
+            logger.info("llm_chain_initialized", model=self.model, provider="groq", num_keys=len(self.pool))
 
         except Exception as e:
             logger.error("llm_init_failed", error=str(e))
             raise LLMError(f"Failed to initialize LLM: {e}")
 
-    def _init_api_keys(self):
-        self.api_keys = []
-        if getattr(settings, "GROQ_API_KEY", None):
-            self.api_keys.append(settings.GROQ_API_KEY)
-        for idx in range(2, 10):
-            val = getattr(settings, f"GROQ_API_KEY_{idx}", None)
-            if val and val not in self.api_keys:
-                self.api_keys.append(val)
-        if not self.api_keys:
-            raise LLMError("No Groq API keys found in settings.")
-        self.current_key_idx = 0
-
-    def _rotate_key(self):
-        if len(self.api_keys) > 1:
-            self.current_key_idx = (self.current_key_idx + 1) % len(self.api_keys)
-            self.client = Groq(api_key=self.api_keys[self.current_key_idx], max_retries=0)
-            logger.info("groq_key_rotated", new_key_index=self.current_key_idx)
+    def pack_context(self, documents: List[RetrievedDocument]) -> PackedContext:
+        """Whole sections / section parts that fit MAX_CONTEXT_TOKENS, in rank order."""
+        return get_context_packer().pack(documents, settings.MAX_CONTEXT_TOKENS)
 
     def _build_context(self, documents: List[RetrievedDocument]) -> str:
-        if not documents:
-            return "No relevant IPC sections were found."
-
-        parts = []
-        for idx, doc in enumerate(documents, 1):
-            parts.append(
-                f"[Source {idx}]\n"
-                f"Section {doc.section}: {doc.title}\n"
-                f"{doc.text}"
-            )
-
-        context = "\n\n".join(parts)
-
-        if len(context) > settings.MAX_CONTEXT_LENGTH:
-            context = context[: settings.MAX_CONTEXT_LENGTH] + "..."
-
-        return context
+        return self.pack_context(documents).text
 
     def _build_system_prompt(self) -> str:
         return """You are an Indian Legal Assistant specializing in the Indian Penal Code (IPC).
@@ -137,107 +124,239 @@ This assistant currently supports IPC-related criminal law queries only."""
 QUESTION:
 {query}"""
 
+    def _build_messages(
+        self,
+        query: str,
+        documents: List[RetrievedDocument],
+        chat_history: Optional[List[Dict[str, str]]],
+        packed: Optional[PackedContext] = None,
+    ) -> List[Dict[str, str]]:
+        context = packed.text if packed is not None else self._build_context(documents)
+
+        messages = [
+            {"role": "system", "content": self._build_system_prompt()},
+        ]
+
+        if chat_history:
+            # Use a sliding window of the last 8 messages (4 turns) to prevent context bloat
+            recent_history = chat_history[-8:]
+            for msg in recent_history:
+                messages.append({"role": msg["role"], "content": msg["content"]})
+
+        messages.append(
+            {"role": "user", "content": self._build_user_prompt(query, context)}
+        )
+        return messages
+
+    def _completion_kwargs(self, messages: List[Dict[str, str]]) -> Dict:
+        return dict(
+            model=self.model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=1024,
+            # Explicitly disable tool calling — prevents tool-use capable
+            # models (e.g. llama-3.3-70b-versatile) from returning an empty
+            # response when they decide to call a tool instead of text output.
+            tool_choice="none",
+        )
+
+    def _prompt_version(self) -> str:
+        """Fingerprint of everything besides the question and context that shapes an answer."""
+        fingerprint = {
+            "system": self._build_system_prompt(),
+            "user": self._build_user_prompt("{query}", "{context}"),
+            "context": {
+                "max_tokens": settings.MAX_CONTEXT_TOKENS,
+                "packer": PACKER_FORMAT_VERSION,
+                "tokenizer": TOKENIZER,
+            },
+            "generation": {k: v for k, v in self._completion_kwargs([]).items() if k != "messages"},
+        }
+        return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    def _retry_delay(self, e: Exception, attempt: int, max_attempts: int) -> float:
+        """Seconds to back off before the next attempt; re-raises when out of attempts."""
+        if isinstance(e, LLMError):
+            # Pool wait exhausted: every key stayed rate limited
+            raise e
+        if is_rate_limit_error(e) or is_overloaded_error(e):
+            # The pool has put that key in cooldown; the next acquire picks
+            # another key or queues until one has headroom again.
+            logger.warning("groq_rate_limited_requeue", error=str(e), attempt=attempt)
+            count_retry("groq")
+            return 0.0
+        if attempt < max_attempts - 1:
+            sleep_time = 1.0 * (attempt + 1)
+            logger.warning("groq_error_retrying", error=str(e), attempt=attempt, sleep_time=sleep_time)
+            count_retry("groq")
+            return sleep_time
+        raise e
+
+    def _finish(self, completion) -> str:
+        answer = completion.choices[0].message.content
+
+        # Guard against empty model output (e.g. tool-use model returned no text)
+        if not answer or not answer.strip():
+            finish_reason = completion.choices[0].finish_reason
+            logger.error(
+                "groq_empty_response",
+                finish_reason=finish_reason,
+                model=self.model,
+            )
+            raise LLMError(
+                f"Model returned an empty response (finish_reason={finish_reason!r}). "
+                "This usually means the model attempted a tool call. "
+                "Set LLM_MODEL to 'llama-3.1-8b-instant' or ensure tool_choice='none'."
+            )
+
+        answer = answer.strip()
+        self._record_usage(completion.usage)
+        return answer
+
+    def _record_usage(self, completion_usage) -> None:
+        usage = None
+        if completion_usage is not None:
+            usage = {
+                "prompt_tokens": completion_usage.prompt_tokens,
+                "completion_tokens": completion_usage.completion_tokens,
+                "total_tokens": completion_usage.total_tokens,
+            }
+        self.last_token_usage = usage
+        logger.info("groq_success", tokens_used=usage)
+
+    def _fail(self, e: Exception) -> LLMError:
+        self.last_token_usage = None
+        logger.error(
+            "groq_call_failed",
+            error=str(e),
+            error_type=type(e).__name__,
+            traceback=traceback.format_exc(),
+        )
+        return LLMError(f"Failed to generate answer: {e}")
+
     def generate_answer(
         self,
         query: str,
         documents: List[RetrievedDocument],
         chat_history: List[Dict[str, str]] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        packed: Optional[PackedContext] = None,
     ) -> str:
         try:
-            context = self._build_context(documents)
+            messages = self._build_messages(query, documents, chat_history, packed)
 
-            messages = [
-                {"role": "system", "content": self._build_system_prompt()},
-            ]
+            completion = None
+            last_err = None
+            max_attempts = max(3, len(self.pool) * 2)
 
-            if chat_history:
-                # Use a sliding window of the last 8 messages (4 turns) to prevent context bloat
-                recent_history = chat_history[-8:]
-                for msg in recent_history:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
+            for attempt in range(max_attempts):
+                try:
+                    completion = self.pool.create(
+                        priority, **self._completion_kwargs(messages)
+                    )
+                    break
+                except Exception as e:
+                    last_err = e
+                    time.sleep(self._retry_delay(e, attempt, max_attempts))
 
-            messages.append(
-                {"role": "user", "content": self._build_user_prompt(query, context)}
-            )
+            if completion is None:
+                raise last_err if last_err else LLMError("Failed to generate completion from Groq.")
+
+            return self._finish(completion)
+
+        except Exception as e:
+            raise self._fail(e)
 
-            import time
-            import groq
+    async def agenerate_answer(
+        self,
+        query: str,
+        documents: List[RetrievedDocument],
+        chat_history: List[Dict[str, str]] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        packed: Optional[PackedContext] = None,
+    ) -> str:
+        """Async generate_answer: AsyncGroq, non-blocking backoff and key queueing."""
+        try:
+            messages = self._build_messages(query, documents, chat_history, packed)
 
             completion = None
             last_err = None
-            max_attempts = max(3, len(self.api_keys) * 2)
+            max_attempts = max(3, len(self.pool) * 2)
 
             for attempt in range(max_attempts):
                 try:
-                    completion = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=messages,
-                        temperature=0.2,
-                        max_tokens=1024,
-                        # Explicitly disable tool calling — prevents tool-use capable
-                        # models (e.g. llama-3.3-70b-versatile) from returning an empty
-                        # response when they decide to call a tool instead of text output.
-                        tool_choice="none",
+                    completion = await self.pool.acreate(
+                        priority, **self._completion_kwargs(messages)
                     )
                     break
                 except Exception as e:
                     last_err = e
-                    err_msg = str(e).upper()
-                    is_rate_limit = isinstance(e, groq.RateLimitError) or "429" in err_msg or "RATE_LIMIT" in err_msg or "TOO MANY REQUESTS" in err_msg or "LIMIT" in err_msg
-                    is_overloaded = "503" in err_msg or "OVERLOADED" in err_msg or "SERVICE_UNAVAILABLE" in err_msg or "500" in err_msg
-
-                    if (is_rate_limit or is_overloaded) and len(self.api_keys) > 1:
-                        logger.warning("groq_rate_limited_rotating_key", error=str(e), attempt=attempt)
-                        self._rotate_key()
-                        time.sleep(3.0)
-                    else:
-                        if attempt < max_attempts - 1:
-                            sleep_time = 1.0 * (attempt + 1)
-                            logger.warning("groq_error_retrying", error=str(e), attempt=attempt, sleep_time=sleep_time)
-                            time.sleep(sleep_time)
-                        else:
-                            raise e
+                    await asyncio.sleep(self._retry_delay(e, attempt, max_attempts))
 
             if completion is None:
                 raise last_err if last_err else LLMError("Failed to generate completion from Groq.")
 
-            answer = completion.choices[0].message.content
+            return self._finish(completion)
 
-            # Guard against empty model output (e.g. tool-use model returned no text)
-            if not answer or not answer.strip():
-                finish_reason = completion.choices[0].finish_reason
-                logger.error(
-                    "groq_empty_response",
-                    finish_reason=finish_reason,
-                    model=self.model,
-                )
-                raise LLMError(
-                    f"Model returned an empty response (finish_reason={finish_reason!r}). "
-                    "This usually means the model attempted a tool call. "
-                    "Set LLM_MODEL to 'llama-3.1-8b-instant' or ensure tool_choice='none'."
-                )
+        except Exception as e:
+            raise self._fail(e)
 
-            answer = answer.strip()
 
-            usage = {
-                "prompt_tokens": completion.usage.prompt_tokens,
-                "completion_tokens": completion.usage.completion_tokens,
-                "total_tokens": completion.usage.total_tokens,
-            }
-            self.last_token_usage = usage
-            logger.info("groq_success", tokens_used=usage)
+    async def astream_answer(
+        self,
+        query: str,
+        documents: List[RetrievedDocument],
+        chat_history: List[Dict[str, str]] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        packed: Optional[PackedContext] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams the answer as text deltas (stream=True on AsyncGroq).
+
+        Retries and key scheduling apply only to opening the stream; once tokens
+        flow, an error ends the stream with LLMError. Token usage arrives with
+        the final chunk and is stored in last_token_usage.
+        """
+        try:
+            messages = self._build_messages(query, documents, chat_history, packed)
 
-            return answer
+            stream = None
+            last_err = None
+            max_attempts = max(3, len(self.pool) * 2)
+
+            for attempt in range(max_attempts):
+                try:
+                    stream = await self.pool.acreate(
+                        priority, **self._completion_kwargs(messages), stream=True
+                    )
+                    break
+                except Exception as e:
+                    last_err = e
+                    await asyncio.sleep(self._retry_delay(e, attempt, max_attempts))
+
+            if stream is None:
+                raise last_err if last_err else LLMError("Failed to open completion stream from Groq.")
+
+            usage = None
+            emitted = False
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    emitted = True
+                    yield chunk.choices[0].delta.content
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and x_groq.usage is not None:
+                    usage = x_groq.usage
+                elif getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+
+            if not emitted:
+                logger.error("groq_empty_response", finish_reason="stream", model=self.model)
+                raise LLMError("Model returned an empty response.")
+
+            self._record_usage(usage)
 
         except Exception as e:
-            self.last_token_usage = None
-            logger.error(
-                "groq_call_failed",
-                error=str(e),
-                error_type=type(e).__name__,
-                traceback=traceback.format_exc(),
-            )
-            raise LLMError(f"Failed to generate answer: {e}")
+            raise self._fail(e)
 
 
 _llm_chain: Optional[LLMChain] = None
@@ -0,0 +1,102 @@
+"""
+Recently popular search queries, for warming caches at startup.
+
+Pipeline position:
+    search query (standalone or condensed) ──► [PopularQueries.record]  (after the turn)
+                                                      │ ZINCRBY
+                                                      ▼
+                                          Redis sorted set "popular_queries"
+                                                      │ top N
+                                                      ▼
+                           app/warmup.py ──► embedding cache (L1 of this worker)
+
+Design decisions:
+- One sorted set of normalized queries (the embedding cache's normalization,
+  so a primed entry is the one a later request looks up). Scores are
+  forward-decayed counts: a hit adds 2^(t / half-life) rather than 1, so
+  the ranking is a count with exponential decay, and last month's burst
+  does not outrank this week's questions, without ever rewriting old scores.
+- Bounded: once the set holds twice MAX_TRACKED members, the lowest-scored
+  are trimmed back to MAX_TRACKED in one command, so the trim is amortized
+  over MAX_TRACKED new queries.
+- Best-effort, as in the answer cache: short socket timeouts, errors are
+  logged and dropped. Recording runs after the answer, off the request path.
+"""
+
+import time
+from typing import List, Optional
+
+from app.config import settings
+from app.core.embedding_cache import normalize_cache_text
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+_KEY = "popular_queries"
+# Decay epoch: keeps the increments small (2^(elapsed / half-life))
+_EPOCH = 1_767_225_600  # 2026-01-01T00:00:00Z
+
+
+class PopularQueries:
+    """Decayed query counts in one Redis sorted set."""
+
+    MAX_TRACKED = 2000
+
+    def __init__(self, redis_client, half_life_seconds: float = 7 * 86400, max_tracked: int = MAX_TRACKED):
+        self.redis_client = redis_client
+        self.half_life_seconds = half_life_seconds
+        self.max_tracked = max_tracked
+
+    def _weight(self, now: float) -> float:
+        return 2.0 ** ((now - _EPOCH) / self.half_life_seconds)
+
+    async def record(self, query: str, now: Optional[float] = None) -> None:
+        member = normalize_cache_text(query)
+        if not member:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zincrby(_KEY, self._weight(time.time() if now is None else now), member)
+            pipe.zcard(_KEY)
+            _, size = await pipe.execute()
+            if size > 2 * self.max_tracked:
+                await self.redis_client.zremrangebyrank(_KEY, 0, size - self.max_tracked - 1)
+        except Exception as e:
+            logger.warning("popular_query_record_failed", error=str(e))
+
+    async def top(self, n: int) -> List[str]:
+        """The n highest-ranked queries, most popular first ([] if Redis is unavailable)."""
+        if n <= 0:
+            return []
+        try:
+            members = await self.redis_client.zrevrange(_KEY, 0, n - 1)
+        except Exception as e:
+            logger.warning("popular_queries_unavailable", error=str(e))
+            return []
+        return list(members)
+
+
+_popular: Optional[PopularQueries] = None
+
+
+def get_popular_queries() -> PopularQueries:
+    global _popular
+    if _popular is None:
+        import redis.asyncio as aioredis
+
+        _popular = PopularQueries(
+            redis_client=aioredis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+            )
+        )
+    return _popular
+
+
+async def close_popular_queries() -> None:
+    global _popular
+    if _popular is not None:
+        await _popular.redis_client.aclose()
+        _popular = None
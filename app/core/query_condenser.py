@@ -21,7 +21,10 @@ Design decisions:
 - Only contextual follow-ups trigger an LLM rephrase.
 - Uses llama-3.1-8b-instant for speed (<200ms typical latency).
 - Logs original vs rewritten query for debugging retrieval failures.
-- Uses same Groq key rotation mechanism as LLMChain.
+- Shares LLMChain's GroqKeyPool in the CONDENSER priority class, so it
+  yields to interactive answers, and waits at most a couple of seconds for a
+  key before falling back to the original query.
+- acondense is the AsyncGroq twin of condense for the async request path.
 """
 
 import re
@@ -29,10 +32,8 @@ import time
 import traceback
 from typing import List, Dict, Optional
 
-from groq import Groq
-
-from app.config import settings
-from app.utils import get_logger
+from app.core.groq_pool import Priority, get_groq_pool, is_rate_limit_error
+from app.utils import get_logger, LLMError, count_retry
 
 logger = get_logger(__name__)
 
@@ -65,6 +66,9 @@ _SECTION_STANDALONE = re.compile(
     re.IGNORECASE,
 )
 
+# The rewrite sits on the request path: never queue long for a key
+_MAX_KEY_WAIT_SECONDS = 2.0
+
 
 def _is_contextual_query(query: str) -> bool:
     """Returns True only if the query looks like a contextual follow-up."""
@@ -104,34 +108,13 @@ class QueryCondenser:
 
     def __init__(self):
         self.model = "llama-3.1-8b-instant"
-        self._init_api_keys()
-        self.client = Groq(api_key=self.api_keys[self.current_key_idx], max_retries=0)
+        self.pool = get_groq_pool()
         logger.info(
             "query_condenser_initialized",
             model=self.model,
-            num_keys=len(self.api_keys),
+            num_keys=len(self.pool),
         )
 
-    def _init_api_keys(self):
-        self.api_keys = []
-        if getattr(settings, "GROQ_API_KEY", None):
-            self.api_keys.append(settings.GROQ_API_KEY)
-        for idx in range(2, 10):
-            val = getattr(settings, f"GROQ_API_KEY_{idx}", None)
-            if val and val not in self.api_keys:
-                self.api_keys.append(val)
-        if not self.api_keys:
-            raise RuntimeError("No Groq API keys available for QueryCondenser.")
-        self.current_key_idx = 0
-
-    def _rotate_key(self):
-        if len(self.api_keys) > 1:
-            self.current_key_idx = (self.current_key_idx + 1) % len(self.api_keys)
-            self.client = Groq(
-                api_key=self.api_keys[self.current_key_idx], max_retries=0
-            )
-            logger.info("condenser_key_rotated", new_key_index=self.current_key_idx)
-
     def _format_history(self, chat_history: List[Dict[str, str]]) -> str:
         """Formats the last 4 messages (2 turns) for the condenser prompt."""
         recent = chat_history[-4:]
@@ -145,6 +128,79 @@ class QueryCondenser:
             lines.append(f"{role}: {content}")
         return "\n".join(lines)
 
+    @staticmethod
+    def _result(search_query: str, query: str, condensed: bool, rewrite_ms: int) -> Dict[str, str]:
+        return {
+            "search_query": search_query,
+            "original_query": query,
+            "condensed": condensed,
+            "rewrite_ms": rewrite_ms,
+        }
+
+    def _skip(self, query: str, chat_history: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Fast keyword filter: returns the pass-through result when no LLM call is needed."""
+        if not chat_history or not _is_contextual_query(query):
+            logger.info(
+                "condenser_skipped",
+                query=query,
+                reason="keyword_filter_no_match" if chat_history else "no_history",
+            )
+            return self._result(query, query, False, 0)
+        return None
+
+    def _completion_kwargs(self, query: str, chat_history: List[Dict[str, str]]) -> Dict:
+        history_text = self._format_history(chat_history)
+        user_prompt = _USER_TEMPLATE.format(history=history_text, query=query)
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.0,
+            max_tokens=128,
+            tool_choice="none",
+        )
+
+    def _should_retry(self, e: Exception, attempt: int) -> bool:
+        """Retries rate limits on the next pool key; any other error falls back to the original query."""
+        if is_rate_limit_error(e) and not isinstance(e, LLMError):
+            count_retry("groq")
+            return True
+        logger.warning(
+            "condenser_error",
+            attempt=attempt,
+            error=str(e),
+            traceback=traceback.format_exc(),
+        )
+        return False
+
+    def _finish(self, completion, last_err, query: str, rewrite_ms: int) -> Dict[str, str]:
+        if completion is None:
+            logger.error(
+                "condenser_fallback",
+                reason="all_attempts_failed",
+                error=str(last_err),
+                original_query=query,
+            )
+            return self._result(query, query, False, rewrite_ms)
+
+        rewritten = completion.choices[0].message.content
+        if not rewritten or not rewritten.strip():
+            logger.warning("condenser_empty_response", original_query=query)
+            rewritten = query
+
+        rewritten = rewritten.strip().strip('"').strip("'")
+
+        logger.info(
+            "condenser_applied",
+            original_query=query,
+            rewritten_query=rewritten,
+            rewrite_ms=rewrite_ms,
+        )
+
+        return self._result(rewritten, query, True, rewrite_ms)
+
     def condense(
         self,
         query: str,
@@ -160,99 +216,62 @@ class QueryCondenser:
             - rewrite_ms: latency of the LLM call (0 if skipped)
         """
         # ── Step 1: Fast keyword filter ──────────────────────────────────────
-        if not chat_history or not _is_contextual_query(query):
-            logger.info(
-                "condenser_skipped",
-                query=query,
-                reason="keyword_filter_no_match" if chat_history else "no_history",
-            )
-            return {
-                "search_query": query,
-                "original_query": query,
-                "condensed": False,
-                "rewrite_ms": 0,
-            }
+        skipped = self._skip(query, chat_history)
+        if skipped is not None:
+            return skipped
 
         # ── Step 2: LLM rephrase ─────────────────────────────────────────────
-        history_text = self._format_history(chat_history)
-        user_prompt = _USER_TEMPLATE.format(history=history_text, query=query)
-
-        import groq as groq_lib
+        kwargs = self._completion_kwargs(query, chat_history)
 
         t0 = time.perf_counter()
         completion = None
         last_err = None
-        max_attempts = max(2, len(self.api_keys))
+        max_attempts = max(2, len(self.pool))
 
         for attempt in range(max_attempts):
             try:
-                completion = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": _SYSTEM_PROMPT},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    temperature=0.0,
-                    max_tokens=128,
-                    tool_choice="none",
+                completion = self.pool.create(
+                    Priority.CONDENSER, max_wait=_MAX_KEY_WAIT_SECONDS, **kwargs
                 )
                 break
             except Exception as e:
                 last_err = e
-                err_msg = str(e).upper()
-                is_rate_limit = (
-                    isinstance(e, groq_lib.RateLimitError)
-                    or "429" in err_msg
-                    or "RATE_LIMIT" in err_msg
-                )
-                if is_rate_limit and len(self.api_keys) > 1:
-                    self._rotate_key()
-                    time.sleep(1.0)
-                else:
-                    logger.warning(
-                        "condenser_error",
-                        attempt=attempt,
-                        error=str(e),
-                        traceback=traceback.format_exc(),
-                    )
+                if not self._should_retry(e, attempt):
                     break  # Fall back to original query on any non-rate-limit error
 
         rewrite_ms = int((time.perf_counter() - t0) * 1000)
+        return self._finish(completion, last_err, query, rewrite_ms)
 
-        if completion is None:
-            logger.error(
-                "condenser_fallback",
-                reason="all_attempts_failed",
-                error=str(last_err),
-                original_query=query,
-            )
-            return {
-                "search_query": query,
-                "original_query": query,
-                "condensed": False,
-                "rewrite_ms": rewrite_ms,
-            }
+    async def acondense(
+        self,
+        query: str,
+        chat_history: List[Dict[str, str]],
+    ) -> Dict[str, str]:
+        """Async condense: AsyncGroq, non-blocking key queueing, same result dict."""
+        skipped = self._skip(query, chat_history)
+        if skipped is not None:
+            return skipped
 
-        rewritten = completion.choices[0].message.content
-        if not rewritten or not rewritten.strip():
-            logger.warning("condenser_empty_response", original_query=query)
-            rewritten = query
+        kwargs = self._completion_kwargs(query, chat_history)
 
-        rewritten = rewritten.strip().strip('"').strip("'")
+        t0 = time.perf_counter()
+        completion = None
+        last_err = None
+        max_attempts = max(2, len(self.pool))
 
-        logger.info(
-            "condenser_applied",
-            original_query=query,
-            rewritten_query=rewritten,
-            rewrite_ms=rewrite_ms,
-        )
+        for attempt in range(max_attempts):
+            try:
+                completion = await self.pool.acreate(
+                    Priority.CONDENSER, max_wait=_MAX_KEY_WAIT_SECONDS, **kwargs
+                )
+                break
+            except Exception as e:
+                last_err = e
+                if not self._should_retry(e, attempt):
+                    break
 
-        return {
-            "search_query": rewritten,
-            "original_query": query,
-            "condensed": True,
-            "rewrite_ms": rewrite_ms,
-        }
+        rewrite_ms = int((time.perf_counter() - t0) * 1000)
+        return self._finish(completion, last_err, query, rewrite_ms)
 
 
 # ---------------------------------------------------------------------------
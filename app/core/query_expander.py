@@ -2,13 +2,30 @@
 Static query expansion for legal vocabulary normalization.
 
 No external API calls. Fully deterministic.
-Dictionary loaded from external JSON at startup.
+Dictionary loaded from external JSON on first use (the first expansion, or
+the startup warmup's dummy search), not at import.
+
+Design decisions:
+- VOCABULARY_MAP / SYNONYM_MAP keys (single words and phrases) and the
+  single-word LEGAL_CONCEPT_MAP keys are compiled once into a token-level
+  Aho-Corasick automaton. Matching is one left-to-right pass over the query
+  tokens, so cost no longer grows with the dictionary size, and a phrase
+  only matches on whole words ("5 people" no longer matches "25 people").
+- The concept expansion of every key (its dictionary terms plus the
+  LEGAL_CONCEPT_MAP terms those lead to) is precomputed at compile time;
+  a match just unions a frozen set. Concept expansion stays one hop deep,
+  as before: terms added by LEGAL_CONCEPT_MAP are not expanded again.
+- Results are memoized per normalized query (the token sequence), so the
+  retriever, the embedding path and the evaluation scripts expanding the
+  same query share one computation.
 """
 
 import json
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
 
 from app.utils import get_logger
 
@@ -20,101 +37,204 @@ logger = get_logger(__name__)
 _DATA_PATH = Path(__file__).parent.parent / "data" / "query_expansion.json"
 
 
+_MAP_ATTRIBUTES = {
+    "VOCABULARY_MAP": "vocabulary_map",
+    "SYNONYM_MAP": "synonym_map",
+    "LEGAL_CONCEPT_MAP": "legal_concept_map",
+}
+
+
+@lru_cache(maxsize=1)
 def _load_dictionary() -> Dict[str, Dict[str, List[str]]]:
     with open(_DATA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+        data = json.load(f)
+    logger.info(
+        "query_expansion_dictionary_loaded",
+        vocabulary_entries=len(data["vocabulary_map"]),
+        synonym_entries=len(data["synonym_map"]),
+        legal_concept_entries=len(data["legal_concept_map"]),
+    )
+    return data
 
 
-_DICT = _load_dictionary()
-VOCABULARY_MAP: Dict[str, List[str]] = _DICT["vocabulary_map"]
-SYNONYM_MAP: Dict[str, List[str]] = _DICT["synonym_map"]
-LEGAL_CONCEPT_MAP: Dict[str, List[str]] = _DICT["legal_concept_map"]
+def __getattr__(name: str) -> Dict[str, List[str]]:
+    # VOCABULARY_MAP / SYNONYM_MAP / LEGAL_CONCEPT_MAP, loaded on first access
+    if name in _MAP_ATTRIBUTES:
+        return _load_dictionary()[_MAP_ATTRIBUTES[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-logger.info(
-    "query_expansion_dictionary_loaded",
-    vocabulary_entries=len(VOCABULARY_MAP),
-    synonym_entries=len(SYNONYM_MAP),
-    legal_concept_entries=len(LEGAL_CONCEPT_MAP),
-)
 
-# Precompute merged map and sorted multi-word phrases (longest first)
-_ALL_MAPS: Dict[str, List[str]] = {**VOCABULARY_MAP, **SYNONYM_MAP}
-_MULTI_WORD_PHRASES = sorted(
-    [k for k in _ALL_MAPS if " " in k],
-    key=lambda x: len(x),
-    reverse=True,
-)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize_query(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
 
 
 # --------------------------------------------------
-# Public API
+# Compiled matcher
 # --------------------------------------------------
-def expand_query_with_trace(query: str) -> tuple[str, list[str]]:
-    """Expand query with legal synonyms and Hinglish translations, returning the matched rules trace.
+@dataclass(frozen=True)
+class _Rule:
+    """Everything one matched dictionary key contributes to an expansion."""
+    terms: FrozenSet[str]
+    trace: Tuple[str, ...]
 
-    The expansion is additive — original query tokens are always preserved.
-    Returns (original_query, []) if no dictionary keys match.
+
+class ExpansionMatcher:
+    """
+    Token-level Aho-Corasick automaton over the expansion dictionary.
+
+    States are token tries; every state carries the rules of all keys that
+    end there (its own plus those inherited through failure links), so
+    match() reports every dictionary key occurring in the query, including
+    overlapping ones, in a single pass.
     """
-    lower_q = query.lower()
-    expansions: Set[str] = set()
-    trace: List[str] = []
-
-    # Phase 1: Multi-word phrase matching (greedy, longest first)
-    for phrase in _MULTI_WORD_PHRASES:
-        if phrase in lower_q:
-            terms = _ALL_MAPS.get(phrase, [])
-            if terms:
-                expansions.update(terms)
-                trace.append(f"{phrase} -> {','.join(terms)}")
-
-    # Phase 2: Single-word token matching
-    tokens = re.findall(r"[a-z0-9]+", lower_q)
-    for token in tokens:
-        if token in VOCABULARY_MAP:
-            terms = VOCABULARY_MAP[token]
-            if terms:
-                expansions.update(terms)
-                trace.append(f"{token} -> {','.join(terms)}")
-        if token in SYNONYM_MAP:
-            terms = SYNONYM_MAP[token]
-            if terms:
-                expansions.update(terms)
-                trace.append(f"{token} -> {','.join(terms)}")
 
-    # Phase 3: Concept expansion on collected terms + original tokens
-    for term in list(expansions) + tokens:
-        if term in LEGAL_CONCEPT_MAP:
-            terms = LEGAL_CONCEPT_MAP[term]
+    def __init__(
+        self,
+        vocabulary_map: Dict[str, List[str]],
+        synonym_map: Dict[str, List[str]],
+        concept_map: Dict[str, List[str]],
+    ):
+        rules = self._compile_rules(vocabulary_map, synonym_map, concept_map)
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._rules: List[_Rule] = []
+
+        for key, rule in rules.items():
+            state = 0
+            for token in tokenize_query(key):
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            if state:
+                self._out[state] += (len(self._rules),)
+                self._rules.append(rule)
+
+        self._build_failure_links()
+
+    @property
+    def num_keys(self) -> int:
+        return len(self._rules)
+
+    @staticmethod
+    def _compile_rules(
+        vocabulary_map: Dict[str, List[str]],
+        synonym_map: Dict[str, List[str]],
+        concept_map: Dict[str, List[str]],
+    ) -> Dict[str, _Rule]:
+        # Query text is matched against vocabulary/synonym keys of any length
+        # and against single-word concept keys; multi-word concept keys are
+        # only reached through the terms of another key.
+        keys = list(dict.fromkeys(
+            list(vocabulary_map)
+            + list(synonym_map)
+            + [k for k in concept_map if len(tokenize_query(k)) == 1]
+        ))
+
+        rules: Dict[str, _Rule] = {}
+        for key in keys:
+            terms: Set[str] = set()
+            trace: List[str] = []
+            direct: List[str] = []
+            for source in (vocabulary_map, synonym_map):
+                values = source.get(key)
+                if values:
+                    terms.update(values)
+                    direct.extend(values)
+                    trace.append(f"{key} -> {','.join(values)}")
+
+            concept_sources = direct + ([key] if len(tokenize_query(key)) == 1 else [])
+            for term in dict.fromkeys(concept_sources):
+                values = concept_map.get(term)
+                if values:
+                    terms.update(values)
+                    trace.append(f"{term} -> {','.join(values)}")
+
+            terms.discard("")
             if terms:
-                expansions.update(terms)
-                trace.append(f"{term} -> {','.join(terms)}")
+                rules[key] = _Rule(frozenset(terms), tuple(trace))
+        return rules
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(token, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def match(self, tokens: Iterable[str]) -> Tuple[Set[str], List[str]]:
+        """Returns (expansion terms, trace) for every dictionary key in `tokens`."""
+        terms: Set[str] = set()
+        trace: List[str] = []
+        seen_rules: Set[int] = set()
+
+        state = 0
+        for token in tokens:
+            while state and token not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(token, 0)
+            for rule_id in self._out[state]:
+                if rule_id in seen_rules:
+                    continue
+                seen_rules.add(rule_id)
+                rule = self._rules[rule_id]
+                terms |= rule.terms
+                trace.extend(rule.trace)
+
+        return terms, list(dict.fromkeys(trace))
+
+
+@lru_cache(maxsize=1)
+def _matcher() -> ExpansionMatcher:
+    data = _load_dictionary()
+    return ExpansionMatcher(data["vocabulary_map"], data["synonym_map"], data["legal_concept_map"])
+
+
+@lru_cache(maxsize=4096)
+def _expand_tokens(tokens: Tuple[str, ...]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Memoized per normalized query: (new terms, sorted; trace)."""
+    expansions, trace = _matcher().match(tokens)
+    existing_tokens = set(tokens)
+    new_terms = sorted(t for t in expansions if t.lower() not in existing_tokens)
+    return tuple(new_terms), tuple(trace)
 
-    # Remove empty strings
-    expansions.discard("")
 
-    # Deduplicate trace entries while preserving order
-    seen_trace = set()
-    deduped_trace = []
-    for t in trace:
-        if t not in seen_trace:
-            seen_trace.add(t)
-            deduped_trace.append(t)
+def expansion_cache_info():
+    return _expand_tokens.cache_info()
 
-    if not expansions:
-        logger.info(
-            "query_expansion", original=query, expanded=query, expanded_terms=0
-        )
-        return query, deduped_trace
 
-    # Deduplicate against existing query tokens
-    existing_tokens = set(tokens)
-    new_terms = sorted(t for t in expansions if t.lower() not in existing_tokens)
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+def expand_query_with_trace(query: str) -> Tuple[str, List[str]]:
+    """Expand query with legal synonyms and Hinglish translations, returning the matched rules trace.
+
+    The expansion is additive — original query tokens are always preserved.
+    Returns (original_query, []) if no dictionary keys match.
+    """
+    new_terms, trace = _expand_tokens(tuple(tokenize_query(query)))
 
     if not new_terms:
         logger.info(
             "query_expansion", original=query, expanded=query, expanded_terms=0
         )
-        return query, deduped_trace
+        return query, list(trace)
 
     expanded = f"{query} {' '.join(new_terms)}"
     logger.info(
@@ -123,7 +243,7 @@ def expand_query_with_trace(query: str) -> tuple[str, list[str]]:
         expanded=expanded,
         expanded_terms=len(new_terms),
     )
-    return expanded, deduped_trace
+    return expanded, list(trace)
 
 
 def expand_query(query: str) -> str:
@@ -0,0 +1,263 @@
+"""
+Distributed per-user rate limiting (GCRA) in Redis.
+
+Pipeline position:
+    get_current_user (user_id)
+        │
+        ▼
+    [RateLimiter.check]  ── one EVALSHA: request budget + token budget
+        │ allowed                              │ limited
+        ▼                                      ▼
+    endpoint (RateLimit-* headers)          429 + Retry-After
+        │
+        ▼
+    [RateLimiter.charge]  ── Groq tokens actually used (LLMChain.last_token_usage)
+
+Key layout:
+    ratelimit:{user}  hash  req / tok: theoretical arrival time (epoch ms)
+
+Design decisions:
+- GCRA keeps one timestamp per budget instead of a window of request
+  timestamps: O(1) memory per user, no boundary bursts, and "retry after"
+  and "remaining" fall straight out of the arithmetic.
+- Both budgets live in one hash key, so the admission script touches a
+  single key (cluster-safe) and costs one round trip. The key expires when
+  both budgets have fully refilled.
+- A request has a cost in the request budget: 1, or the number of
+  questions for a batch. A batch larger than the burst is admitted only
+  with the request budget full, and leaves the user in debt until it
+  drains, as a long answer does with tokens.
+- Requests are admitted against the token budget while the user has any of
+  it left; the real cost is only known after generation, when charge() adds
+  the Groq usage. A long answer can therefore overdraw the budget once, and
+  the next requests wait until the debt has drained.
+- Keyed on the authenticated user id, not the client address: every worker
+  and replica shares the counts, and users behind one NAT do not throttle
+  each other.
+- The limiter fails open: if Redis is unreachable the request is served and
+  the error logged, rather than taking the API down with the limiter.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.utils import get_logger, dependency
+
+logger = get_logger(__name__)
+
+
+# KEYS: ratelimit:{user}
+# ARGV: now_ms, request_interval_ms, request_tolerance_ms, token_interval_ms, token_tolerance_ms, cost
+# Returns {allowed, request_wait_ms, token_wait_ms, request_backlog_ms, token_backlog_ms}.
+_CHECK_LUA = """
+local now = tonumber(ARGV[1])
+local req_interval, req_tolerance = tonumber(ARGV[2]), tonumber(ARGV[3])
+local tok_interval, tok_tolerance = tonumber(ARGV[4]), tonumber(ARGV[5])
+local cost = tonumber(ARGV[6])
+
+local state = redis.call('HMGET', KEYS[1], 'req', 'tok')
+local req_tat = math.max(tonumber(state[1]) or now, now)
+local tok_tat = math.max(tonumber(state[2]) or now, now)
+
+local new_req_tat = req_tat + cost * req_interval
+-- A cost above the burst can never fit: it waits for a full budget instead
+local req_wait = math.max(math.min(new_req_tat - req_tolerance, req_tat) - now, 0)
+local tok_wait = 0
+if tok_tat - now >= tok_tolerance then
+    tok_wait = tok_tat - tok_tolerance - now + tok_interval
+end
+
+if req_wait > 0 or tok_wait > 0 then
+    return {0, math.ceil(req_wait), math.ceil(tok_wait), math.ceil(req_tat - now), math.ceil(tok_tat - now)}
+end
+
+redis.call('HSET', KEYS[1], 'req', new_req_tat)
+redis.call('PEXPIRE', KEYS[1], math.ceil(math.max(new_req_tat, tok_tat) - now))
+return {1, 0, 0, math.ceil(new_req_tat - now), math.ceil(tok_tat - now)}
+"""
+
+# KEYS: ratelimit:{user}
+# ARGV: now_ms, token_interval_ms, tokens
+# Returns the token backlog in ms.
+_CHARGE_LUA = """
+local now = tonumber(ARGV[1])
+local tat = math.max(tonumber(redis.call('HGET', KEYS[1], 'tok')) or now, now)
+tat = tat + tonumber(ARGV[2]) * tonumber(ARGV[3])
+redis.call('HSET', KEYS[1], 'tok', tat)
+if redis.call('PTTL', KEYS[1]) < tat - now then
+    redis.call('PEXPIRE', KEYS[1], math.ceil(tat - now))
+end
+return math.ceil(tat - now)
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one admission check."""
+
+    allowed: bool
+    request_limit: int
+    request_remaining: int
+    request_reset: int
+    token_limit: int
+    token_remaining: int
+    token_reset: int
+    window_seconds: int
+    retry_after: int = 0
+    limited_by: Optional[str] = None
+
+    def headers(self) -> Dict[str, str]:
+        """
+        RateLimit-* headers (IETF httpapi draft). Limit / Remaining / Reset
+        describe whichever budget is closer to exhaustion; RateLimit-Policy
+        lists both.
+        """
+        use_tokens = (
+            self.token_remaining / max(self.token_limit, 1)
+            < self.request_remaining / max(self.request_limit, 1)
+        )
+        if use_tokens:
+            limit, remaining, reset = self.token_limit, self.token_remaining, self.token_reset
+        else:
+            limit, remaining, reset = self.request_limit, self.request_remaining, self.request_reset
+
+        headers = {
+            "RateLimit-Limit": str(limit),
+            "RateLimit-Remaining": str(remaining),
+            "RateLimit-Reset": str(reset),
+            "RateLimit-Policy": (
+                f'{self.request_limit};w={self.window_seconds};comment="requests", '
+                f'{self.token_limit};w={self.window_seconds};comment="llm tokens"'
+            ),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class RateLimiter:
+    """Per-user GCRA over a request budget and an LLM-token budget."""
+
+    def __init__(
+        self,
+        redis_client,
+        requests_per_window: int,
+        tokens_per_window: int,
+        window_seconds: int = 60,
+    ):
+        self.redis_client = redis_client
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.window_seconds = window_seconds
+
+        window_ms = window_seconds * 1000
+        self._request_interval_ms = window_ms / requests_per_window
+        self._token_interval_ms = window_ms / tokens_per_window
+        # A full window of requests may arrive at once (burst == limit)
+        self._request_tolerance_ms = window_ms
+        self._token_tolerance_ms = window_ms
+
+        self._check_script = redis_client.register_script(_CHECK_LUA)
+        self._charge_script = redis_client.register_script(_CHARGE_LUA)
+
+    def _key(self, user_id: str) -> str:
+        return f"ratelimit:{user_id}"
+
+    def _decision(self, allowed, request_wait, token_wait, request_backlog, token_backlog) -> RateLimitDecision:
+        request_remaining = (self._request_tolerance_ms - request_backlog) / self._request_interval_ms
+        token_remaining = (self._token_tolerance_ms - token_backlog) / self._token_interval_ms
+        limited_by = None
+        if not allowed:
+            limited_by = "requests" if request_wait >= token_wait else "tokens"
+        return RateLimitDecision(
+            allowed=bool(allowed),
+            request_limit=self.requests_per_window,
+            request_remaining=max(int(request_remaining), 0),
+            request_reset=math.ceil(request_backlog / 1000),
+            token_limit=self.tokens_per_window,
+            token_remaining=max(int(token_remaining), 0),
+            token_reset=math.ceil(token_backlog / 1000),
+            window_seconds=self.window_seconds,
+            retry_after=math.ceil(max(request_wait, token_wait) / 1000),
+            limited_by=limited_by,
+        )
+
+    async def check(self, user_id: str, cost: int = 1) -> Optional[RateLimitDecision]:
+        """Admits a request worth cost requests; None if Redis is unavailable (fail open)."""
+        try:
+            with dependency("redis", "rate_limit_check"):
+                result = await self._check_script(
+                    keys=[self._key(user_id)],
+                    args=[
+                        time.time() * 1000,
+                        self._request_interval_ms,
+                        self._request_tolerance_ms,
+                        self._token_interval_ms,
+                        self._token_tolerance_ms,
+                        cost,
+                    ],
+                )
+        except RedisError as e:
+            logger.warning("rate_limit_unavailable", error=str(e))
+            return None
+
+        decision = self._decision(*result)
+        if not decision.allowed:
+            logger.info(
+                "rate_limited",
+                user_id=user_id,
+                limited_by=decision.limited_by,
+                retry_after=decision.retry_after,
+            )
+        return decision
+
+    async def charge(self, user_id: str, tokens: int) -> None:
+        """Debits LLM tokens actually used by an admitted request."""
+        if tokens <= 0:
+            return
+        try:
+            with dependency("redis", "rate_limit_charge"):
+                await self._charge_script(
+                    keys=[self._key(user_id)],
+                    args=[time.time() * 1000, self._token_interval_ms, tokens],
+                )
+        except RedisError as e:
+            logger.warning("rate_limit_charge_failed", user_id=user_id, tokens=tokens, error=str(e))
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        import redis.asyncio as aioredis
+
+        _limiter = RateLimiter(
+            redis_client=aioredis.Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+            ),
+            requests_per_window=settings.RATE_LIMIT_PER_MINUTE,
+            tokens_per_window=settings.RATE_LIMIT_TOKENS_PER_MINUTE,
+        )
+        logger.info(
+            "rate_limiter_initialized",
+            requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            tokens_per_minute=settings.RATE_LIMIT_TOKENS_PER_MINUTE,
+        )
+    return _limiter
+
+
+async def close_rate_limiter() -> None:
+    global _limiter
+    if _limiter is not None:
+        await _limiter.redis_client.aclose()
+        _limiter = None
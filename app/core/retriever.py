@@ -1,26 +1,57 @@
+import asyncio
 import re
-import httpx
-from typing import List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from functools import lru_cache
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue
+import numpy as np
 
 from app.config import settings
+from app.core.bm25_index import BM25Index, corpus_checksum, tokenize
+from app.core.dense_index import LocalDenseIndex
+from app.core.embedding_cache import get_embedding_cache
+from app.core.embeddings import get_embedding_provider
 from app.core.query_expander import expand_query
+from app.core.section_store import SectionStore
 from app.models import RetrievedDocument
-from app.utils import get_logger
+from app.utils import get_logger, RetrievalError, count_retry, dependency, stage
+
+if TYPE_CHECKING:
+    # qdrant_client is imported with the first client (~2 s of import time,
+    # most of the app's), off the cold start path
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+    from qdrant_client.models import Filter, QueryRequest
 
 logger = get_logger(__name__)
 
-HF_EMBEDDING_URL = "https://router.huggingface.co/hf-inference/models/intfloat/multilingual-e5-base/pipeline/feature-extraction"
+_DATA_DIR = Path(__file__).parent.parent.parent / "data"
+_IPC_DATA_PATH = _DATA_DIR / "ipc_clean.json"
+_BM25_INDEX_PATH = _DATA_DIR / "ipc_bm25.idx"
+_DENSE_VECTORS_PATH = _DATA_DIR / "ipc_vectors.npy"
+
+# (SectionStore ids best first, scores): what the branches rank and RRF fuses
+Hits = Tuple[List[int], List[float]]
 
 
 class DocumentRetriever:
     def __init__(self):
         self.collection_name = settings.QDRANT_COLLECTION_NAME
-        self._client: Optional[QdrantClient] = None
+        self._client: Optional["QdrantClient"] = None
+        self._async_client: Optional["AsyncQdrantClient"] = None
+        # Async dense branches abandoned at their deadline (kept referenced until done)
+        self._background_tasks: set = set()
+        # Dense branch runs here so a slow embedding/Qdrant call can be abandoned at its deadline
+        self._dense_pool = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_WORKERS, thread_name_prefix="dense_retrieval"
+        )
         self._init_bm25()
+        self.dense_index: Optional[LocalDenseIndex] = None
+        # (index, store id of each of its rows), rebuilt if dense_index is replaced
+        self._dense_row_ids: Optional[Tuple[LocalDenseIndex, np.ndarray]] = None
+        if settings.DENSE_BACKEND == "local":
+            self._init_dense_index()
 
     # --------------------------------------------------
     # BM25 Initialization
@@ -28,34 +59,71 @@ class DocumentRetriever:
     def _init_bm25(self):
         logger.info("initializing_bm25_searcher")
         import json
-        from pathlib import Path
-        from rank_bm25 import BM25Okapi
 
-        ipc_path = Path(__file__).parent.parent.parent / "data" / "ipc_clean.json"
-        with open(ipc_path, "r", encoding="utf-8") as f:
-            self.ipc_docs = json.load(f)
+        raw_corpus = _IPC_DATA_PATH.read_bytes()
+        docs = json.loads(raw_corpus)
+        # The parsed dicts live only as long as this method: every later
+        # access goes through the packed store, by integer id
+        self.store = SectionStore.from_docs(docs)
+
+        # Prefer the prebuilt artifact; rebuild in-process only if missing or stale
+        self.corpus_checksum = corpus_checksum(raw_corpus)
+        self.bm25 = BM25Index.load(_BM25_INDEX_PATH, expected_checksum=self.corpus_checksum)
+        source = "artifact"
+        if self.bm25 is None:
+            self.bm25 = BM25Index.build_from_docs(docs)
+            source = "in_process_build"
+
+        logger.info(
+            "bm25_searcher_initialized",
+            total_docs=len(self.store),
+            vocab_size=len(self.bm25.vocab),
+            source=source,
+        )
 
-        self.ipc_by_section = {str(doc["section_number"]): doc for doc in self.ipc_docs}
+    def _tokenize_text(self, text: str) -> List[str]:
+        return tokenize(text)
 
-        # Tokenize all documents over section number + title + text
-        doc_tokens = []
-        for doc in self.ipc_docs:
-            full_text = f"section {doc.get('section_number', '')} {doc.get('title', '')} {doc.get('text', '')}"
-            doc_tokens.append(self._tokenize_text(full_text))
+    # --------------------------------------------------
+    # Local dense index (optional replacement for Qdrant search)
+    # --------------------------------------------------
+    def _init_dense_index(self):
+        index = LocalDenseIndex.load(
+            _DENSE_VECTORS_PATH,
+            expected_model=settings.EMBEDDING_MODEL,
+            expected_dimension=settings.EMBEDDING_DIMENSION,
+        )
+        if index is None:
+            logger.warning("dense_index_unavailable_using_qdrant", path=str(_DENSE_VECTORS_PATH))
+            return
+
+        missing = [sec for sec in index.sections if self.store.id_of(sec) is None]
+        if missing:
+            logger.warning(
+                "dense_index_sections_not_in_corpus_using_qdrant",
+                count=len(missing),
+                sample=missing[:5],
+            )
+            return
 
-        self.bm25 = BM25Okapi(doc_tokens)
-        logger.info("bm25_searcher_initialized", total_docs=len(self.ipc_docs))
+        self.dense_index = index
 
-    def _tokenize_text(self, text: str) -> List[str]:
-        # Lowercase and extract alphanumeric words
-        return re.findall(r'[a-z0-9]+', text.lower())
+    def _dense_ids(self, rows: np.ndarray) -> List[int]:
+        """Store ids of dense-index rows (row -> id map built once per index)."""
+        cached = self._dense_row_ids
+        if cached is None or cached[0] is not self.dense_index:
+            ids = np.array([self.store.id_of(sec) for sec in self.dense_index.sections], dtype=np.int64)
+            cached = self._dense_row_ids = (self.dense_index, ids)
+        return cached[1][rows].tolist()
 
     # --------------------------------------------------
     # Qdrant client (CLOUD SAFE)
     # --------------------------------------------------
     @property
-    def client(self) -> QdrantClient:
+    def client(self) -> "QdrantClient":
         if self._client is None:
+            from qdrant_client import QdrantClient
+
             logger.info("connecting_qdrant_cloud")
             self._client = QdrantClient(
                 url=settings.QDRANT_URL,
@@ -64,55 +132,52 @@ class DocumentRetriever:
             )
         return self._client
 
+    @property
+    def aclient(self) -> "AsyncQdrantClient":
+        if self._async_client is None:
+            from qdrant_client import AsyncQdrantClient
+
+            self._async_client = AsyncQdrantClient(
+                url=settings.QDRANT_URL,
+                api_key=settings.QDRANT_API_KEY,
+                timeout=20.0,
+            )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def reset_after_fork(self) -> None:
+        """
+        Drops per-process resources inherited from a pre-fork master (Qdrant
+        clients, the dense-branch thread pool); the read-only corpus and
+        indexes stay shared. Clients are recreated lazily in this process.
+        """
+        self._client = None
+        self._async_client = None
+        self._background_tasks = set()
+        self._dense_pool = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_WORKERS, thread_name_prefix="dense_retrieval"
+        )
+
     # --------------------------------------------------
-    # Embedding via HuggingFace Inference API
+    # Query embedding (provider selected in settings, two-tier cache in front)
     # --------------------------------------------------
     def _get_embedding(self, text: str) -> List[float]:
-        # Prepend query: prefix as required by E5
-        query_text = text if text.startswith("query: ") else f"query: {text}"
-        headers = {"Content-Type": "application/json"}
+        provider = get_embedding_provider()
+        with stage("embed"):
+            return get_embedding_cache().get_or_compute(text, provider.embed_query)
 
-        # Use HF token if available (handles rate-limited endpoints)
-        if settings.HF_API_TOKEN:
-            headers["Authorization"] = f"Bearer {settings.HF_API_TOKEN}"
+    async def _aget_embedding(self, text: str) -> List[float]:
+        provider = get_embedding_provider()
+        with stage("embed"):
+            return await get_embedding_cache().aget_or_compute(text, provider.aembed_query)
 
-        payload = {
-            "inputs": query_text[:512],
-            "options": {"wait_for_model": True},
-        }
-
-        import time
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                with httpx.Client(timeout=30.0) as client:
-                    response = client.post(
-                        HF_EMBEDDING_URL,
-                        headers=headers,
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                result = response.json()
-                break
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    logger.error("hf_embedding_failed", error=str(e))
-                    raise
-                logger.warning("hf_embedding_retry", attempt=attempt+1, error=str(e))
-                time.sleep(1.0)
-
-        # HF returns nested list for batched or flat list for single
-        if isinstance(result[0], list):
-            vector = result[0]
-        else:
-            vector = result
-
-        # Normalize manually (same as normalize_embeddings=True)
-        norm = sum(x * x for x in vector) ** 0.5
-        if norm > 0:
-            vector = [x / norm for x in vector]
-
-        return vector
+    async def aquery_vector(self, query: str) -> List[float]:
+        """The vector the dense branch searches with for `query` (usually a cache hit)."""
+        return await self._aget_embedding(expand_query(query))
 
     # --------------------------------------------------
     # Detect IPC sections in query
@@ -125,57 +190,145 @@ class DocumentRetriever:
     # --------------------------------------------------
     # Exact section match search
     # --------------------------------------------------
-    def search_by_section(self, section: str) -> List[RetrievedDocument]:
-        import time
+    def search_by_section(self, section: str, limit: int = 5) -> List[RetrievedDocument]:
+        return self.search_by_sections([section], limit=limit)
+
+    def search_by_sections(self, sections: List[str], limit: int = 5) -> List[RetrievedDocument]:
+        """
+        Resolves section numbers from the in-memory corpus, in request order.
+
+        Sections missing locally are fetched from Qdrant in a single scroll
+        (when SECTION_LOOKUP_QDRANT_FALLBACK is on), up to `limit` per section.
+        """
+        with stage("section_lookup"):
+            docs, missing = self._local_sections(sections)
+            if missing and settings.SECTION_LOOKUP_QDRANT_FALLBACK:
+                logger.info("section_lookup_qdrant_fallback", sections=missing)
+                docs.extend(self._qdrant_sections(missing, limit=limit))
+
+        return docs
+
+    async def asearch_by_sections(self, sections: List[str], limit: int = 5) -> List[RetrievedDocument]:
+        with stage("section_lookup"):
+            docs, missing = self._local_sections(sections)
+            if missing and settings.SECTION_LOOKUP_QDRANT_FALLBACK:
+                logger.info("section_lookup_qdrant_fallback", sections=missing)
+                docs.extend(await self._aqdrant_sections(missing, limit=limit))
+
+        return docs
+
+    def _local_sections(self, sections: List[str]) -> Tuple[List[RetrievedDocument], List[str]]:
+        ids, missing = self.store.ids_of(sections)
+        return self.store.documents(ids, [1.0] * len(ids)), missing
+
+    @staticmethod
+    def _sections_filter(sections: List[str]) -> "Filter":
+        from qdrant_client.models import Filter, FieldCondition, MatchAny
+
+        return Filter(
+            must=[
+                FieldCondition(
+                    key="section_number",
+                    match=MatchAny(any=sections),
+                )
+            ]
+        )
+
+    @staticmethod
+    def _section_docs(points) -> List[RetrievedDocument]:
+        return [
+            RetrievedDocument(
+                section=p.payload.get("section_number"),
+                title=p.payload.get("title"),
+                text=p.payload.get("text"),
+                score=1.0,
+            )
+            for p in points
+        ]
+
+    def _qdrant_sections(self, sections: List[str], limit: int) -> List[RetrievedDocument]:
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                results, _ = self.client.scroll(
-                    collection_name=self.collection_name,
-                    scroll_filter=Filter(
-                        must=[
-                            FieldCondition(
-                                key="section_number",
-                                match=MatchValue(value=str(section)),
-                            )
-                        ]
-                    ),
-                    limit=5,
-                    with_payload=True,
-                )
+                with dependency("qdrant", "scroll"):
+                    results, _ = self.client.scroll(
+                        collection_name=self.collection_name,
+                        scroll_filter=self._sections_filter(sections),
+                        limit=limit * len(sections),
+                        with_payload=True,
+                    )
                 break
             except Exception as e:
                 if attempt == max_attempts - 1:
                     logger.error("qdrant_scroll_failed", error=str(e))
                     raise
                 logger.warning("qdrant_scroll_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
                 time.sleep(1.0)
 
-        return [
-            RetrievedDocument(
-                section=p.payload.get("section_number"),
-                title=p.payload.get("title"),
-                text=p.payload.get("text"),
-                score=1.0,
-            )
-            for p in results
-        ]
+        return self._section_docs(results)
+
+    async def _aqdrant_sections(self, sections: List[str], limit: int) -> List[RetrievedDocument]:
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("qdrant", "scroll"):
+                    results, _ = await self.aclient.scroll(
+                        collection_name=self.collection_name,
+                        scroll_filter=self._sections_filter(sections),
+                        limit=limit * len(sections),
+                        with_payload=True,
+                    )
+                break
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("qdrant_scroll_failed", error=str(e))
+                    raise
+                logger.warning("qdrant_scroll_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
+                await asyncio.sleep(1.0)
+
+        return self._section_docs(results)
 
     # --------------------------------------------------
     # Semantic search
     # --------------------------------------------------
     def semantic_search(self, query: str, top_k: int) -> List[RetrievedDocument]:
-        vector = self._get_embedding(query)
+        return self._documents(self._semantic_hits(query, top_k))
+
+    async def asemantic_search(self, query: str, top_k: int) -> List[RetrievedDocument]:
+        return self._documents(await self._asemantic_hits(query, top_k))
+
+    def _semantic_hits(self, query: str, top_k: int) -> Hits:
+        with stage("dense"):
+            vector = self._get_embedding(query)
+
+            if self.dense_index is not None:
+                return self._local_dense_hits(*self.dense_index.search(vector, top_k))
+            return self._qdrant_search(vector, top_k)
+
+    async def _asemantic_hits(self, query: str, top_k: int) -> Hits:
+        with stage("dense"):
+            vector = await self._aget_embedding(query)
 
-        import time
+            if self.dense_index is not None:
+                # One matrix-vector product over ~548 rows: cheaper inline than a thread hop
+                return self._local_dense_hits(*self.dense_index.search(vector, top_k))
+            return await self._aqdrant_search(vector, top_k)
+
+    def _local_dense_hits(self, rows: np.ndarray, scores: np.ndarray) -> Hits:
+        return self._dense_ids(rows), np.clip(scores, 0.0, 1.0).tolist()
+
+    def _qdrant_search(self, vector: List[float], top_k: int) -> Hits:
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                response = self.client.query_points(
-                    collection_name=self.collection_name,
-                    query=vector,
-                    limit=top_k,
-                )
+                with dependency("qdrant", "query"):
+                    response = self.client.query_points(
+                        collection_name=self.collection_name,
+                        query=vector,
+                        limit=top_k,
+                    )
                 results = response.points
                 break
             except Exception as e:
@@ -183,44 +336,70 @@ class DocumentRetriever:
                     logger.error("qdrant_query_failed", error=str(e))
                     raise
                 logger.warning("qdrant_query_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
                 time.sleep(1.0)
 
-        return [
-            RetrievedDocument(
-                section=r.payload.get("section_number"),
-                title=r.payload.get("title"),
-                text=r.payload.get("text"),
-                score=r.score,
-            )
-            for r in results
-        ]
+        return self._scored_hits(results)
+
+    async def _aqdrant_search(self, vector: List[float], top_k: int) -> Hits:
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("qdrant", "query"):
+                    response = await self.aclient.query_points(
+                        collection_name=self.collection_name,
+                        query=vector,
+                        limit=top_k,
+                    )
+                results = response.points
+                break
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("qdrant_query_failed", error=str(e))
+                    raise
+                logger.warning("qdrant_query_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
+                await asyncio.sleep(1.0)
+
+        return self._scored_hits(results)
+
+    def _scored_hits(self, points) -> Hits:
+        """Qdrant points as store ids; points whose section is not in the corpus are dropped."""
+        ids: List[int] = []
+        scores: List[float] = []
+        for point in points:
+            sid = self.store.id_of(point.payload.get("section_number"))
+            if sid is None:
+                logger.warning("qdrant_section_not_in_corpus", section=point.payload.get("section_number"))
+                continue
+            ids.append(sid)
+            scores.append(min(max(point.score, 0.0), 1.0))
+        return ids, scores
 
     # --------------------------------------------------
     # Sparse BM25 Search
     # --------------------------------------------------
     def bm25_search(self, query: str, top_k: int) -> List[RetrievedDocument]:
+        return self._documents(self._bm25_hits(query, top_k))
+
+    def _bm25_hits(self, query: str, top_k: int) -> Hits:
         tokens = self._tokenize_text(query)
-        scores = self.bm25.get_scores(tokens)
 
-        # Zip documents with scores and sort
-        doc_scores = list(zip(self.ipc_docs, scores))
-        doc_scores.sort(key=lambda x: x[1], reverse=True)
+        # Score only the postings of the query terms and select top-k without a full sort
+        doc_ids, scores = self.bm25.top_k(tokens, top_k)
+        return self._normalized_bm25_hits(doc_ids, scores)
 
-        # Normalize scores to fit in [0, 1] range as required by RetrievedDocument validator
-        max_score = max(scores) if len(scores) > 0 else 0.0
+    @staticmethod
+    def _normalized_bm25_hits(doc_ids: np.ndarray, scores: np.ndarray) -> Hits:
+        # BM25 doc ids are store ids (both are corpus order). Normalize scores
+        # to [0, 1] as required by the RetrievedDocument validator
+        max_score = float(scores[0]) if len(scores) > 0 else 0.0
         denominator = max_score if max_score > 0.0 else 1.0
+        return doc_ids.tolist(), [score / denominator for score in scores.tolist()]
 
-        results = []
-        for doc, score in doc_scores[:top_k]:
-            results.append(
-                RetrievedDocument(
-                    section=str(doc["section_number"]),
-                    title=doc.get("title"),
-                    text=doc.get("text"),
-                    score=float(score) / denominator,
-                )
-            )
-        return results
+    def _documents(self, hits: Hits) -> List[RetrievedDocument]:
+        ids, scores = hits
+        return self.store.documents(ids, scores)
 
     # --------------------------------------------------
     # Reciprocal Rank Fusion (RRF)
@@ -263,40 +442,359 @@ class DocumentRetriever:
             )
         return fused_results
 
+    @staticmethod
+    def _fuse_hits(dense: Hits, sparse: Hits, k: int, top_k: int) -> Hits:
+        """reciprocal_rank_fusion over store ids; only the fused top_k is materialized."""
+        rrf_scores: Dict[int, float] = {}
+        for ids in (dense[0], sparse[0]):
+            for rank, sid in enumerate(ids, 1):
+                rrf_scores[sid] = rrf_scores.get(sid, 0.0) + 1.0 / (k + rank)
+
+        # Stable sort: ties keep first-seen order, as in reciprocal_rank_fusion
+        fused = sorted(rrf_scores, key=rrf_scores.__getitem__, reverse=True)[:top_k]
+        return fused, [rrf_scores[sid] for sid in fused]
+
     # --------------------------------------------------
     # Hybrid retrieval (PRODUCTION LOGIC)
     # --------------------------------------------------
     def hybrid_search(self, query: str) -> List[RetrievedDocument]:
+        docs, _ = self.hybrid_search_with_trace(query)
+        return docs
+
+    def hybrid_search_with_trace(self, query: str) -> Tuple[List[RetrievedDocument], Dict[str, Any]]:
+        """
+        Same as hybrid_search, but also returns retrieval metadata:
+        route ("section" | "hybrid"), per-branch status/latency and whether
+        the result was degraded (a branch missed its deadline or failed).
+        """
         sections = self.detect_sections(query)
 
         # Exact section lookup logic remains preserved
         if sections:
             logger.info("section_detected", sections=sections)
-            docs: List[RetrievedDocument] = []
-            for sec in sections:
-                docs.extend(self.search_by_section(sec))
+            docs = self.search_by_sections(sections)
             if docs:
-                return docs
+                return docs, {"route": "section", "degraded": False}
 
         # Static query expansion (deterministic, no API calls)
-        expanded_query = expand_query(query)
+        with stage("query_expansion"):
+            expanded_query = expand_query(query)
 
         logger.info("running_rrf_hybrid_search")
 
-        # Parallel dense and sparse BM25 retrieval using expanded query
-        dense_docs = self.semantic_search(expanded_query, top_k=settings.DENSE_CANDIDATES)
-        bm25_docs = self.bm25_search(expanded_query, top_k=settings.BM25_CANDIDATES)
+        # Dense and sparse retrieval run concurrently: the dense branch
+        # (embedding + vector search) on the pool with its own deadline, BM25
+        # (in-process, milliseconds) on the calling thread meanwhile.
+        started = time.perf_counter()
+        dense_future = self._dense_pool.submit(
+            self._semantic_hits, expanded_query, settings.DENSE_CANDIDATES
+        )
+        bm25_hits, sparse_status, sparse_ms = self._run_sparse_branch(expanded_query, started)
+
+        dense_hits: Hits = ([], [])
+        dense_status = "ok"
+        remaining = settings.DENSE_TIMEOUT_SECONDS - (time.perf_counter() - started)
+        try:
+            dense_hits = dense_future.result(timeout=max(remaining, 0.0))
+        except FutureTimeoutError:
+            # Still-running calls finish in the background (their embedding
+            # still lands in the cache); queued ones are dropped.
+            dense_future.cancel()
+            dense_status = "timeout"
+        except Exception as e:
+            dense_status = "error"
+            logger.error("dense_branch_failed", error=str(e))
+        dense_ms = int((time.perf_counter() - started) * 1000)
+
+        return self._fuse_branches(
+            dense_hits, dense_status, dense_ms, bm25_hits, sparse_status, sparse_ms
+        )
+
+    async def ahybrid_search(self, query: str) -> List[RetrievedDocument]:
+        docs, _ = await self.ahybrid_search_with_trace(query)
+        return docs
+
+    async def ahybrid_search_with_trace(self, query: str) -> Tuple[List[RetrievedDocument], Dict[str, Any]]:
+        """Async hybrid_search_with_trace: same routing, deadline and metadata."""
+        sections = self.detect_sections(query)
+
+        if sections:
+            logger.info("section_detected", sections=sections)
+            docs = await self.asearch_by_sections(sections)
+            if docs:
+                return docs, {"route": "section", "degraded": False}
+
+        with stage("query_expansion"):
+            expanded_query = expand_query(query)
+
+        logger.info("running_rrf_hybrid_search")
+
+        started = time.perf_counter()
+        dense_task = asyncio.create_task(
+            self._asemantic_hits(expanded_query, settings.DENSE_CANDIDATES)
+        )
+        # BM25 is scored in a thread so the loop can carry the dense branch
+        # (cache lookup, embedding, Qdrant) to its remote call meanwhile
+        bm25_hits, sparse_status, sparse_ms = await asyncio.to_thread(
+            self._run_sparse_branch, expanded_query, started
+        )
+
+        dense_hits: Hits = ([], [])
+        dense_status = "ok"
+        remaining = settings.DENSE_TIMEOUT_SECONDS - (time.perf_counter() - started)
+        done, _ = await asyncio.wait({dense_task}, timeout=max(remaining, 0.0))
+        if not done:
+            # Not cancelled: let the embedding finish and land in the cache
+            self._background_tasks.add(dense_task)
+            dense_task.add_done_callback(self._discard_background_task)
+            dense_status = "timeout"
+        elif dense_task.exception() is not None:
+            dense_status = "error"
+            logger.error("dense_branch_failed", error=str(dense_task.exception()))
+        else:
+            dense_hits = dense_task.result()
+        dense_ms = int((time.perf_counter() - started) * 1000)
+
+        return self._fuse_branches(
+            dense_hits, dense_status, dense_ms, bm25_hits, sparse_status, sparse_ms
+        )
+
+    def _discard_background_task(self, task: "asyncio.Task") -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("abandoned_dense_branch_failed", error=str(task.exception()))
+
+    def _run_sparse_branch(
+        self, expanded_query: str, started: float
+    ) -> Tuple[Hits, str, int]:
+        try:
+            with stage("bm25"):
+                hits = self._bm25_hits(expanded_query, top_k=settings.BM25_CANDIDATES)
+            status = "ok"
+        except Exception as e:
+            hits, status = ([], []), "error"
+            logger.error("bm25_branch_failed", error=str(e))
+        return hits, status, int((time.perf_counter() - started) * 1000)
+
+    def _fuse_branches(
+        self,
+        dense_hits: Hits,
+        dense_status: str,
+        dense_ms: int,
+        bm25_hits: Hits,
+        sparse_status: str,
+        sparse_ms: int,
+    ) -> Tuple[List[RetrievedDocument], Dict[str, Any]]:
+        if dense_status != "ok" and sparse_status != "ok":
+            raise RetrievalError("Both dense and sparse retrieval failed")
+
+        trace = {
+            "route": "hybrid",
+            "degraded": dense_status != "ok" or sparse_status != "ok",
+            "dense": dense_status,
+            "sparse": sparse_status,
+            "dense_ms": dense_ms,
+            "sparse_ms": sparse_ms,
+        }
+        if trace["degraded"]:
+            logger.warning("hybrid_search_degraded", **trace)
+
+        # Merge results using RRF (a failed branch contributes no hits)
+        with stage("rrf"):
+            fused = self._fuse_hits(dense_hits, bm25_hits, k=settings.RRF_K, top_k=settings.DEFAULT_TOP_K)
+            fused_docs = self._documents(fused)
+
+        return fused_docs, trace
+
+    # --------------------------------------------------
+    # Batched retrieval (/api/query/batch, internal tools)
+    # --------------------------------------------------
+    def semantic_search_batch(self, queries: List[str], top_k: int) -> List[List[RetrievedDocument]]:
+        return [self._documents(hits) for hits in self._semantic_hits_batch(queries, top_k)]
+
+    def _semantic_hits_batch(self, queries: List[str], top_k: int) -> List[Hits]:
+        provider = get_embedding_provider()
+        with stage("dense"):
+            with stage("embed"):
+                vectors = get_embedding_cache().get_or_compute_many(queries, provider.embed_queries)
+
+            if self.dense_index is not None:
+                return [
+                    self._local_dense_hits(rows, scores)
+                    for rows, scores in self.dense_index.search_batch(vectors, top_k)
+                ]
+            return self._qdrant_search_batch(vectors, top_k)
+
+    async def _asemantic_hits_batch(self, queries: List[str], top_k: int) -> List[Hits]:
+        provider = get_embedding_provider()
+        with stage("dense"):
+            with stage("embed"):
+                vectors = await get_embedding_cache().aget_or_compute_many(queries, provider.aembed_queries)
+
+            if self.dense_index is not None:
+                return [
+                    self._local_dense_hits(rows, scores)
+                    for rows, scores in self.dense_index.search_batch(vectors, top_k)
+                ]
+            return await self._aqdrant_search_batch(vectors, top_k)
+
+    def _batch_requests(self, vectors: List[List[float]], top_k: int) -> List["QueryRequest"]:
+        from qdrant_client.models import QueryRequest
+
+        return [QueryRequest(query=vector, limit=top_k, with_payload=True) for vector in vectors]
+
+    def _qdrant_search_batch(self, vectors: List[List[float]], top_k: int) -> List[Hits]:
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("qdrant", "query_batch"):
+                    responses = self.client.query_batch_points(
+                        collection_name=self.collection_name,
+                        requests=self._batch_requests(vectors, top_k),
+                    )
+                break
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("qdrant_batch_query_failed", error=str(e), batch=len(vectors))
+                    raise
+                logger.warning("qdrant_batch_query_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
+                time.sleep(1.0)
+
+        return [self._scored_hits(response.points) for response in responses]
 
-        # Merge results using RRF
-        fused_docs = self.reciprocal_rank_fusion(
-            dense_results=dense_docs,
-            sparse_results=bm25_docs,
-            k=settings.RRF_K,
-            top_k=settings.DEFAULT_TOP_K,
+    async def _aqdrant_search_batch(self, vectors: List[List[float]], top_k: int) -> List[Hits]:
+        max_attempts = 3
+        for attempt in range(max_attempts):
+            try:
+                with dependency("qdrant", "query_batch"):
+                    responses = await self.aclient.query_batch_points(
+                        collection_name=self.collection_name,
+                        requests=self._batch_requests(vectors, top_k),
+                    )
+                break
+            except Exception as e:
+                if attempt == max_attempts - 1:
+                    logger.error("qdrant_batch_query_failed", error=str(e), batch=len(vectors))
+                    raise
+                logger.warning("qdrant_batch_query_retry", attempt=attempt+1, error=str(e))
+                count_retry("qdrant")
+                await asyncio.sleep(1.0)
+
+        return [self._scored_hits(response.points) for response in responses]
+
+    def bm25_search_batch(self, queries: List[str], top_k: int) -> List[List[RetrievedDocument]]:
+        """bm25_search for every query in one scoring pass over the shared postings."""
+        return [self._documents(hits) for hits in self._bm25_hits_batch(queries, top_k)]
+
+    def _bm25_hits_batch(self, queries: List[str], top_k: int) -> List[Hits]:
+        batch = self.bm25.top_k_batch([self._tokenize_text(q) for q in queries], top_k)
+        return [self._normalized_bm25_hits(doc_ids, scores) for doc_ids, scores in batch]
+
+    def hybrid_search_batch(
+        self, queries: List[str]
+    ) -> List[Tuple[List[RetrievedDocument], Dict[str, Any]]]:
+        """
+        hybrid_search_with_trace for many queries, in input order.
+
+        Section queries are served from the in-memory corpus one by one; the
+        rest share one embedding call per EMBEDDING_BATCH_SIZE queries, one
+        Qdrant query_batch_points call (or one matrix product locally) and
+        one BM25 scoring pass. There is no dense deadline: a batch trades
+        latency for throughput, and a failed dense call degrades the whole
+        batch to BM25.
+        """
+        results: List[Optional[Tuple[List[RetrievedDocument], Dict[str, Any]]]] = [None] * len(queries)
+        pending: List[int] = []
+        for i, query in enumerate(queries):
+            sections = self.detect_sections(query)
+            if sections:
+                docs = self.search_by_sections(sections)
+                if docs:
+                    results[i] = (docs, {"route": "section", "degraded": False})
+                    continue
+            pending.append(i)
+
+        if not pending:
+            return results
+
+        with stage("query_expansion"):
+            expanded = [expand_query(queries[i]) for i in pending]
+        logger.info("running_rrf_hybrid_search_batch", batch=len(expanded), sections=len(queries) - len(pending))
+
+        started = time.perf_counter()
+        dense_future = self._dense_pool.submit(
+            self._semantic_hits_batch, expanded, settings.DENSE_CANDIDATES
         )
+        bm25_batch, sparse_status, sparse_ms = self._run_sparse_batch(expanded, started)
+
+        try:
+            dense_batch, dense_status = dense_future.result(), "ok"
+        except Exception as e:
+            dense_batch, dense_status = [([], []) for _ in expanded], "error"
+            logger.error("dense_branch_failed", error=str(e), batch=len(expanded))
+        dense_ms = int((time.perf_counter() - started) * 1000)
+
+        for i, dense_hits, bm25_hits in zip(pending, dense_batch, bm25_batch):
+            results[i] = self._fuse_branches(
+                dense_hits, dense_status, dense_ms, bm25_hits, sparse_status, sparse_ms
+            )
+        return results
 
-        return fused_docs
+    async def ahybrid_search_batch(
+        self, queries: List[str]
+    ) -> List[Tuple[List[RetrievedDocument], Dict[str, Any]]]:
+        """Async hybrid_search_batch; the BM25 pass runs in a worker thread."""
+        results: List[Optional[Tuple[List[RetrievedDocument], Dict[str, Any]]]] = [None] * len(queries)
+        pending: List[int] = []
+        for i, query in enumerate(queries):
+            sections = self.detect_sections(query)
+            if sections:
+                docs = await self.asearch_by_sections(sections)
+                if docs:
+                    results[i] = (docs, {"route": "section", "degraded": False})
+                    continue
+            pending.append(i)
+
+        if not pending:
+            return results
+
+        with stage("query_expansion"):
+            expanded = [expand_query(queries[i]) for i in pending]
+        logger.info("running_rrf_hybrid_search_batch", batch=len(expanded), sections=len(queries) - len(pending))
+
+        started = time.perf_counter()
+        dense_task = asyncio.create_task(
+            self._asemantic_hits_batch(expanded, settings.DENSE_CANDIDATES)
+        )
+        bm25_batch, sparse_status, sparse_ms = await asyncio.to_thread(
+            self._run_sparse_batch, expanded, started
+        )
+
+        try:
+            dense_batch, dense_status = await dense_task, "ok"
+        except Exception as e:
+            dense_batch, dense_status = [([], []) for _ in expanded], "error"
+            logger.error("dense_branch_failed", error=str(e), batch=len(expanded))
+        dense_ms = int((time.perf_counter() - started) * 1000)
+
+        for i, dense_hits, bm25_hits in zip(pending, dense_batch, bm25_batch):
+            results[i] = self._fuse_branches(
+                dense_hits, dense_status, dense_ms, bm25_hits, sparse_status, sparse_ms
+            )
+        return results
 
+    def _run_sparse_batch(
+        self, expanded_queries: List[str], started: float
+    ) -> Tuple[List[Hits], str, int]:
+        try:
+            with stage("bm25"):
+                batch = self._bm25_hits_batch(expanded_queries, top_k=settings.BM25_CANDIDATES)
+            status = "ok"
+        except Exception as e:
+            batch, status = [([], []) for _ in expanded_queries], "error"
+            logger.error("bm25_branch_failed", error=str(e), batch=len(expanded_queries))
+        return batch, status, int((time.perf_counter() - started) * 1000)
 
 @lru_cache
 def get_retriever() -> DocumentRetriever:
@@ -0,0 +1,195 @@
+"""
+Array-backed, read-only store of the IPC sections.
+
+Pipeline position:
+    data/ipc_clean.json ──► [SectionStore] ◄── BM25 doc ids, dense index rows,
+        (parsed once)           │               section lookup, context expander,
+                                │               context packer (all by integer id)
+                                ▼
+                    RetrievedDocument, built only for the results returned
+
+Layout:
+    sections   List[str]             section number of each id (id = corpus order)
+    _ids       Dict[str, int]        section number, and its upper-case form, -> id
+    _buffer    bytes                 every string field of every section, UTF-8,
+                                     back to back
+    _records   NumPy structured      per id: [start, end) byte offsets of title,
+               array                 text, explanations and illustrations, plus
+                                     chapter / source indexes and the repealed flag
+    _chapters  List[Tuple]           distinct (chapter, chapter_title) pairs
+    _sources   List[str]             distinct source strings
+
+Design decisions:
+- One bytes buffer and one structured array replace ~550 dicts and the
+  several thousand str / list / bool objects they hold: a handful of heap
+  objects, nothing for the garbage collector to walk, and pages that stay
+  shared across pre-forked workers (app/prefork.py).
+- Ids are corpus order, so a BM25 doc id is a store id and dense-index rows
+  map to ids once. Retrieval ranks and fuses ids; strings are decoded only
+  when a RetrievedDocument is materialized for the final results.
+- Explanation and illustration lists are stored joined by a unit separator
+  (the corpus never contains one) and split on access; nothing on the query
+  path reads them, but as_dict() still returns the full section.
+- Field reads go through per-field views of the record array created once
+  (views, not copies) and plain-int .item() offsets: a decode costs about a
+  microsecond, so materializing a result set stays on par with reading the
+  old dicts.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models import RetrievedDocument
+
+_STRING_FIELDS = ("title", "text", "explanations", "illustrations")
+_LIST_FIELDS = ("explanations", "illustrations")
+_LIST_SEPARATOR = "\x1f"
+
+_RECORD_DTYPE = np.dtype(
+    [(name, np.uint32, (2,)) for name in _STRING_FIELDS]
+    + [("chapter", np.uint16), ("source", np.uint16), ("repealed", np.bool_)]
+)
+
+
+class SectionStore:
+    """IPC sections addressed by integer id, strings decoded on demand."""
+
+    def __init__(
+        self,
+        sections: List[str],
+        buffer: bytes,
+        records: np.ndarray,
+        chapters: List[Tuple[Optional[str], Optional[str]]],
+        sources: List[str],
+    ):
+        self.sections = sections
+        self._buffer = buffer
+        self._records = records
+        self._chapters = chapters
+        self._sources = sources
+        self._columns = {name: records[name] for name in _STRING_FIELDS}
+        self._ids: Dict[str, int] = {}
+        for sid, section in enumerate(sections):
+            self._ids.setdefault(section, sid)
+            self._ids.setdefault(section.upper(), sid)
+
+    @classmethod
+    def from_docs(cls, docs: Sequence[Dict]) -> "SectionStore":
+        """Packs parsed ipc_clean.json section dicts."""
+        records = np.zeros(len(docs), dtype=_RECORD_DTYPE)
+        chunks: List[bytes] = []
+        offset = 0
+        chapter_index: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        source_index: Dict[str, int] = {}
+
+        for sid, doc in enumerate(docs):
+            for name in _STRING_FIELDS:
+                value = doc.get(name) or ""
+                if name in _LIST_FIELDS:
+                    value = _LIST_SEPARATOR.join(value)
+                encoded = value.encode("utf-8")
+                records[name][sid] = (offset, offset + len(encoded))
+                chunks.append(encoded)
+                offset += len(encoded)
+
+            chapter = (doc.get("chapter"), doc.get("chapter_title"))
+            records["chapter"][sid] = chapter_index.setdefault(chapter, len(chapter_index))
+            records["source"][sid] = source_index.setdefault(doc.get("source") or "", len(source_index))
+            records["repealed"][sid] = bool(doc.get("is_repealed"))
+
+        return cls(
+            sections=[str(doc["section_number"]) for doc in docs],
+            buffer=b"".join(chunks),
+            records=records,
+            chapters=list(chapter_index),
+            sources=list(source_index),
+        )
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    # --------------------------------------------------
+    # Ids
+    # --------------------------------------------------
+    def id_of(self, section: str) -> Optional[int]:
+        """Id of a section number ("498a" and "498A" alike); None if not in the corpus."""
+        section = str(section)
+        sid = self._ids.get(section)
+        return sid if sid is not None else self._ids.get(section.upper())
+
+    def ids_of(self, sections: Iterable[str]) -> Tuple[List[int], List[str]]:
+        """(ids of the known sections in order, section numbers not in the corpus)."""
+        ids: List[int] = []
+        missing: List[str] = []
+        for section in sections:
+            sid = self.id_of(section)
+            if sid is None:
+                missing.append(str(section))
+            else:
+                ids.append(sid)
+        return ids, missing
+
+    # --------------------------------------------------
+    # Fields (decoded on access)
+    # --------------------------------------------------
+    def _string(self, field: str, sid: int) -> str:
+        column = self._columns[field]
+        return self._buffer[column.item(sid, 0):column.item(sid, 1)].decode("utf-8")
+
+    def title(self, sid: int) -> str:
+        return self._string("title", sid)
+
+    def text(self, sid: int) -> str:
+        return self._string("text", sid)
+
+    def explanations(self, sid: int) -> List[str]:
+        value = self._string("explanations", sid)
+        return value.split(_LIST_SEPARATOR) if value else []
+
+    def illustrations(self, sid: int) -> List[str]:
+        value = self._string("illustrations", sid)
+        return value.split(_LIST_SEPARATOR) if value else []
+
+    def chapter(self, sid: int) -> Tuple[Optional[str], Optional[str]]:
+        """(chapter, chapter_title); None for the few sections outside a chapter."""
+        return self._chapters[int(self._records["chapter"][sid])]
+
+    def is_repealed(self, sid: int) -> bool:
+        return bool(self._records["repealed"][sid])
+
+    def as_dict(self, sid: int) -> Dict:
+        """The section as the ipc_clean.json dict it was packed from."""
+        chapter, chapter_title = self.chapter(sid)
+        return {
+            "section_number": self.sections[sid],
+            "title": self.title(sid),
+            "chapter": chapter,
+            "chapter_title": chapter_title,
+            "text": self.text(sid),
+            "explanations": self.explanations(sid),
+            "illustrations": self.illustrations(sid),
+            "is_repealed": self.is_repealed(sid),
+            "source": self._sources[int(self._records["source"][sid])],
+        }
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        return (self.as_dict(sid) for sid in range(len(self)))
+
+    # --------------------------------------------------
+    # Materialization
+    # --------------------------------------------------
+    def document(self, sid: int, score: float) -> RetrievedDocument:
+        return RetrievedDocument(
+            section=self.sections[sid],
+            title=self.title(sid),
+            text=self.text(sid),
+            score=score,
+        )
+
+    def documents(self, ids: Sequence[int], scores: Sequence[float]) -> List[RetrievedDocument]:
+        return [self.document(sid, score) for sid, score in zip(ids, scores)]
+
+    def nbytes(self) -> int:
+        """Bytes held by the buffer and the record array (excluding the id map)."""
+        return len(self._buffer) + self._records.nbytes
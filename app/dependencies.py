@@ -6,122 +6,285 @@ FastAPI dependencies for request handling.
 """
 
 from fastapi import Request, HTTPException
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import settings
-from app.utils import get_logger
+from app.core.rate_limiter import get_rate_limiter
+from app.utils import get_logger, timeout_for
+from app.utils.metrics import RATE_LIMITED, dependency, observe_stage
 
 logger = get_logger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
-
-def get_rate_limit_string() -> str:
-    """
-    Returns rate limit string for SlowAPI.
-    Falls back safely if env var is missing.
-    """
-    limit = getattr(settings, "RATE_LIMIT_PER_MINUTE", 30)
-    return f"{limit}/minute"
-
 
 # ============================================
 # JWT AUTHENTICATION (ES256 + JWKS)
 # ============================================
-from typing import Optional
+# Design decisions:
+# - A token that verified once is cached (keyed by its SHA-256, never the raw
+#   token) until its own exp, so repeat requests skip the ES256 verification.
+#   A cached token is only honored while its signing kid is still in the
+#   JWKS, so a key withdrawn by Supabase stops authenticating on the next
+#   refresh.
+# - JWKS keys are parsed into key objects once per fetch, refreshed by a
+#   background task started in the lifespan (conditional GET with the last
+#   ETag, next refresh after the response's Cache-Control max-age), and
+#   fetched on demand only for an unknown kid, throttled and without
+#   blocking the event loop.
+# - Every authentication is timed into auth_stats (p50/p95 per outcome,
+#   /health -> services.auth), the "auth" stage histogram / Server-Timing
+#   entry and request.state.auth_ms.
+import asyncio
+import hashlib
+import re
+import threading
 import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
 import httpx
-from jose import jwt
-from jose.exceptions import JWTError
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from app.utils import get_async_http_client
+
+if TYPE_CHECKING:
+    # jose (and its cryptography backend) is imported with the first JWKS
+    # fetch or token, not at app import
+    from jose.backends.base import Key
+
 security = HTTPBearer(auto_error=False)
 
+_JWKS_MIN_REFRESH_SECONDS = 30.0
+_JWKS_RETRY_SECONDS = 30.0
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
 class JWKSKeyManager:
     """Manages fetching, caching, and rate-limited refreshing of Supabase JWKS keys."""
-    
-    def __init__(self, supabase_url: str):
+
+    def __init__(
+        self,
+        supabase_url: str,
+        refresh_seconds: float = 600.0,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
         self.jwks_url = f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
-        self._keys = {}
+        self.refresh_seconds = refresh_seconds
+        self._http_client = http_client
+        self._keys: Dict[str, "Key"] = {}
+        self._etag: Optional[str] = None
         self._last_fetched = 0.0
+        self._next_refresh = 0.0
         self._cooldown_seconds = 30.0  # Throttle refresh to prevent JWKS endpoint flooding (DoS)
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stats = {"fetches": 0, "not_modified": 0, "errors": 0}
 
-    def _fetch_keys(self) -> None:
+    def has_key(self, kid: str) -> bool:
+        return kid in self._keys
+
+    def _refresh_delay(self, response: httpx.Response) -> float:
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        if match is None:
+            return self.refresh_seconds
+        return max(float(match.group(1)), _JWKS_MIN_REFRESH_SECONDS)
+
+    @staticmethod
+    def _parse_keys(data: dict) -> Dict[str, "Key"]:
+        from jose import jwk
+
+        new_keys = {}
+        for key in data.get("keys", []):
+            kid = key.get("kid")
+            if kid:
+                new_keys[kid] = jwk.construct(key, algorithm=key.get("alg", "ES256"))
+        return new_keys
+
+    async def _fetch_keys(self) -> None:
+        """Conditional JWKS GET; the caller holds self._lock."""
+        client = self._http_client or get_async_http_client()
+        headers = {"If-None-Match": self._etag} if self._etag and self._keys else {}
+        self._last_fetched = time.monotonic()
         try:
-            logger.info("fetching_jwks_keys", url=self.jwks_url)
-            self._last_fetched = time.time()
-            response = httpx.get(self.jwks_url, timeout=5.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            new_keys = {}
-            for key in data.get("keys", []):
-                kid = key.get("kid")
-                if kid:
-                    new_keys[kid] = key
-                    
-            self._keys = new_keys
-            logger.info("jwks_keys_fetched_successfully", count=len(new_keys), kids=list(new_keys.keys()))
+            logger.info("fetching_jwks_keys", url=self.jwks_url, conditional=bool(headers))
+            with dependency("supabase", "jwks"):
+                response = await client.get(self.jwks_url, headers=headers, timeout=timeout_for(self.jwks_url))
+
+            if response.status_code == 304:
+                self._stats["not_modified"] += 1
+                logger.info("jwks_keys_not_modified", count=len(self._keys))
+            else:
+                response.raise_for_status()
+                new_keys = self._parse_keys(response.json())
+                self._stats["fetches"] += 1
+                self._keys = new_keys
+                self._etag = response.headers.get("etag")
+                logger.info("jwks_keys_fetched_successfully", count=len(new_keys), kids=list(new_keys.keys()))
+
+            self._next_refresh = time.monotonic() + self._refresh_delay(response)
         except Exception as e:
+            self._stats["errors"] += 1
+            self._next_refresh = time.monotonic() + _JWKS_RETRY_SECONDS
             logger.error("failed_to_fetch_jwks_keys", error=str(e))
             # Don't fail completely if we have cached keys
             if not self._keys:
                 raise HTTPException(status_code=500, detail="Failed to retrieve authentication keys")
 
-    def get_key(self, kid: str) -> dict:
-        if kid not in self._keys:
-            now = time.time()
-            time_since_last_fetch = now - self._last_fetched
-            
-            if time_since_last_fetch < self._cooldown_seconds:
-                logger.warning(
-                    "jwks_refresh_throttled",
-                    time_remaining=self._cooldown_seconds - time_since_last_fetch,
-                    kid=kid
-                )
-                raise HTTPException(
-                    status_code=401,
-                    detail="Authentication keys rotated recently or invalid key ID provided"
-                )
-                
-            logger.info("jwks_cache_miss_triggering_refresh", kid=kid)
-            self._fetch_keys()
-            
+    async def refresh(self) -> None:
+        async with self._lock:
+            await self._fetch_keys()
+
+    async def get_key(self, kid: str) -> "Key":
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        async with self._lock:
+            # Another request may have fetched the new key while we waited
+            if kid not in self._keys:
+                time_since_last_fetch = time.monotonic() - self._last_fetched
+                if time_since_last_fetch < self._cooldown_seconds:
+                    logger.warning(
+                        "jwks_refresh_throttled",
+                        time_remaining=self._cooldown_seconds - time_since_last_fetch,
+                        kid=kid
+                    )
+                    raise HTTPException(
+                        status_code=401,
+                        detail="Authentication keys rotated recently or invalid key ID provided"
+                    )
+
+                logger.info("jwks_cache_miss_triggering_refresh", kid=kid)
+                await self._fetch_keys()
+
         key = self._keys.get(kid)
         if not key:
             logger.warning("jwks_key_not_found_after_refresh", kid=kid)
             raise HTTPException(status_code=401, detail="Invalid token signing key")
-            
+
         return key
 
+    # ------------------------
+    # Background refresh (lifespan)
+    # ------------------------
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(max(self._next_refresh - time.monotonic(), 0.0))
+            try:
+                await self.refresh()
+            except HTTPException:
+                # Logged in _fetch_keys; retried after _JWKS_RETRY_SECONDS
+                pass
 
-# Initialize the global JWKS manager
-jwks_manager = JWKSKeyManager(settings.SUPABASE_URL)
+    def start_background_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
 
+    async def stop_background_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
 
-async def get_current_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-) -> str:
-    """
-    Dependency to verify Supabase JWT using ES256 with dynamic JWKS keys.
-    Returns the authenticated sub (user_id UUID).
-    Enforces a strict 401 response for all authentication failures.
-    """
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        logger.warning("auth_header_missing")
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "keys": len(self._keys),
+            "etag": self._etag is not None,
+            "next_refresh_in_s": round(max(self._next_refresh - time.monotonic(), 0.0), 1),
+            "background_refresh": self._refresh_task is not None and not self._refresh_task.done(),
+        }
+
+
+class VerifiedTokenCache:
+    """LRU of verified tokens by SHA-256, each valid until the token's exp."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        # digest -> (user_id, kid, exp)
+        self._entries: "OrderedDict[bytes, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Tuple[str, str]]:
+        """(user_id, kid) if the token verified before and has not expired."""
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            user_id, kid, exp = entry
+            if time.time() >= exp:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return user_id, kid
+
+    def put(self, token: str, user_id: str, kid: str, exp: float) -> None:
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (user_id, kid, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AuthStats:
+    """Latency of get_current_user by outcome (cache_hit / verified / rejected)."""
+
+    def __init__(self, window: int = 2048):
+        self._samples: deque = deque(maxlen=window)
+        self._counts: Dict[str, int] = {"cache_hit": 0, "verified": 0, "rejected": 0}
+        self._lock = threading.Lock()
 
-    parts = auth_header.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        logger.warning("auth_header_invalid_format", header=auth_header)
-        raise HTTPException(status_code=401, detail="Not authenticated")
+    def record(self, outcome: str, ms: float) -> None:
+        with self._lock:
+            self._samples.append((outcome, ms))
+            self._counts[outcome] += 1
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, float]:
+        if not values:
+            return {"p50_ms": 0.0, "p95_ms": 0.0}
+        values = sorted(values)
+        return {
+            "p50_ms": round(values[len(values) // 2], 3),
+            "p95_ms": round(values[min(int(len(values) * 0.95), len(values) - 1)], 3),
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            samples = list(self._samples)
+            counts = dict(self._counts)
+        return {
+            "counts": counts,
+            "recent": self._percentiles([ms for _, ms in samples]),
+            "by_outcome": {
+                outcome: self._percentiles([ms for o, ms in samples if o == outcome])
+                for outcome in counts
+            },
+        }
+
+
+# Initialize the global JWKS manager, verified-token cache and auth timings
+jwks_manager = JWKSKeyManager(settings.SUPABASE_URL, refresh_seconds=settings.JWKS_REFRESH_SECONDS)
+token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+auth_stats = AuthStats()
+
+
+async def _verify_token(token: str) -> Tuple[str, str]:
+    """(user_id, outcome) for a bearer token; raises a 401 HTTPException if it is invalid."""
+    from jose import jwt
+    from jose.exceptions import JWTError
 
-    token = parts[1]
     try:
         # 1. Parse header without verification to extract kid
         header = jwt.get_unverified_header(token)
@@ -129,26 +292,33 @@ async def get_current_user(
         if not kid:
             logger.warning("jwt_header_missing_kid")
             raise HTTPException(status_code=401, detail="Invalid token: missing kid in header")
-            
-        # 2. Get verification public key matching kid
-        key = jwks_manager.get_key(kid)
-        
-        # 3. Verify signature and claims
+
+        # 2. Already verified, unexpired and its key still published?
+        cached = token_cache.get(token)
+        if cached is not None and cached[1] == kid and jwks_manager.has_key(kid):
+            return cached[0], "cache_hit"
+
+        # 3. Get verification public key matching kid
+        key = await jwks_manager.get_key(kid)
+
+        # 4. Verify signature and claims
         payload = jwt.decode(
             token,
             key,
             algorithms=["ES256"],
             audience="authenticated",
         )
-        
-        # 4. Extract and validate user identifier (sub)
+
+        # 5. Extract and validate user identifier (sub)
         user_id: str = payload.get("sub")
         if not user_id:
             logger.warning("jwt_payload_missing_sub")
             raise HTTPException(status_code=401, detail="Invalid token: sub claim is missing")
-            
-        return user_id
-        
+
+        if payload.get("exp") is not None:
+            token_cache.put(token, user_id, kid, float(payload["exp"]))
+        return user_id, "verified"
+
     except JWTError as e:
         logger.warning("jwt_signature_verification_failed", error=str(e))
         raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
@@ -157,4 +327,69 @@ async def get_current_user(
         raise
     except Exception as e:
         logger.error("jwt_unexpected_error", error=str(e))
-        raise HTTPException(status_code=401, detail="Authentication failed")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Authentication failed")
+
+
+async def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+) -> str:
+    """
+    Dependency to verify Supabase JWT using ES256 with dynamic JWKS keys.
+    Returns the authenticated sub (user_id UUID).
+    Enforces a strict 401 response for all authentication failures.
+    """
+    started = time.perf_counter()
+    outcome = "rejected"
+    try:
+        auth_header = request.headers.get("Authorization")
+        if not auth_header:
+            logger.warning("auth_header_missing")
+            raise HTTPException(status_code=401, detail="Not authenticated")
+
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            logger.warning("auth_header_invalid_format", header=auth_header)
+            raise HTTPException(status_code=401, detail="Not authenticated")
+
+        user_id, outcome = await _verify_token(parts[1])
+        return user_id
+
+    finally:
+        elapsed = time.perf_counter() - started
+        auth_ms = elapsed * 1000
+        request.state.auth_ms = auth_ms
+        auth_stats.record(outcome, auth_ms)
+        observe_stage("auth", elapsed)
+
+
+# ============================================
+# RATE LIMITING (per user, Redis GCRA; see app/core/rate_limiter.py)
+# ============================================
+async def enforce_rate_limit(request: Request, user_id: str, cost: int = 1) -> None:
+    """
+    Spends cost requests (the number of questions for a batch) of the
+    user's budget. Raises 429 with Retry-After when a budget is spent; the
+    RateLimit-* headers are left on request.state for the response middleware.
+    """
+    decision = await get_rate_limiter().check(user_id, cost=cost)
+    if decision is None:
+        return
+
+    request.state.rate_limit_headers = decision.headers()
+    if not decision.allowed:
+        RATE_LIMITED.labels(budget=decision.limited_by).inc()
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded ({decision.limited_by}), retry in {decision.retry_after}s",
+            headers=decision.headers(),
+        )
+
+
+async def rate_limited_user(
+    request: Request,
+    user_id: str = Depends(get_current_user),
+) -> str:
+    """get_current_user plus one request of the per-user request / LLM-token budget."""
+    await enforce_rate_limit(request, user_id)
+    return user_id
\ No newline at end of file
@@ -3,17 +3,18 @@ Main FastAPI application for Legal AI Assistant.
 Production-safe startup using lifespan.
 """
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-
 from app.config import settings
-from app.utils import setup_logging, get_logger, LegalAIException
-from app.dependencies import limiter
+from app.utils import setup_logging, get_logger, close_http_clients, start_request_timing, LegalAIException
+from app.utils.metrics import observe_request
+from app.dependencies import jwks_manager
+from app.warmup import get_warmup_state
 from app.api import health, chat
 from app.models import ErrorResponse
 
@@ -25,31 +26,48 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("startup_begin", environment=settings.ENVIRONMENT)
 
+    # -------------------------------
+    # Local retrieval state (corpus, BM25, dense index; already built in
+    # the master when gunicorn preloads), loaded in a thread while the
+    # Redis ping waits on the network
+    # -------------------------------
+    from app.core.retriever import get_retriever
+    retriever_loading = asyncio.ensure_future(asyncio.to_thread(get_retriever))
+
     # -------------------------------
     # Redis / Upstash (HARD requirement)
     # -------------------------------
     try:
-        from app.core.chat_history import get_history_manager
-        get_history_manager()
+        from app.core.chat_history import get_async_history_manager
+        await get_async_history_manager().ping()
         logger.info("redis_connection_ok")
     except Exception as e:
         logger.critical("redis_unavailable_at_startup", error=str(e))
         raise
 
+    await retriever_loading
+
     # -------------------------------
-    # Qdrant (SOFT dependency)
+    # Qdrant, embeddings, JWKS, Groq, caches (SOFT dependencies): warmed
+    # in the background while serving; /ready is 503 until done
     # -------------------------------
-    try:
-        from app.core.retriever import get_retriever
-        retriever = get_retriever()
-        retriever.client.get_collections()
-        logger.info("qdrant_connection_ok")
-    except Exception as e:
-        logger.warning("qdrant_unavailable_at_startup", error=str(e))
+    get_warmup_state().start()
 
     yield
 
     logger.info("shutdown_begin")
+    await get_warmup_state().stop()
+    await jwks_manager.stop_background_refresh()
+    from app.core.answer_cache import close_answer_cache
+    from app.core.chat_history import close_async_history_manager
+    from app.core.popular_queries import close_popular_queries
+    from app.core.rate_limiter import close_rate_limiter
+    await get_retriever().aclose()
+    await close_answer_cache()
+    await close_popular_queries()
+    await close_rate_limiter()
+    await close_async_history_manager()
+    await close_http_clients()
 
 
 app = FastAPI(
@@ -62,10 +80,34 @@ app = FastAPI(
 )
 
 # -------------------------------
-# Rate limiting
+# Request timing (Server-Timing, /metrics) and rate-limit headers
+# (limits are enforced per user by the rate_limited_user dependency)
 # -------------------------------
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    timings = start_request_timing()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        # Labelled by route template, never the raw path (bounded series)
+        route = request.scope.get("route")
+        observe_request(
+            getattr(route, "path", "unmatched"),
+            request.method,
+            status,
+            time.perf_counter() - started,
+        )
+
+    # Streamed bodies are still being generated here: their timings stop
+    # at the response headers
+    response.headers["Server-Timing"] = timings.header(time.perf_counter() - started)
+    headers = getattr(request.state, "rate_limit_headers", None)
+    if headers:
+        response.headers.update(headers)
+    return response
 
 # -------------------------------
 # CORS (explicit origins)
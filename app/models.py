@@ -8,6 +8,8 @@ Pydantic models for request/response validation.
 from typing import List, Optional
 from pydantic import BaseModel, Field, validator
 
+from app.config import settings
+
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint (multi-user, auth-ready)."""
@@ -33,6 +35,11 @@ class ChatRequest(BaseModel):
         description="Optional session ID for conversation history"
     )
 
+    force_live: bool = Field(
+        default=False,
+        description="Skip canonical and cached answers and generate with the LLM"
+    )
+
     @validator("query")
     def validate_query(cls, v: str) -> str:
         """Ensure query is not just whitespace."""
@@ -49,6 +56,34 @@ class ChatRequest(BaseModel):
 
 
 
+class BatchQueryRequest(BaseModel):
+    """Request model for the batch query endpoint (stateless, no sessions)."""
+
+    queries: List[str] = Field(
+        ...,
+        min_items=1,
+        description="Standalone legal questions, answered independently",
+        example=["What is Section 302 of IPC?", "Punishment for theft"]
+    )
+
+    force_live: bool = Field(
+        default=False,
+        description="Skip canonical and cached answers and generate with the LLM"
+    )
+
+    @validator("queries")
+    def validate_queries(cls, v: List[str]) -> List[str]:
+        """Strip queries; reject empty ones, overlong ones and oversized batches."""
+        if len(v) > settings.BATCH_MAX_QUERIES:
+            raise ValueError(f"At most {settings.BATCH_MAX_QUERIES} queries per batch")
+        queries = [q.strip() for q in v]
+        if any(not q for q in queries):
+            raise ValueError("Queries cannot be empty or whitespace")
+        if any(len(q) > 1000 for q in queries):
+            raise ValueError("Each query must be at most 1000 characters")
+        return queries
+
+
 class RetrievedDocument(BaseModel):
     """Model for a retrieved document."""
     
@@ -68,6 +103,10 @@ class ChatResponse(BaseModel):
     )
     session_id: str = Field(..., description="Session ID for this conversation")
     query: str = Field(..., description="Original user query")
+    metadata: dict = Field(
+        default={},
+        description="Pipeline metadata (e.g. retrieval route, degraded branches)"
+    )
 
 
 class HealthResponse(BaseModel):
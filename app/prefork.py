@@ -0,0 +1,70 @@
+"""
+Pre-fork serving: read-only retrieval state loaded once in the master,
+clients created in each worker.
+
+Pipeline position:
+    gunicorn master (gunicorn.conf.py, preload_app)
+        │  import app.main
+        │  when_ready → preload_shared_state()
+        │      section store, BM25 CSR arrays, dense vectors, context expander and
+        │      packer tables; then gc.freeze()
+        ▼  fork × WEB_CONCURRENCY
+    worker ── post_fork → reset_process_state()
+           ── lifespan  → Redis / Qdrant / Groq / httpx clients, created
+                          lazily in this process
+
+Design decisions:
+- Only read-only state is built before the fork. Sockets, thread pools and
+  event-loop-bound objects do not survive a fork, so everything holding
+  them (Redis, Qdrant, Groq and httpx clients, the dense-branch executor)
+  is created in the worker. reset_process_state() drops any that the
+  master did create, without closing them (the sockets are the parent's).
+- The large structures are flat buffers and NumPy arrays (the section
+  store, BM25 CSR postings, dense vectors): they carry no per-object
+  refcounts, so workers reading them never write to, and never copy, those
+  pages.
+- gc.freeze() moves every object allocated during preload into the
+  permanent generation: the workers' collector never walks them, so a
+  collection does not dirty (and copy) the pages they live on.
+- Nothing here runs under plain `uvicorn app.main:app`; the singletons
+  load lazily as before.
+"""
+
+import gc
+import time
+
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def preload_shared_state() -> None:
+    """Builds the read-only retrieval state in the master, then freezes it."""
+    from app.core.context_expander import get_context_expander
+    from app.core.context_packer import get_context_packer
+    from app.core.retriever import get_retriever
+
+    t0 = time.perf_counter()
+    retriever = get_retriever()
+    get_context_expander()
+    get_context_packer()
+
+    gc.collect()
+    gc.freeze()
+    logger.info(
+        "prefork_state_loaded",
+        sections=len(retriever.store),
+        dense_index=retriever.dense_index is not None,
+        frozen_objects=gc.get_freeze_count(),
+        elapsed_ms=int((time.perf_counter() - t0) * 1000),
+    )
+
+
+def reset_process_state() -> None:
+    """Runs first in every forked worker: forget per-process resources."""
+    from app.core.retriever import get_retriever
+    from app.utils.http_client import reset_http_clients
+
+    if get_retriever.cache_info().currsize:
+        get_retriever().reset_after_fork()
+    reset_http_clients()
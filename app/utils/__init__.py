@@ -1,6 +1,20 @@
 """Utility modules for the application."""
 
 from app.utils.logger import setup_logging, get_logger
+from app.utils.http_client import (
+    get_http_client,
+    get_async_http_client,
+    close_http_clients,
+    timeout_for,
+)
+from app.utils.metrics import (
+    stage,
+    dependency,
+    observe_stage,
+    count_retry,
+    start_request_timing,
+    metrics_response,
+)
 from app.utils.exceptions import (
     LegalAIException,
     RetrievalError,
@@ -13,6 +27,16 @@ from app.utils.exceptions import (
 __all__ = [
     "setup_logging",
     "get_logger",
+    "get_http_client",
+    "get_async_http_client",
+    "close_http_clients",
+    "timeout_for",
+    "stage",
+    "dependency",
+    "observe_stage",
+    "count_retry",
+    "start_request_timing",
+    "metrics_response",
     "LegalAIException",
     "RetrievalError",
     "LLMError",
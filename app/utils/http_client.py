@@ -0,0 +1,95 @@
+"""
+Shared, pooled HTTP clients for outbound calls (HF embeddings, Supabase JWKS).
+
+One sync and one async httpx client per process, created lazily and closed
+in the FastAPI lifespan. Connections are kept alive and negotiated over
+HTTP/2 where the server supports it, so repeat calls skip DNS + TLS.
+
+Timeouts are per host: pass timeout=timeout_for(url) on each request.
+"""
+
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _host_timeouts() -> Dict[str, httpx.Timeout]:
+    return {
+        # HF can hold the request while a cold model loads (wait_for_model)
+        "router.huggingface.co": httpx.Timeout(30.0, connect=5.0),
+        urlparse(settings.SUPABASE_URL).hostname or "": httpx.Timeout(5.0, connect=3.0),
+    }
+
+
+def timeout_for(url: str) -> httpx.Timeout:
+    """Timeout policy for the host of url."""
+    return _host_timeouts().get(urlparse(url).hostname or "", _DEFAULT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _http2_enabled() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled sync client."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        http2 = _http2_enabled()
+        _sync_client = httpx.Client(http2=http2, limits=_limits(), timeout=_DEFAULT_TIMEOUT)
+        logger.info("http_client_created", flavor="sync", http2=http2)
+    return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Process-wide pooled async client."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        http2 = _http2_enabled()
+        _async_client = httpx.AsyncClient(http2=http2, limits=_limits(), timeout=_DEFAULT_TIMEOUT)
+        logger.info("http_client_created", flavor="async", http2=http2)
+    return _async_client
+
+
+def reset_http_clients() -> None:
+    """
+    Forgets clients inherited across a fork without closing them: their
+    sockets belong to the parent. The next get_* call builds fresh ones.
+    """
+    global _sync_client, _async_client
+    _sync_client = None
+    _async_client = None
+
+
+async def close_http_clients() -> None:
+    """Closes both pooled clients (called on lifespan shutdown)."""
+    global _sync_client, _async_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    logger.info("http_clients_closed")
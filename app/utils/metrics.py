@@ -0,0 +1,166 @@
+"""
+Prometheus metrics and per-request stage timings (Server-Timing).
+
+Pipeline position:
+    HTTP middleware (app.main)
+        │  start_request_timing(): fresh ServerTimings for this request
+        ▼
+    endpoint ── stage("retrieve"), dependency("qdrant", "query"), ...
+        │        each span observes a histogram and adds its duration to
+        │        the request's timings
+        ▼
+    response ── Server-Timing: session;dur=2.1, retrieve;dur=38.4, ..., total;dur=912.0
+    GET /metrics ── Prometheus text exposition
+
+Design decisions:
+- Spans are plain context managers, so one `with` line instruments a call
+  on the sync and the async path alike (timing spans the awaits inside).
+- The request's timings live in a ContextVar: tasks created while handling
+  the request (the dense branch) inherit it and nothing is threaded through
+  call signatures. Executor threads do not inherit it; their spans still
+  reach the histograms, just not the header.
+- A span entered several times in one request (two Redis calls, a retried
+  Qdrant query) adds up into one Server-Timing entry.
+- Label values come from code (stage names, dependency names, route
+  templates), never from queries or user ids, so series stay bounded.
+- With several worker processes, set PROMETHEUS_MULTIPROC_DIR: every worker
+  writes its samples there and /metrics aggregates them.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# 1 ms .. 30 s: Redis and BM25 sit at the bottom, Groq generation at the top
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_SECONDS = Histogram(
+    "legal_ai_request_seconds",
+    "HTTP request latency until the response headers are sent",
+    ["route", "method", "status"],
+    buckets=_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "legal_ai_stage_seconds",
+    "Latency of one pipeline stage",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+DEPENDENCY_SECONDS = Histogram(
+    "legal_ai_dependency_seconds",
+    "Latency of one call to an external dependency",
+    ["dependency", "operation", "outcome"],
+    buckets=_BUCKETS,
+)
+RETRIES = Counter(
+    "legal_ai_retries_total",
+    "Retried calls to an external dependency",
+    ["dependency"],
+)
+GROQ_KEY_ROTATIONS = Counter(
+    "legal_ai_groq_key_rotations_total",
+    "Groq keys put in cooldown, moving traffic to the other keys",
+    ["reason"],
+)
+RATE_LIMITED = Counter(
+    "legal_ai_rate_limited_total",
+    "Requests rejected by the per-user rate limiter",
+    ["budget"],
+)
+
+
+class ServerTimings:
+    """Stage durations of one request, rendered as a Server-Timing header."""
+
+    def __init__(self):
+        self._ms: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self._ms[name] = self._ms.get(name, 0.0) + seconds * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 1) for name, ms in self._ms.items()}
+
+    def header(self, total_seconds: Optional[float] = None) -> str:
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self._ms.items()]
+        if total_seconds is not None:
+            entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_timings: ContextVar[Optional[ServerTimings]] = ContextVar("server_timings", default=None)
+
+
+def start_request_timing() -> ServerTimings:
+    """Starts collecting timings for the current request (HTTP middleware)."""
+    timings = ServerTimings()
+    _timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[ServerTimings]:
+    return _timings.get()
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Records a stage measured elsewhere (e.g. generation after a stream ends)."""
+    STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Times one pipeline stage: `with stage("retrieve"): ...`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def dependency(name: str, operation: str) -> Iterator[None]:
+    """Times one call to an external dependency; outcome is "error" if it raised."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        seconds = time.perf_counter() - started
+        DEPENDENCY_SECONDS.labels(dependency=name, operation=operation, outcome=outcome).observe(seconds)
+        timings = _timings.get()
+        if timings is not None:
+            timings.add(name, seconds)
+
+
+def count_retry(dependency_name: str) -> None:
+    RETRIES.labels(dependency=dependency_name).inc()
+
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    REQUEST_SECONDS.labels(route=route, method=method, status=str(status)).observe(seconds)
+
+
+def metrics_response() -> Tuple[bytes, str]:
+    """Prometheus exposition body and content type, across workers if multiprocess."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,226 @@
+"""
+Background warmup of remote dependencies and caches, gating /ready.
+
+Pipeline position:
+    lifespan (app/main.py)
+        │  Redis ping (hard requirement), local retrieval state
+        ├──► get_warmup_state().start() ── background task ──┐
+        ▼                                                    │
+    serving:  /health 200 (liveness)                         │
+              /ready  503 ─────── until every step finished ─┴──► /ready 200
+
+Steps (all concurrent, except embedding + qdrant ─► search ─► query_cache):
+    embedding     one provider call past the cache: loads the HF model
+                  (wait_for_model) or the local one, opens the HF connection
+    qdrant        AsyncQdrantClient creation + get_collections
+    search        a dummy hybrid query, expanded and packed: dense, BM25,
+                  RRF, expansion and packing paths and their first imports
+    query_cache   the WARMUP_TOP_QUERIES most popular recent search queries
+                  (app/core/popular_queries.py) embedded into this worker's
+                  L1 cache, from Redis L2 or the provider
+    jwks          Supabase JWKS fetch, then the background refresh loop
+    groq          one connection per API key (GroqKeyPool.awarm)
+    redis         rate limiter and answer cache clients connected
+
+Design decisions:
+- Ready means "warmup finished", not "every step succeeded": the steps warm
+  soft dependencies, and one that fails or times out (logged, listed in
+  /ready and /health) leaves its path lazy, as it was before. Redis stays
+  a hard requirement, checked in the lifespan before serving.
+- Each step is bounded by WARMUP_STEP_TIMEOUT_SECONDS and cancelled past it.
+- Heavy SDKs (qdrant_client, groq, jose) are imported on first use, not at
+  app import; the qdrant and groq steps build their clients in a thread, so
+  those imports do not hold up the event loop already accepting requests.
+- The server accepts connections while warming: a load balancer polling
+  /ready routes traffic only to a warm instance, and a request that does
+  arrive early is served, just cold.
+- State is per process: under gunicorn each worker warms its own clients
+  and L1 cache and answers /ready for itself.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from app.config import settings
+from app.utils import get_logger
+
+logger = get_logger(__name__)
+
+WARMUP_QUERY = "What is the punishment for theft?"
+
+
+# ---------------------------------------------------------------------------
+# Steps
+# ---------------------------------------------------------------------------
+async def _warm_embedding() -> Dict[str, Any]:
+    from app.core.embedding_cache import get_embedding_cache
+    from app.core.embeddings import get_embedding_provider
+
+    # Both block when first built (model load, Redis ping): off the event loop
+    provider = await asyncio.to_thread(get_embedding_provider)
+    await asyncio.to_thread(get_embedding_cache)
+    await provider.aembed_query(WARMUP_QUERY)
+    return {"provider": provider.name}
+
+
+async def _warm_qdrant() -> Dict[str, Any]:
+    from app.core.retriever import get_retriever
+
+    # Building the client imports qdrant_client (seconds): off the event loop
+    client = await asyncio.to_thread(lambda: get_retriever().aclient)
+    collections = await client.get_collections()
+    return {"collections": len(collections.collections)}
+
+
+async def _warm_search() -> Dict[str, Any]:
+    from app.core.context_expander import get_context_expander
+    from app.core.llm_chain import get_llm_chain
+    from app.core.retriever import get_retriever
+
+    documents, trace = await get_retriever().ahybrid_search_with_trace(WARMUP_QUERY)
+    documents = get_context_expander().expand(documents)
+    get_llm_chain().pack_context(documents)
+    return {"documents": len(documents), "degraded": trace["degraded"]}
+
+
+async def _prime_query_cache() -> Dict[str, Any]:
+    from app.core.embedding_cache import get_embedding_cache
+    from app.core.embeddings import get_embedding_provider
+    from app.core.popular_queries import get_popular_queries
+    from app.core.query_expander import expand_query
+
+    queries = await get_popular_queries().top(settings.WARMUP_TOP_QUERIES)
+    if queries:
+        # The exact text the dense branch embeds, so the primed entries are hits
+        await get_embedding_cache().aget_or_compute_many(
+            [expand_query(q) for q in queries], get_embedding_provider().aembed_queries
+        )
+    return {"queries": len(queries)}
+
+
+async def _warm_jwks() -> Dict[str, Any]:
+    from app.dependencies import jwks_manager
+
+    try:
+        await jwks_manager.refresh()
+    finally:
+        # Started after the fetch so its first wait honours the response's max-age
+        jwks_manager.start_background_refresh()
+    return {"keys": jwks_manager.stats()["keys"]}
+
+
+async def _warm_groq() -> Dict[str, Any]:
+    from app.core.groq_pool import get_groq_pool
+
+    pool = await asyncio.to_thread(get_groq_pool)
+    connected = await pool.awarm()
+    if connected == 0:
+        raise RuntimeError(f"none of {len(pool)} Groq keys answered")
+    return {"keys": len(pool), "connected": connected}
+
+
+async def _warm_redis_clients() -> Dict[str, Any]:
+    from app.core.rate_limiter import get_rate_limiter
+
+    clients = {"rate_limiter": get_rate_limiter().redis_client}
+    if settings.ANSWER_CACHE_ENABLED:
+        from app.core.answer_cache import get_answer_cache
+
+        clients["answer_cache"] = get_answer_cache().redis_client
+    await asyncio.gather(*(client.ping() for client in clients.values()))
+    return {"clients": sorted(clients)}
+
+
+# ---------------------------------------------------------------------------
+# State
+# ---------------------------------------------------------------------------
+class WarmupState:
+    """Progress of the startup warmup; ready once every step has finished."""
+
+    def __init__(self, step_timeout_seconds: float = 60.0):
+        self.step_timeout_seconds = step_timeout_seconds
+        self.ready = False
+        self.elapsed_ms: Optional[int] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def step(self, name: str, work: Awaitable[Dict[str, Any]]) -> None:
+        """Runs one step within the timeout and records its outcome; never raises."""
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(work, timeout=self.step_timeout_seconds)
+            result = {"status": "ok", **(detail or {})}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+        except Exception as e:
+            result = {"status": "error", "error": (str(e) or type(e).__name__)[:200]}
+        result["ms"] = int((time.perf_counter() - started) * 1000)
+        self.steps[name] = result
+
+        if result["status"] == "ok":
+            logger.info("warmup_step_finished", step=name, **result)
+        else:
+            logger.warning("warmup_step_failed", step=name, **result)
+
+    async def _search_chain(self) -> None:
+        await asyncio.gather(
+            self.step("embedding", _warm_embedding()),
+            self.step("qdrant", _warm_qdrant()),
+        )
+        await self.step("search", _warm_search())
+        if settings.WARMUP_TOP_QUERIES > 0:
+            await self.step("query_cache", _prime_query_cache())
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(
+            self._search_chain(),
+            self.step("jwks", _warm_jwks()),
+            self.step("groq", _warm_groq()),
+            self.step("redis", _warm_redis_clients()),
+        )
+        self.elapsed_ms = int((time.perf_counter() - started) * 1000)
+        self.ready = True
+        logger.info(
+            "warmup_finished",
+            elapsed_ms=self.elapsed_ms,
+            failed=[name for name, step in self.steps.items() if step["status"] != "ok"],
+        )
+
+    def start(self) -> None:
+        """Starts the warmup in the background (lifespan); ready at once when disabled."""
+        if not settings.WARMUP_ENABLED:
+            from app.dependencies import jwks_manager
+
+            jwks_manager.start_background_refresh()
+            self.ready = True
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "elapsed_ms": self.elapsed_ms,
+            "steps": dict(self.steps),
+        }
+
+
+_warmup: Optional[WarmupState] = None
+
+
+def get_warmup_state() -> WarmupState:
+    global _warmup
+    if _warmup is None:
+        _warmup = WarmupState(step_timeout_seconds=settings.WARMUP_STEP_TIMEOUT_SECONDS)
+    return _warmup
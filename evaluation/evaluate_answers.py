@@ -20,6 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
 from app.core.retriever import get_retriever
+from app.core.groq_pool import Priority
 from app.core.llm_chain import LLMChain
 from evaluation.llm_judge import LLMJudge
 from app.utils import setup_logging, get_logger
@@ -126,7 +127,7 @@ def evaluate_single(
     # Step 2: Generation
     gen_start = time.time()
     try:
-        answer = llm.generate_answer(query=query, documents=documents)
+        answer = llm.generate_answer(query=query, documents=documents, priority=Priority.BACKGROUND)
         generation_ms = (time.time() - gen_start) * 1000
         generation_error = None
     except Exception as e:
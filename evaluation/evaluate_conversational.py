@@ -37,6 +37,7 @@ setup_logging()
 logger = get_logger(__name__)
 
 from app.core.retriever import get_retriever
+from app.core.groq_pool import Priority
 from app.core.llm_chain import LLMChain
 from app.core.query_condenser import get_query_condenser
 from app.core.context_expander import get_context_expander
@@ -114,6 +115,7 @@ def evaluate_conversation(
                 query=user_query,
                 documents=documents,
                 chat_history=in_memory_history,
+                priority=Priority.BACKGROUND,
             )
             gen_ms = int((time.perf_counter() - t_gen_start) * 1000)
         except Exception as e:
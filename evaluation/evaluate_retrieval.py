@@ -29,6 +29,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
 from app.core.retriever import get_retriever
+from app.core.groq_pool import Priority
 from app.core.llm_chain import get_llm_chain
 from app.core.query_expander import expand_query, expand_query_with_trace
 from app.utils import setup_logging, get_logger
@@ -173,7 +174,7 @@ def evaluate_single_query(
     if not retrieval_only and not retrieval_error:
         gen_start_time = time.time()
         try:
-            answer_text = llm.generate_answer(query=query, documents=results)
+            answer_text = llm.generate_answer(query=query, documents=results, priority=Priority.BACKGROUND)
             generation_ms = (time.time() - gen_start_time) * 1000
         except Exception as e:
             generation_ms = (time.time() - gen_start_time) * 1000
@@ -24,6 +24,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
 from app.core.retriever import DocumentRetriever
+from app.core.groq_pool import Priority
 from app.core.llm_chain import LLMChain
 from app.utils import setup_logging, get_logger
 
@@ -106,7 +107,7 @@ def evaluate_single_query(
     try:
         # Only call LLM if retrieval succeeded, otherwise empty answer
         if not retrieval_error:
-            answer_text = llm.generate_answer(query=query, documents=results)
+            answer_text = llm.generate_answer(query=query, documents=results, priority=Priority.BACKGROUND)
         generation_ms = (time.time() - gen_start_time) * 1000
     except Exception as e:
         generation_ms = (time.time() - gen_start_time) * 1000
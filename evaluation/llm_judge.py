@@ -1,42 +1,24 @@
 """
 LLM Judge for Answer Quality Evaluation using Groq API.
 Evaluates Faithfulness, Groundedness, Completeness, and Consistency.
+Calls go through the shared GroqKeyPool in the BACKGROUND priority class.
 """
 
 import json
 import time
 from typing import Dict, Any, List
-from groq import Groq
 from app.config import settings
-from app.utils import get_logger
+from app.core.groq_pool import Priority, get_groq_pool, is_overloaded_error, is_rate_limit_error
+from app.utils import get_logger, LLMError
 
 logger = get_logger(__name__)
 
 
 class LLMJudge:
     def __init__(self):
-        self._init_api_keys()
-        self.client = Groq(api_key=self.api_keys[self.current_key_idx], max_retries=0)
+        self.pool = get_groq_pool()
         self.model = settings.LLM_MODEL
-        logger.info("llm_judge_initialized", model=self.model, num_keys=len(self.api_keys))
-
-    def _init_api_keys(self):
-        self.api_keys = []
-        if getattr(settings, "GROQ_API_KEY", None):
-            self.api_keys.append(settings.GROQ_API_KEY)
-        for idx in range(2, 10):
-            val = getattr(settings, f"GROQ_API_KEY_{idx}", None)
-            if val and val not in self.api_keys:
-                self.api_keys.append(val)
-        if not self.api_keys:
-            self.api_keys.append(settings.GROQ_API_KEY)
-        self.current_key_idx = 0
-
-    def _rotate_key(self):
-        if len(self.api_keys) > 1:
-            self.current_key_idx = (self.current_key_idx + 1) % len(self.api_keys)
-            self.client = Groq(api_key=self.api_keys[self.current_key_idx], max_retries=0)
-            logger.info("llm_judge_key_rotated", new_key_index=self.current_key_idx)
+        logger.info("llm_judge_initialized", model=self.model, num_keys=len(self.pool))
 
     def evaluate_answer(
         self,
@@ -92,11 +74,12 @@ GENERATED ANSWER:
 Output the JSON evaluation:"""
 
         # Retry loop for rate limits or transient errors
-        max_attempts = max(5, len(self.api_keys) * 2)
+        max_attempts = max(5, len(self.pool) * 2)
         last_err = None
         for attempt in range(max_attempts):
             try:
-                response = self.client.chat.completions.create(
+                response = self.pool.create(
+                    Priority.BACKGROUND,
                     messages=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}
@@ -110,15 +93,13 @@ Output the JSON evaluation:"""
                 return json.loads(raw_content)
             except Exception as e:
                 last_err = e
-                err_msg = str(e).upper()
-                import groq
-                is_rate_limit = isinstance(e, groq.RateLimitError) or "429" in err_msg or "RATE_LIMIT" in err_msg or "TOO MANY REQUESTS" in err_msg or "LIMIT" in err_msg
-                is_overloaded = "503" in err_msg or "OVERLOADED" in err_msg or "SERVICE_UNAVAILABLE" in err_msg or "500" in err_msg
-
-                if (is_rate_limit or is_overloaded) and len(self.api_keys) > 1:
-                    logger.warning("llm_judge_rate_limited_rotating_key", error=str(e), attempt=attempt)
-                    self._rotate_key()
-                    time.sleep(3.0)
+                if isinstance(e, LLMError):
+                    # Pool wait exhausted: every key stayed rate limited
+                    logger.error("llm_judge_failed", error=str(e))
+                    break
+                if is_rate_limit_error(e) or is_overloaded_error(e):
+                    # The pool cools that key down; the next attempt queues for headroom
+                    logger.warning("llm_judge_rate_limited_requeue", error=str(e), attempt=attempt)
                 else:
                     if attempt < max_attempts - 1:
                         sleep_time = 2.0 * (attempt + 1)
@@ -1,4 +1,4 @@
-import { useState, useCallback, useEffect } from "react";
+import { useState, useCallback, useEffect, useRef } from "react";
 import { chatApi } from "../services/api";
 import { getCurrentSession } from "../services/auth";
 import type { Message, ChatState } from "../types";
@@ -10,6 +10,10 @@ export const useChat = () => {
     error: null,
     sessionId: null,
   });
+  const streamAbort = useRef<AbortController | null>(null);
+
+  // Abort an in-flight stream when the component unmounts
+  useEffect(() => () => streamAbort.current?.abort(), []);
 
   // ----------------------------
   // Restore last conversation
@@ -71,28 +75,54 @@ export const useChat = () => {
         error: null,
       }));
 
-      try {
-        const response = await chatApi.sendQuery({
-          user_id: userId,
-          query,
-          session_id: state.sessionId || undefined,
-        });
-
-        const assistantMessage: Message = {
-          id: crypto.randomUUID(),
-          role: "assistant",
-          content: response.answer,
-          sources: response.sources,
-          timestamp: new Date(),
-        };
-
+      // The assistant message is created when sources arrive and grows as
+      // tokens stream in.
+      const assistantId = crypto.randomUUID();
+      const updateAssistant = (update: (message: Message) => Message) =>
         setState((prev) => ({
           ...prev,
-          messages: [...prev.messages, assistantMessage],
-          isLoading: false,
-          sessionId: response.session_id,
+          messages: prev.messages.map((m) =>
+            m.id === assistantId ? update(m) : m
+          ),
         }));
+
+      const controller = new AbortController();
+      streamAbort.current = controller;
+
+      try {
+        await chatApi.streamQuery(
+          {
+            user_id: userId,
+            query,
+            session_id: state.sessionId || undefined,
+          },
+          {
+            onSources: (event) =>
+              setState((prev) => ({
+                ...prev,
+                sessionId: event.session_id,
+                messages: [
+                  ...prev.messages,
+                  {
+                    id: assistantId,
+                    role: "assistant",
+                    content: "",
+                    sources: event.sources,
+                    timestamp: new Date(),
+                  },
+                ],
+              })),
+            onToken: (text) =>
+              updateAssistant((m) => ({ ...m, content: m.content + text })),
+            onDone: () =>
+              setState((prev) => ({ ...prev, isLoading: false })),
+          },
+          controller.signal
+        );
+
+        setState((prev) => ({ ...prev, isLoading: false }));
       } catch (error) {
+        if (controller.signal.aborted) return;
         setState((prev) => ({
           ...prev,
           isLoading: false,
@@ -105,6 +135,7 @@ export const useChat = () => {
   );
 
   const clearChat = useCallback(() => {
+    streamAbort.current?.abort();
     setState({
       messages: [],
       isLoading: false,
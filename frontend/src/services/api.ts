@@ -1,5 +1,10 @@
 import axios from "axios";
-import type { ChatRequest, ChatResponse, HealthResponse } from "../types";
+import type {
+  ChatRequest,
+  ChatResponse,
+  HealthResponse,
+  StreamHandlers,
+} from "../types";
 
 /**
  * Backend base URL
@@ -19,17 +24,55 @@ const api = axios.create({
   },
 });
 
-// Attach Supabase JWT to every outgoing request
-api.interceptors.request.use(async (config) => {
+const getAccessToken = async (): Promise<string | undefined> => {
   const { supabase } = await import("./auth");
   const { data } = await supabase.auth.getSession();
-  const token = data.session?.access_token;
+  return data.session?.access_token;
+};
+
+// Attach Supabase JWT to every outgoing request
+api.interceptors.request.use(async (config) => {
+  const token = await getAccessToken();
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
   return config;
 });
 
+/**
+ * Splits an SSE byte stream into (event, data) pairs.
+ * axios cannot read a streamed body in the browser, so this uses fetch.
+ */
+async function readEventStream(
+  body: ReadableStream<Uint8Array>,
+  onEvent: (event: string, data: any) => void
+): Promise<void> {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 export const chatApi = {
   /**
    * Send a query to the legal assistant
@@ -39,6 +82,45 @@ export const chatApi = {
     return data;
   },
 
+  /**
+   * Stream an answer: sources first, then tokens as they are generated
+   */
+  streamQuery: async (
+    request: ChatRequest,
+    handlers: StreamHandlers,
+    signal?: AbortSignal
+  ): Promise<void> => {
+    const token = await getAccessToken();
+    const response = await fetch(`${API_BASE_URL}/api/query/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "text/event-stream",
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(request),
+      signal,
+    });
+
+    if (!response.ok || !response.body) {
+      let message = `Request failed with status ${response.status}`;
+      try {
+        const data = await response.json();
+        message = data.message || data.detail || message;
+      } catch {
+        // non-JSON error body
+      }
+      throw new Error(message);
+    }
+
+    await readEventStream(response.body, (event, data) => {
+      if (event === "sources") handlers.onSources(data);
+      else if (event === "token") handlers.onToken(data.text);
+      else if (event === "done") handlers.onDone(data);
+      else if (event === "error") throw new Error(data.message);
+    });
+  },
+
   /**
    * Clear a chat session (optional / future use)
    */
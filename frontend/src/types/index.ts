@@ -3,6 +3,7 @@ export interface ChatRequest {
   user_id: string;
   query: string;
   session_id?: string;
+  force_live?: boolean;
 }
 
 export interface RetrievedDocument {
@@ -17,6 +18,26 @@ export interface ChatResponse {
   sources: RetrievedDocument[];
   session_id: string;
   query: string;
+  metadata?: Record<string, unknown>;
+}
+
+// Server-Sent Events from POST /api/query/stream
+export interface StreamSourcesEvent {
+  session_id: string;
+  sources: RetrievedDocument[];
+  metadata?: Record<string, unknown>;
+}
+
+export interface StreamDoneEvent {
+  ttft_ms: number | null;
+  total_ms: number;
+  usage?: Record<string, number> | null;
+}
+
+export interface StreamHandlers {
+  onSources: (event: StreamSourcesEvent) => void;
+  onToken: (text: string) => void;
+  onDone: (event: StreamDoneEvent) => void;
 }
 
 export interface HealthResponse {
@@ -0,0 +1,74 @@
+"""
+Gunicorn configuration: pre-fork uvicorn workers sharing the retrieval state.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The master imports the app and loads the corpus, BM25 index and dense
+vectors once (app/prefork.py); workers are forked from it and share those
+pages copy-on-write. Each worker then runs the FastAPI lifespan and opens
+its own Redis, Qdrant, Groq and httpx connections.
+
+Environment:
+    WEB_CONCURRENCY            number of workers (default 1)
+    PORT                       listen port (default 8000)
+    GUNICORN_PRELOAD           "0" loads the app in every worker instead
+                               (for comparison in scripts/benchmark_workers.py)
+    PROMETHEUS_MULTIPROC_DIR   shared metrics directory, cleared at startup; a
+                               temporary one is created when unset (and removed
+                               at exit), so /metrics covers every worker
+"""
+
+import glob
+import os
+import shutil
+import tempfile
+
+# Must be set before prometheus_client is imported by the app
+_own_metrics_dir = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+if _own_metrics_dir:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="legal_ai_metrics_")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+
+# Streamed and batch answers can hold a request open for a while
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+
+
+def on_starting(server):
+    # Samples left by an earlier run's workers would otherwise show in /metrics
+    if not _own_metrics_dir:
+        for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+            os.remove(path)
+
+
+def when_ready(server):
+    # Master, after the app import and before the first fork
+    if server.cfg.preload_app:
+        from app.prefork import preload_shared_state
+
+        preload_shared_state()
+
+
+def post_fork(server, worker):
+    from app.prefork import reset_process_state
+
+    reset_process_state()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
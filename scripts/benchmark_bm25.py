@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+BM25 latency benchmark: rank_bm25 full scan vs. inverted-index top-k.
+
+Measures per-query latency of the old path (BM25Okapi.get_scores + full sort)
+and the new path (BM25Index.top_k) on the IPC corpus and on synthetic corpora
+built by replicating it 10x and 100x.
+
+With --startup, instead measures BM25 startup time and RSS in fresh
+processes (RSS growth caused by the BM25 setup alone, imports excluded) for:
+the rank_bm25 build, the in-process BM25Index build, and the
+memory-mapped prebuilt artifact (data/ipc_bm25.idx).
+
+Usage:
+    python scripts/benchmark_bm25.py [--scales 1 10 100] [--top-k 20] [--repeats 5]
+    python scripts/benchmark_bm25.py --startup
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.bm25_index import BM25Index
+from app.core.query_expander import expand_query
+
+DATA_PATH = Path(__file__).parent.parent / "data" / "ipc_clean.json"
+QUERIES_PATH = Path(__file__).parent.parent / "evaluation" / "test_queries_v2.json"
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def load_corpus_tokens() -> List[List[str]]:
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        docs = json.load(f)
+    return [
+        tokenize(f"section {d.get('section_number', '')} {d.get('title', '')} {d.get('text', '')}")
+        for d in docs
+    ]
+
+
+def load_queries(limit: int) -> List[List[str]]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data["queries"] if isinstance(data, dict) else data
+    return [tokenize(expand_query(q["query"])) for q in items[:limit]]
+
+
+def synthesize(base: List[List[str]], scale: int) -> List[List[str]]:
+    """Replicates the corpus, tagging each copy with a unique token so IDF shifts realistically."""
+    if scale == 1:
+        return base
+    corpus = []
+    for copy in range(scale):
+        tag = f"copy{copy}"
+        corpus.extend(doc + [tag] for doc in base)
+    return corpus
+
+
+def time_queries(fn: Callable[[List[str]], object], queries: List[List[str]], repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+# Each snippet runs in a fresh interpreter; imports are done before timing starts.
+_STARTUP_SNIPPETS = {
+    "rank_bm25_build": """
+import json, re, time
+from rank_bm25 import BM25Okapi
+rss0 = rss_mb(); t0 = time.perf_counter()
+docs = json.load(open("data/ipc_clean.json", encoding="utf-8"))
+BM25Okapi([re.findall(r"[a-z0-9]+", f"section {d.get('section_number', '')} {d.get('title', '')} {d.get('text', '')}".lower()) for d in docs])
+""",
+    "index_build": """
+import json, time
+from app.core.bm25_index import BM25Index
+rss0 = rss_mb(); t0 = time.perf_counter()
+BM25Index.build_from_docs(json.load(open("data/ipc_clean.json", encoding="utf-8")))
+""",
+    "artifact_mmap": """
+import time
+from pathlib import Path
+from app.core.bm25_index import BM25Index, corpus_checksum
+rss0 = rss_mb(); t0 = time.perf_counter()
+assert BM25Index.load("data/ipc_bm25.idx", corpus_checksum(Path("data/ipc_clean.json").read_bytes())) is not None
+""",
+}
+_STARTUP_PRELUDE = """
+def rss_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS")) / 1024
+"""
+_STARTUP_REPORT = """
+elapsed = (time.perf_counter() - t0) * 1000
+print(f"{elapsed:.1f} {rss_mb() - rss0:.1f}")
+"""
+
+
+def run_startup_benchmark(repeats: int) -> None:
+    root = Path(__file__).parent.parent
+    print(f"{'path':<18} | {'startup ms':>10} | {'RSS delta MB':>12}")
+    print("-" * 46)
+    for name, snippet in _STARTUP_SNIPPETS.items():
+        timings, rss = [], []
+        for _ in range(repeats):
+            proc = subprocess.run(
+                [sys.executable, "-c", _STARTUP_PRELUDE + snippet + _STARTUP_REPORT],
+                cwd=root,
+                capture_output=True,
+                text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{name:<18} | skipped ({proc.stderr.strip().splitlines()[-1]})")
+                break
+            ms, mb = proc.stdout.strip().splitlines()[-1].split()
+            timings.append(float(ms))
+            rss.append(float(mb))
+        else:
+            print(f"{name:<18} | {statistics.median(timings):>10.1f} | {statistics.median(rss):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 full-scan vs. inverted-index benchmark")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50, help="Number of evaluation queries to time")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--startup", action="store_true", help="Measure startup time and RSS instead")
+    args = parser.parse_args()
+
+    if args.startup:
+        run_startup_benchmark(args.repeats)
+        return
+
+    try:
+        from rank_bm25 import BM25Okapi
+    except ImportError:
+        BM25Okapi = None
+        print("rank_bm25 not installed — reporting inverted-index timings only")
+
+    base = load_corpus_tokens()
+    queries = load_queries(args.queries)
+
+    print(f"{'docs':>8} | {'engine':<16} | {'p50 ms':>9} | {'p95 ms':>9} | {'mean ms':>9}")
+    print("-" * 62)
+    for scale in args.scales:
+        corpus = synthesize(base, scale)
+        index = BM25Index.build(corpus)
+        rows = {"inverted_index": time_queries(lambda q: index.top_k(q, args.top_k), queries, args.repeats)}
+
+        if BM25Okapi is not None:
+            reference = BM25Okapi(corpus)
+
+            def full_scan(q):
+                scores = reference.get_scores(q)
+                ranked = sorted(zip(range(len(scores)), scores), key=lambda x: x[1], reverse=True)
+                return ranked[: args.top_k]
+
+            # The full scan is slow at 100x; a single pass is enough to see the trend
+            rows["bm25okapi_scan"] = time_queries(full_scan, queries, 1 if scale >= 100 else args.repeats)
+
+        for engine, stats in rows.items():
+            print(
+                f"{len(corpus):>8} | {engine:<16} | {stats['p50_ms']:>9} | "
+                f"{stats['p95_ms']:>9} | {stats['mean_ms']:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
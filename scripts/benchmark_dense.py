@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Dense retrieval latency: local exact index vs. Qdrant Cloud.
+
+Uses the snapshot in data/ipc_vectors.npy when present (otherwise a random
+548 x 768 matrix). Query vectors are perturbed corpus rows, so no embedding
+call is needed and both backends see identical inputs. Qdrant Cloud is timed
+only when it is reachable with the configured credentials.
+
+Usage:
+    python scripts/benchmark_dense.py [--queries 100] [--top-k 20] [--scales 1 10]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.dense_index import LocalDenseIndex
+
+DENSE_VECTORS_PATH = Path(__file__).parent.parent / "data" / "ipc_vectors.npy"
+
+
+def load_index() -> LocalDenseIndex:
+    index = LocalDenseIndex.load(DENSE_VECTORS_PATH)
+    if index is not None:
+        return index
+    print("[INFO] data/ipc_vectors.npy not found — using a random 548 x 768 matrix")
+    rng = np.random.default_rng(0)
+    vectors = LocalDenseIndex.normalize_rows(rng.normal(size=(548, settings.EMBEDDING_DIMENSION)))
+    return LocalDenseIndex(vectors, [str(i) for i in range(548)])
+
+
+def make_queries(index: LocalDenseIndex, n: int) -> List[np.ndarray]:
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, len(index.sections), size=n)
+    noisy = np.asarray(index.vectors[rows]) + rng.normal(scale=0.05, size=(n, index.dimension))
+    return list(LocalDenseIndex.normalize_rows(noisy))
+
+
+def time_calls(fn: Callable[[np.ndarray], object], queries: List[np.ndarray]) -> str:
+    fn(queries[0])
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    return f"{statistics.median(samples):>9.3f} | {p95:>9.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local dense index vs. Qdrant latency")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=settings.DENSE_CANDIDATES)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    base = load_index()
+    queries = make_queries(base, args.queries)
+
+    print(f"{'rows':>7} | {'backend':<14} | {'p50 ms':>9} | {'p95 ms':>9}")
+    print("-" * 50)
+    for scale in args.scales:
+        vectors = np.tile(np.asarray(base.vectors), (scale, 1))
+        index = LocalDenseIndex(vectors, base.sections * scale)
+        print(f"{len(index.sections):>7} | {'local_exact':<14} | {time_calls(lambda q: index.search(q, args.top_k), queries)}")
+
+    try:
+        from qdrant_client import QdrantClient
+
+        client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=20.0)
+        client.get_collection(settings.QDRANT_COLLECTION_NAME)
+    except Exception as e:
+        print(f"\n[SKIP] Qdrant Cloud not reachable: {str(e)[:100]}")
+        return
+
+    def qdrant_search(q: np.ndarray):
+        return client.query_points(
+            collection_name=settings.QDRANT_COLLECTION_NAME, query=q.tolist(), limit=args.top_k
+        )
+
+    print(f"{len(base.sections):>7} | {'qdrant_cloud':<14} | {time_calls(qdrant_search, queries)}")
+
+
+if __name__ == "__main__":
+    main()
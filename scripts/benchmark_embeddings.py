@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Query-embedding benchmark: HuggingFace Inference API vs. local CPU model.
+
+For each provider, reports sequential per-query latency (p50/p95) and
+throughput under concurrent load. When both providers are available, also
+reports cosine similarity between their vectors for the same query, which
+should be ~1.0 if the local model is a faithful replacement.
+
+With --http-pool, instead measures the embedding HTTP hop itself: a fresh
+httpx.Client per request (the old behaviour, DNS + TLS every time) against
+the shared pooled client from app.utils.http_client. --url points the
+comparison at another endpoint when HF is unreachable.
+
+Usage:
+    python scripts/benchmark_embeddings.py [--providers huggingface local]
+        [--queries 30] [--concurrency 4] [--backend torch|onnx] [--onnx-file FILE]
+    python scripts/benchmark_embeddings.py --http-pool [--queries 30] [--url URL]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.embeddings import (
+    EmbeddingProvider,
+    HuggingFaceEmbeddingProvider,
+    LocalEmbeddingProvider,
+)
+from app.core.query_expander import expand_query
+from app.utils import get_http_client, timeout_for
+
+QUERIES_PATH = Path(__file__).parent.parent / "evaluation" / "test_queries_v2.json"
+
+
+def load_queries(limit: int) -> List[str]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data["queries"] if isinstance(data, dict) else data
+    return [expand_query(q["query"]) for q in items[:limit]]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * pct) - 1)]
+
+
+def bench_provider(provider: EmbeddingProvider, queries: List[str], concurrency: int) -> Dict[str, float]:
+    provider.embed_query(queries[0])  # warm up (model load / TLS / HF cold start)
+
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        provider.embed_query(q)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(provider.embed_query, queries))
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "qps": round(len(queries) / elapsed, 1),
+    }
+
+
+def cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))  # both are L2-normalized
+
+
+def bench_http_pool(url: str, queries: List[str]) -> None:
+    headers = {"Content-Type": "application/json"}
+    if settings.HF_API_TOKEN and "huggingface" in url:
+        headers["Authorization"] = f"Bearer {settings.HF_API_TOKEN}"
+
+    def one_off(q: str) -> None:
+        with httpx.Client(timeout=30.0) as client:
+            client.post(url, headers=headers, json={"inputs": f"query: {q}"})
+
+    pooled_client = get_http_client()
+
+    def pooled(q: str) -> None:
+        pooled_client.post(url, headers=headers, json={"inputs": f"query: {q}"}, timeout=timeout_for(url))
+
+    print(f"{'client':<10} | {'p50 ms':>8} | {'p95 ms':>8} | {'mean ms':>8}")
+    print("-" * 44)
+    for name, fn in (("one_off", one_off), ("pooled", pooled)):
+        fn(queries[0])  # warm up DNS cache / server side
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            try:
+                fn(q)
+            except httpx.HTTPError as e:
+                print(f"{name:<10} | failed: {e}")
+                break
+            latencies.append((time.perf_counter() - t0) * 1000)
+        else:
+            print(
+                f"{name:<10} | {statistics.median(latencies):>8.1f} | "
+                f"{percentile(latencies, 0.95):>8.1f} | {statistics.fmean(latencies):>8.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding provider latency/throughput benchmark")
+    parser.add_argument("--providers", nargs="+", default=["huggingface", "local"])
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--backend", default=settings.LOCAL_EMBEDDING_BACKEND, choices=["torch", "onnx"])
+    parser.add_argument("--onnx-file", default=settings.LOCAL_EMBEDDING_ONNX_FILE)
+    parser.add_argument("--http-pool", action="store_true", help="Compare one-off vs pooled HTTP clients")
+    parser.add_argument("--url", default=None, help="Endpoint for --http-pool (default: HF embedding URL)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    if args.http_pool:
+        bench_http_pool(args.url or HuggingFaceEmbeddingProvider(settings.EMBEDDING_MODEL).url, queries)
+        return
+
+    providers: Dict[str, EmbeddingProvider] = {}
+    for name in args.providers:
+        try:
+            if name == "huggingface":
+                providers[name] = HuggingFaceEmbeddingProvider(settings.EMBEDDING_MODEL)
+            elif name == "local":
+                providers[name] = LocalEmbeddingProvider(
+                    settings.EMBEDDING_MODEL, backend=args.backend, onnx_file=args.onnx_file
+                )
+        except Exception as e:
+            print(f"[SKIP] {name}: {e}")
+
+    print(f"{'provider':<12} | {'p50 ms':>8} | {'p95 ms':>8} | {'qps @' + str(args.concurrency):>8}")
+    print("-" * 46)
+    for name, provider in providers.items():
+        try:
+            stats = bench_provider(provider, queries, args.concurrency)
+        except Exception as e:
+            print(f"{name:<12} | failed: {e}")
+            continue
+        print(f"{name:<12} | {stats['p50_ms']:>8} | {stats['p95_ms']:>8} | {stats['qps']:>8}")
+
+    if {"huggingface", "local"} <= providers.keys():
+        sims = [
+            cosine(providers["huggingface"].embed_query(q), providers["local"].embed_query(q))
+            for q in queries[:10]
+        ]
+        print(f"\ncosine(local, huggingface): min={min(sims):.5f} mean={statistics.fmean(sims):.5f}")
+
+
+if __name__ == "__main__":
+    main()
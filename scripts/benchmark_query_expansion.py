@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Query expansion microbenchmark: per-phrase substring scan vs. compiled
+token automaton.
+
+Times the old expansion (every multi-word key checked with `phrase in
+query`, then token lookups, then a concept pass) against ExpansionMatcher
+on the evaluation queries, at the shipped dictionary size and on synthetic
+dictionaries built by adding variants of every key (default 50x). Also
+reports the automaton compile time and the memoized lookup cost.
+
+Usage:
+    python scripts/benchmark_query_expansion.py [--scales 1 50] [--queries 200] [--repeats 5]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Set
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.query_expander import (
+    LEGAL_CONCEPT_MAP,
+    SYNONYM_MAP,
+    VOCABULARY_MAP,
+    ExpansionMatcher,
+    expand_query,
+    tokenize_query,
+)
+
+QUERIES_PATH = Path(__file__).parent.parent / "evaluation" / "test_queries_v2.json"
+
+
+def load_queries(limit: int) -> List[str]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data["queries"] if isinstance(data, dict) else data
+    return [q["query"] for q in items[:limit]]
+
+
+def synthesize(mapping: Dict[str, List[str]], scale: int) -> Dict[str, List[str]]:
+    """Adds scale-1 variants of every key, keeping the single/multi-word mix."""
+    out = dict(mapping)
+    for copy in range(1, scale):
+        for key, terms in mapping.items():
+            out[f"{key} v{copy}" if " " in key else f"{key}{copy}"] = terms
+    return out
+
+
+def legacy_expander(vocabulary: Dict, synonyms: Dict, concepts: Dict) -> Callable[[str], List[str]]:
+    """The pre-automaton algorithm, minus logging."""
+    all_maps = {**vocabulary, **synonyms}
+    phrases = sorted([k for k in all_maps if " " in k], key=len, reverse=True)
+
+    def expand(query: str) -> List[str]:
+        lower_q = query.lower()
+        expansions: Set[str] = set()
+        for phrase in phrases:
+            if phrase in lower_q:
+                expansions.update(all_maps.get(phrase, []))
+        tokens = re.findall(r"[a-z0-9]+", lower_q)
+        for token in tokens:
+            expansions.update(vocabulary.get(token, []))
+            expansions.update(synonyms.get(token, []))
+        for term in list(expansions) + tokens:
+            expansions.update(concepts.get(term, []))
+        expansions.discard("")
+        existing = set(tokens)
+        return sorted(t for t in expansions if t.lower() not in existing)
+
+    return expand
+
+
+def automaton_expander(matcher: ExpansionMatcher) -> Callable[[str], List[str]]:
+    def expand(query: str) -> List[str]:
+        tokens = tokenize_query(query)
+        terms, _ = matcher.match(tokens)
+        existing = set(tokens)
+        return sorted(t for t in terms if t.lower() not in existing)
+
+    return expand
+
+
+def time_queries(fn: Callable[[str], object], queries: List[str], repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t0) * 1_000_000)
+    samples.sort()
+    return {
+        "p50_us": round(statistics.median(samples), 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+        "mean_us": round(statistics.fmean(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query expansion substring scan vs. automaton")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--queries", type=int, default=200, help="Number of evaluation queries to time")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+
+    print(f"{'keys':>6} | {'engine':<12} | {'p50 us':>8} | {'p95 us':>8} | {'mean us':>8} | {'compile ms':>10}")
+    print("-" * 70)
+    for scale in args.scales:
+        vocabulary = synthesize(VOCABULARY_MAP, scale)
+        synonyms = synthesize(SYNONYM_MAP, scale)
+        concepts = synthesize(LEGAL_CONCEPT_MAP, scale)
+
+        t0 = time.perf_counter()
+        matcher = ExpansionMatcher(vocabulary, synonyms, concepts)
+        compile_ms = (time.perf_counter() - t0) * 1000
+
+        rows = {
+            "substring": (time_queries(legacy_expander(vocabulary, synonyms, concepts), queries, args.repeats), ""),
+            "automaton": (time_queries(automaton_expander(matcher), queries, args.repeats), f"{compile_ms:.1f}"),
+        }
+        for engine, (stats, compile_col) in rows.items():
+            print(
+                f"{matcher.num_keys:>6} | {engine:<12} | {stats['p50_us']:>8} | "
+                f"{stats['p95_us']:>8} | {stats['mean_us']:>8} | {compile_col:>10}"
+            )
+
+    # Memoized path as served (shipped dictionary); warm the cache first
+    for q in queries:
+        expand_query(q)
+    stats = time_queries(expand_query, queries, args.repeats)
+    print(f"\nexpand_query (memoized, incl. logging): p50 {stats['p50_us']} us | p95 {stats['p95_us']} us")
+
+
+if __name__ == "__main__":
+    main()
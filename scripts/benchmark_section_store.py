@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Corpus memory: list of section dicts (+ section -> dict map) vs. SectionStore.
+
+For each layout, reports the bytes allocated while building it (tracemalloc,
+after parsing data/ipc_clean.json, so the parse itself is not counted), the
+number of objects it adds to the garbage collector's lists, and the cost of
+fusing one hybrid query's candidates: documents for every BM25 and dense
+candidate, then RRF (before), against RRF over ids and documents for the
+fused top-k only (SectionStore; the only time it decodes strings).
+
+Usage:
+    python scripts/benchmark_section_store.py [--repeats 2000]
+"""
+
+import argparse
+import gc
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.retriever import DocumentRetriever
+from app.core.section_store import SectionStore
+from app.models import RetrievedDocument
+
+IPC_DATA_PATH = Path(__file__).parent.parent / "data" / "ipc_clean.json"
+
+
+def measure(build: Callable[[], object]) -> Tuple[object, int, int]:
+    """(result, bytes it still holds, gc-tracked objects it added)."""
+    gc.collect()
+    tracked = len(gc.get_objects())
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, len(gc.get_objects()) - tracked
+
+
+def build_dicts(raw: bytes) -> Tuple[List[Dict], Dict[str, Dict]]:
+    # The pre-SectionStore layout: DocumentRetriever.ipc_docs / ipc_by_section
+    docs = json.loads(raw)
+    return docs, {str(doc["section_number"]): doc for doc in docs}
+
+
+def build_store(raw: bytes) -> SectionStore:
+    # Parsed dicts are dropped once packed, as in DocumentRetriever._init_bm25
+    return SectionStore.from_docs(json.loads(raw))
+
+
+def time_us(fn: Callable[[], object], repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus memory: dicts vs. SectionStore")
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    raw = IPC_DATA_PATH.read_bytes()
+    (docs, by_section), dict_bytes, dict_objects = measure(lambda: build_dicts(raw))
+    store, store_bytes, store_objects = measure(lambda: build_store(raw))
+
+    print(f"Corpus: {len(store)} sections, {len(raw) / 1024:.0f} KiB of JSON\n")
+    print(f"{'layout':<22} | {'held KiB':>9} | {'gc objects':>10}")
+    print("-" * 48)
+    print(f"{'list[dict] + map':<22} | {dict_bytes / 1024:>9.1f} | {dict_objects:>10}")
+    print(f"{'SectionStore':<22} | {store_bytes / 1024:>9.1f} | {store_objects:>10}")
+    print(f"  (buffer + records: {store.nbytes() / 1024:.1f} KiB)")
+
+    rng = random.Random(0)
+    sparse = rng.sample(range(len(store)), settings.BM25_CANDIDATES)
+    dense = rng.sample(range(len(store)), settings.DENSE_CANDIDATES)
+    sparse_scores = [1.0 - i / len(sparse) for i in range(len(sparse))]
+    dense_scores = [0.8] * len(dense)
+
+    def dict_docs(ids: List[int], scores: List[float]) -> List[RetrievedDocument]:
+        return [
+            RetrievedDocument(
+                section=docs[i]["section_number"], title=docs[i].get("title"), text=docs[i].get("text"), score=score
+            )
+            for i, score in zip(ids, scores)
+        ]
+
+    def fuse_dicts():
+        # reciprocal_rank_fusion does not use the retriever instance
+        return DocumentRetriever.reciprocal_rank_fusion(
+            None,
+            dict_docs(dense, dense_scores),
+            dict_docs(sparse, sparse_scores),
+            k=settings.RRF_K,
+            top_k=settings.DEFAULT_TOP_K,
+        )
+
+    def fuse_store():
+        ids, scores = DocumentRetriever._fuse_hits(
+            (dense, dense_scores),
+            (sparse, sparse_scores),
+            k=settings.RRF_K,
+            top_k=settings.DEFAULT_TOP_K,
+        )
+        return store.documents(ids, scores)
+
+    assert [d.section for d in fuse_dicts()] == [d.section for d in fuse_store()]
+    dict_us = time_us(fuse_dicts, args.repeats)
+    store_us = time_us(fuse_store, args.repeats)
+    print(
+        f"\nFuse one hybrid query ({settings.BM25_CANDIDATES} + {settings.DENSE_CANDIDATES} candidates "
+        f"-> top {settings.DEFAULT_TOP_K}, median):"
+    )
+    print(f"  documents for every candidate:    {dict_us:>7.1f} us")
+    print(f"  ids, documents for top-k only:    {store_us:>7.1f} us")
+
+if __name__ == "__main__":
+    main()
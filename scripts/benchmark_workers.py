@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Memory per worker and throughput as the gunicorn worker count grows.
+
+Starts `gunicorn -c gunicorn.conf.py app.main:app` once per worker count,
+waits until every worker answers, and reads each process's memory from
+/proc/<pid>/smaps_rollup (Linux):
+
+    RSS   resident pages, counting shared ones in full
+    USS   pages private to the process (what a worker really costs)
+    PSS   shared pages split evenly between their users; summed over the
+          master and workers it is the total footprint of the deployment
+
+With --token, POST /api/query is driven at --concurrency before memory is
+read (reading the corpus is what would un-share copy-on-write pages) and
+req/s is reported. The server needs its usual environment (.env: Redis,
+Qdrant, Groq); raise RATE_LIMIT_PER_MINUTE and RATE_LIMIT_TOKENS_PER_MINUTE
+first, as all requests share one user.
+
+--compare also runs every worker count with GUNICORN_PRELOAD=0 (each
+worker loads its own corpus and indexes).
+
+Usage:
+    python scripts/benchmark_workers.py [--workers 1 2 4] [--token <jwt>]
+        [--concurrency 16] [--requests 64] [--port 8100] [--compare]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+QUERIES = [
+    "What is the punishment for murder?",
+    "Explain criminal breach of trust",
+    "What is the difference between theft and extortion?",
+    "Is attempt to commit suicide punishable?",
+    "What is the punishment for cheating?",
+    "Define culpable homicide",
+]
+
+
+def smaps_rollup(pid: int) -> Dict[str, int]:
+    """Memory counters of one process in KiB."""
+    values: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def worker_pids(master_pid: int) -> List[int]:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children", "r") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def start_server(workers: int, port: int, preload: bool) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(proc: subprocess.Popen, url: str, workers: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode} (run it by hand to see why)")
+        try:
+            if len(worker_pids(proc.pid)) == workers and httpx.get(f"{url}/", timeout=1.0).status_code == 200:
+                # Every worker has finished its lifespan once all of them accept
+                time.sleep(2.0)
+                return
+        except (httpx.HTTPError, OSError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{workers} worker(s) not ready after {timeout:.0f}s")
+
+
+async def drive_load(url: str, token: str, concurrency: int, total: int) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=120.0,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as client:
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/api/query",
+                        json={"user_id": "benchmark", "query": QUERIES[i % len(QUERIES)]},
+                    )
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - t0
+
+    return {
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def run_one(workers: int, preload: bool, args) -> Dict[str, object]:
+    url = f"http://127.0.0.1:{args.port}"
+    proc = start_server(workers, args.port, preload)
+    try:
+        wait_ready(proc, url, workers, args.startup_timeout)
+        load: Optional[Dict[str, float]] = None
+        if args.token:
+            load = asyncio.run(drive_load(url, args.token, args.concurrency, args.requests))
+
+        master = smaps_rollup(proc.pid)
+        children = [smaps_rollup(pid) for pid in worker_pids(proc.pid)]
+        return {
+            "workers": workers,
+            "preload": preload,
+            "master_rss": master["rss"],
+            "worker_rss": statistics.mean(c["rss"] for c in children),
+            "worker_uss": statistics.mean(c["uss"] for c in children),
+            "total_pss": master["pss"] + sum(c["pss"] for c in children),
+            "load": load,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def mib(kib: float) -> str:
+    return f"{kib / 1024:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS per worker and req/s vs. gunicorn worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--token", default=None, help="Supabase access token; enables the load phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--compare", action="store_true", help="Also run without preload_app")
+    args = parser.parse_args()
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        sys.exit("[ERROR] needs Linux /proc/<pid>/smaps_rollup")
+
+    modes = [True, False] if args.compare else [True]
+    print(
+        f"{'workers':>7} | {'preload':>7} | {'master RSS':>10} | {'worker RSS':>10} | "
+        f"{'worker USS':>10} | {'total PSS':>9} | {'req/s':>7} | {'p50 ms':>8}"
+    )
+    print("-" * 91)
+    for preload in modes:
+        for workers in args.workers:
+            row = run_one(workers, preload, args)
+            load = row["load"] or {}
+            print(
+                f"{workers:>7} | {'yes' if preload else 'no':>7} | {mib(row['master_rss']):>10} | "
+                f"{mib(row['worker_rss']):>10} | {mib(row['worker_uss']):>10} | "
+                f"{mib(row['total_pss']):>9} | {load.get('rps', '-'):>7} | {load.get('p50_ms', '-'):>8}"
+            )
+    print("\nMemory in MiB; worker columns are per-worker means.")
+
+
+if __name__ == "__main__":
+    main()
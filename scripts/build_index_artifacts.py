@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Builds the prebuilt retrieval artifacts loaded by the API at startup.
+
+Artifacts:
+- data/ipc_bm25.idx   BM25 inverted index (mmap-friendly, corpus-checksummed)
+- data/ipc_tokens.json  per-section part boundaries and token counts for
+  the context packer (corpus-checksummed)
+- data/ipc_vectors.npy (+ .json)  dense snapshot of the Qdrant collection,
+  only with --dense (needs QDRANT_URL / QDRANT_API_KEY)
+
+Run after any change to data/ipc_clean.json (and with --dense after
+re-running scripts/index_data.py). The API falls back to an in-process
+build / Qdrant when an artifact is missing or stale, so this is an
+optimization, not a requirement.
+
+Usage:
+    python scripts/build_index_artifacts.py [--dense]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.core.bm25_index import BM25Index, corpus_checksum
+from app.core.context_packer import TOKEN_COUNTS_PATH, build_token_counts
+from app.core.dense_index import LocalDenseIndex
+from app.utils import setup_logging, get_logger
+
+setup_logging()
+logger = get_logger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+IPC_DATA_PATH = DATA_DIR / "ipc_clean.json"
+BM25_INDEX_PATH = DATA_DIR / "ipc_bm25.idx"
+DENSE_VECTORS_PATH = DATA_DIR / "ipc_vectors.npy"
+
+
+def build_bm25(raw_corpus: bytes) -> None:
+    t0 = time.perf_counter()
+    docs = json.loads(raw_corpus)
+    index = BM25Index.build_from_docs(docs)
+    index.save(BM25_INDEX_PATH, corpus_checksum=corpus_checksum(raw_corpus))
+    logger.info(
+        "bm25_artifact_built",
+        path=str(BM25_INDEX_PATH),
+        bytes=BM25_INDEX_PATH.stat().st_size,
+        build_ms=int((time.perf_counter() - t0) * 1000),
+    )
+
+
+def build_token_counts_artifact(raw_corpus: bytes) -> None:
+    t0 = time.perf_counter()
+    artifact = build_token_counts(json.loads(raw_corpus), corpus_checksum(raw_corpus))
+    with open(TOKEN_COUNTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    logger.info(
+        "token_counts_artifact_built",
+        path=str(TOKEN_COUNTS_PATH),
+        sections=len(artifact["sections"]),
+        tokens=sum(part[3] for entry in artifact["sections"].values() for part in entry["parts"]),
+        build_ms=int((time.perf_counter() - t0) * 1000),
+    )
+
+
+def export_dense() -> None:
+    from qdrant_client import QdrantClient
+
+    t0 = time.perf_counter()
+    client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY, timeout=30.0)
+    index = LocalDenseIndex.from_qdrant(
+        client, settings.QDRANT_COLLECTION_NAME, model=settings.EMBEDDING_MODEL
+    )
+    index.save(DENSE_VECTORS_PATH)
+    logger.info(
+        "dense_snapshot_exported",
+        path=str(DENSE_VECTORS_PATH),
+        rows=len(index.sections),
+        export_ms=int((time.perf_counter() - t0) * 1000),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build prebuilt retrieval artifacts")
+    parser.add_argument("--dense", action="store_true", help="Also export the Qdrant vectors snapshot")
+    args = parser.parse_args()
+
+    if not IPC_DATA_PATH.exists():
+        raise FileNotFoundError(f"Missing IPC data file: {IPC_DATA_PATH}")
+
+    raw_corpus = IPC_DATA_PATH.read_bytes()
+    build_bm25(raw_corpus)
+    build_token_counts_artifact(raw_corpus)
+    if args.dense:
+        export_dense()
+
+    print("\n[SUCCESS] Index artifacts built")
+    print(f"BM25 index: {BM25_INDEX_PATH}")
+    print(f"Token counts: {TOKEN_COUNTS_PATH}")
+    if args.dense:
+        print(f"Dense snapshot: {DENSE_VECTORS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Pre-generates the canonical "What is Section N of IPC?" answer for every
+section in data/ipc_clean.json and writes data/canonical_answers.json.
+
+Each answer is generated exactly as /api/query would: section lookup,
+context expansion, then LLMChain.generate_answer with the live prompt.
+The artifact header pins the model, prompt version and corpus checksum;
+the API ignores the file when any of them changes.
+
+Resumable: entries already in the artifact (same header, same context
+sections) are skipped, and progress is checkpointed every few answers and
+on Ctrl-C. Rate-limit aware: calls are paced (--min-interval), and on
+repeated rate-limit errors (e.g. the Groq daily token cap) the run
+checkpoints and stops so it can be resumed later.
+
+Usage:
+    python scripts/generate_canonical_answers.py [--sections 302 420]
+        [--limit 100] [--min-interval 2.0] [--checkpoint-every 10] [--restart]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.canonical_answers import (
+    CANONICAL_ANSWERS_PATH,
+    artifact_header,
+    canonical_question,
+)
+from app.core.context_expander import get_context_expander
+from app.core.groq_pool import KeyPoolExhausted, Priority, is_rate_limit_error
+from app.core.llm_chain import get_llm_chain
+from app.core.retriever import get_retriever
+from app.utils import setup_logging, get_logger, LLMError
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+def load_existing(header: Dict, restart: bool) -> Dict[str, Dict]:
+    if restart or not CANONICAL_ANSWERS_PATH.exists():
+        return {}
+    with open(CANONICAL_ANSWERS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if any(data.get(k) != v for k, v in header.items()):
+        print("[INFO] Existing artifact was built for another model/prompt/corpus — regenerating")
+        return {}
+    return data.get("answers", {})
+
+
+def save(header: Dict, answers: Dict[str, Dict]) -> None:
+    data = dict(header, generated_at=datetime.now().isoformat(), answers=answers)
+    tmp_path = CANONICAL_ANSWERS_PATH.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, CANONICAL_ANSWERS_PATH)
+
+
+def is_rate_limit(e: LLMError) -> bool:
+    """The error LLMChain wrapped: a Groq 429, or the key pool giving up waiting for headroom."""
+    cause = e.__context__ or e
+    return isinstance(cause, KeyPoolExhausted) or is_rate_limit_error(cause)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate canonical per-section answers")
+    parser.add_argument("--sections", nargs="+", help="Only these sections (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="Max new answers this run")
+    parser.add_argument("--min-interval", type=float, default=2.0, help="Seconds between LLM calls")
+    parser.add_argument("--cooldown", type=float, default=60.0, help="Wait after a rate-limit error")
+    parser.add_argument("--max-rate-limits", type=int, default=3, help="Consecutive rate limits before stopping")
+    parser.add_argument("--checkpoint-every", type=int, default=10)
+    parser.add_argument("--restart", action="store_true", help="Ignore the existing artifact")
+    args = parser.parse_args()
+
+    retriever = get_retriever()
+    expander = get_context_expander()
+    llm = get_llm_chain()
+
+    header = artifact_header(llm.model, llm.prompt_version, retriever.corpus_checksum)
+    answers = load_existing(header, args.restart)
+
+    sections: List[str] = args.sections or list(retriever.store.sections)
+    generated = skipped = failed = tokens = 0
+    consecutive_rate_limits = 0
+    last_call = 0.0
+
+    try:
+        for section in sections:
+            if args.limit is not None and generated >= args.limit:
+                break
+
+            if retriever.store.id_of(section) is None:
+                print(f"[WARN] Section {section}: not found in corpus")
+                failed += 1
+                continue
+
+            documents = expander.expand(retriever.search_by_sections([section]))
+            context_sections = [doc.section for doc in documents]
+            existing = answers.get(section)
+            if existing and sorted(existing["sections"]) == sorted(context_sections):
+                skipped += 1
+                continue
+
+            while True:
+                wait = args.min_interval - (time.monotonic() - last_call)
+                if wait > 0:
+                    time.sleep(wait)
+                last_call = time.monotonic()
+                try:
+                    answer = llm.generate_answer(
+                        query=canonical_question(section),
+                        documents=documents,
+                        priority=Priority.BACKGROUND,
+                    )
+                    consecutive_rate_limits = 0
+                    break
+                except LLMError as e:
+                    if not is_rate_limit(e):
+                        print(f"[WARN] Section {section}: {str(e)[:120]}")
+                        answer = None
+                        break
+                    consecutive_rate_limits += 1
+                    if consecutive_rate_limits >= args.max_rate_limits:
+                        raise
+                    print(f"[INFO] Rate limited — cooling down {args.cooldown:.0f}s")
+                    time.sleep(args.cooldown)
+
+            if answer is None:
+                failed += 1
+                continue
+
+            usage = llm.last_token_usage or {}
+            answers[section] = {
+                "answer": answer,
+                "sections": context_sections,
+                "usage": usage,
+                "generated_at": datetime.now().isoformat(),
+            }
+            generated += 1
+            tokens += usage.get("total_tokens", 0)
+            logger.info("canonical_answer_generated", section=section, tokens=usage.get("total_tokens"))
+
+            if generated % args.checkpoint_every == 0:
+                save(header, answers)
+
+    except LLMError:
+        print("[STOP] Still rate limited (daily cap?) — progress saved, re-run later to resume")
+    except KeyboardInterrupt:
+        print("\n[STOP] Interrupted — progress saved, re-run to resume")
+    finally:
+        save(header, answers)
+
+    print(f"\nGenerated: {generated} | Skipped (up to date): {skipped} | Failed: {failed}")
+    print(f"Tokens used this run: {tokens}")
+    print(f"Artifact: {CANONICAL_ANSWERS_PATH} ({len(answers)}/{len(retriever.store)} sections)")
+
+
+if __name__ == "__main__":
+    main()
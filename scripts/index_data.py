@@ -36,6 +36,7 @@ from tqdm import tqdm
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
+from app.core.dense_index import LocalDenseIndex
 from app.utils import setup_logging, get_logger
 
 setup_logging()
@@ -186,6 +187,8 @@ def index_documents(
     name = settings.QDRANT_COLLECTION_NAME
     points: List[PointStruct] = []
     indexed = 0
+    snapshot_vectors: List[List[float]] = []
+    snapshot_sections: List[str] = []
 
     for doc in tqdm(documents, desc="Indexing IPC sections"):
         embed_text = f"passage: {doc.get('title','')} {doc.get('text','')}".strip()
@@ -196,6 +199,9 @@ def index_documents(
             show_progress_bar=False,
         ).tolist()
 
+        snapshot_vectors.append(vector)
+        snapshot_sections.append(str(doc["section_number"]))
+
         points.append(
             PointStruct(
                 id=str(uuid.uuid4()),
@@ -226,6 +232,14 @@ def index_documents(
         indexed=indexed,
     )
 
+    # Same vectors as uploaded, for DENSE_BACKEND=local
+    snapshot_path = Path(__file__).parent.parent / "data" / "ipc_vectors.npy"
+    LocalDenseIndex(
+        LocalDenseIndex.normalize_rows(snapshot_vectors),
+        snapshot_sections,
+        model=settings.EMBEDDING_MODEL,
+    ).save(snapshot_path)
+
 
 # --------------------------------------------------
 # MAIN
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for POST /api/query against a running API.
+
+Sends --requests queries (from evaluation/test_queries_v2.json) at each
+concurrency level and reports throughput and latency. Run the server with a
+single worker to measure per-worker concurrency:
+
+    uvicorn app.main:app --workers 1 --port 8000
+
+Every request opens a new session, so chat history stays empty and the
+condenser is skipped — the measured path is retrieval + generation. All
+requests share one token, i.e. one user: raise RATE_LIMIT_PER_MINUTE and
+RATE_LIMIT_TOKENS_PER_MINUTE on the server first, or the limiter answers
+with 429s.
+
+Usage:
+    python scripts/load_test.py --token <supabase access token>
+        [--url http://localhost:8000] [--concurrency 1 4 16] [--requests 32]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+QUERIES_PATH = Path(__file__).parent.parent / "evaluation" / "test_queries_v2.json"
+
+
+def load_queries() -> List[str]:
+    with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data["queries"] if isinstance(data, dict) else data
+    return [q["query"] for q in items]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, int(len(ordered) * pct) - 1)]
+
+
+async def run_level(
+    client: httpx.AsyncClient, queries: List[str], concurrency: int, total: int
+) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/query",
+                    json={"user_id": "load-test", "query": queries[i % len(queries)]},
+                )
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - t0) * 1000)
+            except httpx.HTTPError:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else 0.0,
+        "p95_ms": round(percentile(latencies, 0.95), 1) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+async def main_async(args) -> None:
+    queries = load_queries()
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+
+    async with httpx.AsyncClient(
+        base_url=args.url, headers=headers, timeout=120.0, limits=limits
+    ) as client:
+        print(f"{'concurrency':>11} | {'req/s':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'errors':>6}")
+        print("-" * 53)
+        for concurrency in args.concurrency:
+            stats = await run_level(client, queries, concurrency, args.requests)
+            print(
+                f"{concurrency:>11} | {stats['rps']:>7} | {stats['p50_ms']:>8} | "
+                f"{stats['p95_ms']:>8} | {stats['errors']:>6}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for /api/query")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Supabase access token (Bearer)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Migrates chat sessions stored as one JSON string at session:{id} to the
+hash + list layout (session:{id}:meta, session:{id}:messages), then turns
+plain-set user_sessions:{user} indexes into sorted sets scored by last
+activity.
+
+The API migrates a legacy session or index lazily the first time it is read or
+written, so this is only needed to convert everything up front (e.g.
+before removing the lazy path). Each session moves in one Lua script call,
+keeping its remaining TTL; running the script twice is harmless.
+
+Usage:
+    python scripts/migrate_sessions.py [--dry-run] [--scan-count 500]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.chat_history import get_history_manager
+from app.utils import setup_logging, get_logger
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy JSON chat sessions")
+    parser.add_argument("--dry-run", action="store_true", help="Only count legacy sessions")
+    parser.add_argument("--scan-count", type=int, default=500, help="SCAN batch size hint")
+    args = parser.parse_args()
+
+    manager = get_history_manager()
+    client = manager.redis_client
+
+    t0 = time.perf_counter()
+    found = migrated = failed = 0
+    for key in client.scan_iter(match="session:*", count=args.scan_count):
+        # New-layout keys are session:{id}:meta / session:{id}:messages
+        if key.count(":") != 1:
+            continue
+        if client.type(key) != "string":
+            continue
+
+        found += 1
+        if args.dry_run:
+            continue
+
+        session_id = key.split(":", 1)[1]
+        try:
+            if manager.migrate_session(session_id):
+                migrated += 1
+        except Exception as e:
+            failed += 1
+            print(f"[WARN] {key}: {str(e)[:120]}")
+
+    indexes = converted = 0
+    for key in client.scan_iter(match="user_sessions:*", count=args.scan_count):
+        if client.type(key) != "set":
+            continue
+
+        indexes += 1
+        if args.dry_run:
+            continue
+
+        try:
+            if manager.migrate_user_index(key.split(":", 1)[1]):
+                converted += 1
+        except Exception as e:
+            failed += 1
+            print(f"[WARN] {key}: {str(e)[:120]}")
+
+    logger.info(
+        "session_migration_finished",
+        legacy_sessions=found,
+        migrated=migrated,
+        legacy_indexes=indexes,
+        converted_indexes=converted,
+        failed=failed,
+        dry_run=args.dry_run,
+        elapsed_ms=int((time.perf_counter() - t0) * 1000),
+    )
+    print(f"\nLegacy sessions: {found}  Legacy user indexes: {indexes}")
+    if not args.dry_run:
+        print(f"Migrated: {migrated}  Converted indexes: {converted}  Failed: {failed}")
+
+
+if __name__ == "__main__":
+    main()
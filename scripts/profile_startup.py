@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile: import time per module, time per initializer and time
+to the first accepted request.
+
+    imports        `python -X importtime -c "import app.main"` in a fresh
+                   interpreter: the total, the heaviest top-level packages
+                   (self time summed) and every app.* module (cumulative)
+    deferred       the heavy SDKs the app imports on first use (qdrant_client,
+                   groq, jose), each timed as its first import
+    initializers   the singletons the lifespan, the warmup and the first
+                   request build, in that order: Settings() validation,
+                   logging setup, corpus + BM25 load, expansion dictionary,
+                   context expander, answer prompt + Groq pool, canonical
+                   answers
+    accept         spawns `uvicorn app.main:app` and polls GET /; the time
+                   from spawn to the first 200 is time-to-first-accept,
+                   checked against COLD_START_BUDGET_SECONDS (exit status 1
+                   when over, as in tests/test_startup.py)
+
+The accept phase needs Redis, a hard requirement of the lifespan: REDIS_URL
+from .env, or --fake-redis to serve one from this process with fakeredis
+(requirements.dev.txt). --warmup also runs the startup warmup (app/warmup.py)
+here and prints its per-step timings; it needs the real remote services.
+
+Usage:
+    python scripts/profile_startup.py [--top 15] [--port 8200] [--runs 3]
+        [--fake-redis] [--warmup] [--skip-accept]
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFERRED_IMPORTS = ["qdrant_client", "groq", "jose.jwt"]
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+# ---------------------------------------------------------------------------
+# Imports
+# ---------------------------------------------------------------------------
+def import_times() -> List[Tuple[str, int, int, int]]:
+    """(module, self µs, cumulative µs, depth) for `import app.main` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"[ERROR] import app.main failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return rows
+
+
+def print_imports(rows: List[Tuple[str, int, int, int]], top: int) -> None:
+    total = next(cumulative for module, _, cumulative, _ in rows if module == "app.main")
+    print(f"\nimport app.main: {total / 1000:.0f} ms ({len(rows)} modules)")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        packages[module.split(".")[0]] += self_us
+    print(f"\n{'package':<28} | {'self ms':>8}")
+    print("-" * 39)
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<28} | {self_us / 1000:>8.1f}")
+
+    print(f"\n{'app module':<36} | {'self ms':>8} | {'cumul. ms':>9}")
+    print("-" * 59)
+    for module, self_us, cumulative, _ in rows:
+        if module == "app" or module.startswith("app."):
+            print(f"{module:<36} | {self_us / 1000:>8.1f} | {cumulative / 1000:>9.1f}")
+
+
+# ---------------------------------------------------------------------------
+# Deferred imports and initializers (this process)
+# ---------------------------------------------------------------------------
+def timed(work: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    work()
+    return (time.perf_counter() - started) * 1000
+
+
+def initializers() -> List[Tuple[str, Callable[[], object]]]:
+    from app.config import Settings
+    from app.core.canonical_answers import get_canonical_store
+    from app.core.context_expander import get_context_expander
+    from app.core.llm_chain import get_llm_chain
+    from app.core.query_expander import expand_query
+    from app.core.retriever import get_retriever
+    from app.utils import setup_logging
+    from app.warmup import WARMUP_QUERY
+
+    return [
+        ("Settings() validation", Settings),
+        ("setup_logging", setup_logging),
+        ("get_retriever (corpus, BM25, dense)", get_retriever),
+        ("expansion dictionary + matcher", lambda: expand_query(WARMUP_QUERY)),
+        ("get_context_expander", get_context_expander),
+        ("get_llm_chain (packer, Groq pool)", get_llm_chain),
+        ("get_canonical_store", get_canonical_store),
+    ]
+
+
+def print_in_process(warmup: bool) -> None:
+    started = time.perf_counter()
+    import app.main  # noqa: F401
+
+    print(f"\nimport app.main (this process): {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    print(f"\n{'deferred import':<36} | {'ms':>8}")
+    print("-" * 47)
+    for module in DEFERRED_IMPORTS:
+        print(f"{module:<36} | {timed(lambda: importlib.import_module(module)):>8.1f}")
+
+    print(f"\n{'initializer':<36} | {'ms':>8}")
+    print("-" * 47)
+    for name, work in initializers():
+        print(f"{name:<36} | {timed(work):>8.1f}")
+
+    if warmup:
+        from app.config import settings
+        from app.warmup import WarmupState
+
+        state = WarmupState(step_timeout_seconds=settings.WARMUP_STEP_TIMEOUT_SECONDS)
+        asyncio.run(state.run())
+        print(f"\n{'warmup step':<36} | {'ms':>8} | status")
+        print("-" * 56)
+        for name, step in state.steps.items():
+            print(f"{name:<36} | {step['ms']:>8} | {step['status']}")
+        print(f"{'total':<36} | {state.elapsed_ms:>8} |")
+
+
+# ---------------------------------------------------------------------------
+# Time to first accept
+# ---------------------------------------------------------------------------
+def time_to_first_accept(port: int, env: Dict[str, str], timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn to its first 200 on GET /."""
+    url = f"http://127.0.0.1:{port}/"
+    stderr = tempfile.TemporaryFile(mode="w+")
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=stderr,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                stderr.seek(0)
+                raise RuntimeError(f"uvicorn exited with {proc.returncode}:\n{stderr.read()[-2000:]}")
+            try:
+                if httpx.get(url, timeout=1.0).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"no response on {url} after {timeout:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        stderr.close()
+
+
+def start_fake_redis():
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_accept(port: int, runs: int, fake_redis: bool) -> bool:
+    from app.config import settings
+
+    env = dict(os.environ)
+    server = None
+    if fake_redis:
+        server = start_fake_redis()
+        env["REDIS_URL"] = f"redis://127.0.0.1:{server.server_address[1]}/0"
+    try:
+        seconds = [time_to_first_accept(port, env) for _ in range(runs)]
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    best = min(seconds)
+    budget = settings.COLD_START_BUDGET_SECONDS
+    print(f"\ntime to first accept: {', '.join(f'{s:.2f}' for s in seconds)} s")
+    print(f"best {best:.2f} s, budget {budget:.2f} s: {'OK' if best <= budget else 'OVER BUDGET'}")
+    return best <= budget
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, initializer and time-to-first-accept profile")
+    parser.add_argument("--top", type=int, default=15, help="Heaviest packages to list")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--runs", type=int, default=3, help="Server launches for time-to-first-accept")
+    parser.add_argument("--fake-redis", action="store_true", help="Serve Redis with fakeredis for the accept phase")
+    parser.add_argument("--warmup", action="store_true", help="Also run the startup warmup and time its steps")
+    parser.add_argument("--skip-accept", action="store_true", help="Skip the server launches")
+    args = parser.parse_args()
+
+    print_imports(import_times(), args.top)
+    within_budget: Optional[bool] = None
+    if not args.skip_accept:
+        # Before this process imports the app: the launches measure a cold server
+        within_budget = print_accept(args.port, args.runs, args.fake_redis)
+    print_in_process(args.warmup)
+
+    if within_budget is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
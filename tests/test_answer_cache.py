@@ -0,0 +1,130 @@
+"""
+Tests for the semantic answer cache.
+
+Run with: pytest tests/test_answer_cache.py
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.core.answer_cache import AnswerCache
+
+
+class AsyncDictRedis:
+    """Minimal in-memory stand-in for the Redis hash calls the cache makes."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    async def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    async def expire(self, key, ttl):
+        pass
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def _cache(**kwargs):
+    params = dict(
+        model="m", embedding_model="e1", prompt_version="p1", corpus_checksum="c1", similarity_threshold=0.95
+    )
+    params.update(kwargs)
+    return AnswerCache(redis_client=params.pop("redis_client", AsyncDictRedis()), **params)
+
+
+class TestAnswerCache:
+    """Test suite for AnswerCache."""
+
+    def test_exact_and_near_duplicate_hits(self):
+        """Normalized repeats hit exactly; close paraphrases hit by similarity."""
+        cache = _cache()
+        sections = ["379", "378"]
+        usage = {"total_tokens": 1500}
+
+        async def run():
+            await cache.store("punishment for theft", sections, _unit([1, 0, 0]), "ANSWER", usage)
+            exact = await cache.lookup("Punishment  for THEFT", ["378", "379"], None)
+            similar = await cache.lookup("penalty for theft", sections, _unit([1, 0.1, 0]))
+            far = await cache.lookup("theft definition", sections, _unit([1, 1, 0]))
+            return exact, similar, far
+
+        exact, similar, far = asyncio.run(run())
+        assert exact["answer"] == "ANSWER" and exact["match"] == "exact"
+        assert similar["answer"] == "ANSWER" and similar["match"] == "similar"
+        assert far is None
+
+        stats = cache.stats()
+        assert stats["exact_hits"] == 1 and stats["similar_hits"] == 1 and stats["misses"] == 1
+        assert stats["saved_tokens"] == 3000
+
+    def test_context_change_misses(self):
+        """A different section set, prompt version, corpus or embedding model never reuses an answer."""
+        redis_client = AsyncDictRedis()
+        vector = _unit([1, 0, 0])
+
+        async def run():
+            await _cache(redis_client=redis_client).store("q", ["302"], vector, "A", None)
+            return [
+                await _cache(redis_client=redis_client).lookup("q", ["302", "300"], vector),
+                await _cache(redis_client=redis_client, prompt_version="p2").lookup("q", ["302"], vector),
+                await _cache(redis_client=redis_client, corpus_checksum="c2").lookup("q", ["302"], vector),
+                await _cache(redis_client=redis_client, embedding_model="e2").lookup("q", ["302"], vector),
+                await _cache(redis_client=redis_client).lookup("q", ["302"], vector),
+            ]
+
+        results = asyncio.run(run())
+        assert results[:4] == [None, None, None, None]
+        assert results[4]["answer"] == "A"
+
+    def test_bucket_is_bounded(self):
+        """Oldest entries are evicted past max_per_bucket."""
+        redis_client = AsyncDictRedis()
+        cache = _cache(redis_client=redis_client, max_per_bucket=2)
+
+        async def run():
+            for i in range(3):
+                await cache.store(f"question {i}", ["1"], _unit([1, i, 0]), f"A{i}", None)
+            return await cache.lookup("question 0", ["1"], None)
+
+        assert asyncio.run(run()) is None
+        assert len(redis_client.hashes[cache.bucket_key(["1"])]) == 2
+
+    def test_bad_entries_are_misses(self):
+        """Corrupt entries and vectors of another dimension are skipped, not raised."""
+        redis_client = AsyncDictRedis()
+        cache = _cache(redis_client=redis_client)
+        sections = ["379"]
+
+        async def run():
+            await cache.store("punishment for theft", sections, _unit([1, 0, 0, 0]), "OLD", None)
+            await cache.store("theft penalty", sections, _unit([1, 0, 0]), "ANSWER", None)
+            redis_client.hashes[cache.bucket_key(sections)]["corrupt"] = "{not json"
+            return [
+                await cache.lookup("penalty for theft", sections, _unit([1, 0.1, 0])),
+                await cache.lookup("punishment for theft", sections, _unit([0, 1, 0])),
+            ]
+
+        similar, exact = asyncio.run(run())
+        assert similar["answer"] == "ANSWER" and similar["match"] == "similar"
+        assert exact["answer"] == "OLD" and exact["match"] == "exact"
+        assert cache.stats()["errors"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
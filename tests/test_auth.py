@@ -0,0 +1,168 @@
+"""
+Tests for JWT authentication: verified-token cache and JWKS refresh.
+
+Run with: pytest tests/test_auth.py
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import HTTPException
+from jose import jwk, jwt
+from starlette.requests import Request
+
+import app.dependencies as deps
+from app.dependencies import AuthStats, JWKSKeyManager, VerifiedTokenCache
+
+SUPABASE_URL = "https://project.supabase.co"
+
+
+def _signing_key():
+    private = ec.generate_private_key(ec.SECP256R1())
+    pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public = jwk.construct(pem, algorithm="ES256").public_key().to_dict()
+    return pem, public
+
+
+class FakeJWKS:
+    """JWKS endpoint with an ETag; counts full fetches and 304s."""
+
+    def __init__(self):
+        self.keys = {}
+        self.version = 0
+        self.fetches = 0
+        self.not_modified = 0
+
+    def publish(self, kid: str):
+        pem, public = _signing_key()
+        self.keys[kid] = {**public, "kid": kid, "alg": "ES256"}
+        self.version += 1
+        return pem
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        etag = f'"v{self.version}"'
+        if request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return httpx.Response(304, headers={"etag": etag})
+        self.fetches += 1
+        return httpx.Response(
+            200,
+            json={"keys": list(self.keys.values())},
+            headers={"etag": etag, "cache-control": "public, max-age=600"},
+        )
+
+
+def _token(pem: bytes, kid: str, sub: str = "user-1", exp_in: int = 3600) -> str:
+    claims = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + exp_in}
+    return jwt.encode(claims, pem, algorithm="ES256", headers={"kid": kid})
+
+
+def _request(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    endpoint = FakeJWKS()
+    manager = JWKSKeyManager(SUPABASE_URL, http_client=httpx.AsyncClient(transport=httpx.MockTransport(endpoint.handler)))
+    monkeypatch.setattr(deps, "jwks_manager", manager)
+    monkeypatch.setattr(deps, "token_cache", VerifiedTokenCache(max_entries=8))
+    monkeypatch.setattr(deps, "auth_stats", AuthStats())
+    return endpoint, manager
+
+
+class TestGetCurrentUser:
+    """Test suite for the get_current_user dependency."""
+
+    def test_second_request_served_from_cache(self, jwks):
+        endpoint, _ = jwks
+        token = _token(endpoint.publish("k1"), "k1")
+
+        async def run():
+            first, second = _request(token), _request(token)
+            users = [await deps.get_current_user(first), await deps.get_current_user(second)]
+            return users, second.state.auth_ms
+
+        users, auth_ms = asyncio.run(run())
+        assert users == ["user-1", "user-1"]
+        assert deps.auth_stats.stats()["counts"] == {"cache_hit": 1, "verified": 1, "rejected": 0}
+        assert auth_ms >= 0
+        assert endpoint.fetches == 1
+
+    def test_invalid_tokens_rejected_and_not_cached(self, jwks):
+        endpoint, _ = jwks
+        pem = endpoint.publish("k1")
+        forged = _token(_signing_key()[0], "k1")
+
+        for token in (forged, _token(pem, "k1", exp_in=-10), _token(pem, "k1", sub="")):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(deps.get_current_user(_request(token)))
+            assert exc.value.status_code == 401
+        assert len(deps.token_cache) == 0
+        assert deps.auth_stats.stats()["counts"]["rejected"] == 3
+
+    def test_withdrawn_key_stops_cache_hits(self, jwks):
+        """Once a refresh drops the kid, its cached tokens are verified again (and fail)."""
+        endpoint, manager = jwks
+        token = _token(endpoint.publish("k1"), "k1")
+        asyncio.run(deps.get_current_user(_request(token)))
+
+        del endpoint.keys["k1"]
+        endpoint.version += 1
+        asyncio.run(manager.refresh())
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(deps.get_current_user(_request(token)))
+        assert exc.value.status_code == 401
+
+
+class TestJWKSKeyManager:
+    """Test suite for JWKS fetching and refresh."""
+
+    def test_conditional_refresh_honors_etag_and_max_age(self, jwks):
+        endpoint, manager = jwks
+        endpoint.publish("k1")
+
+        asyncio.run(manager.refresh())
+        asyncio.run(manager.refresh())
+        assert (endpoint.fetches, endpoint.not_modified) == (1, 1)
+        assert manager.has_key("k1")
+        assert 590 < manager.stats()["next_refresh_in_s"] <= 600
+
+    def test_unknown_kid_fetches_once(self, jwks):
+        """Concurrent requests for a freshly rotated kid share one fetch."""
+        endpoint, manager = jwks
+        endpoint.publish("k1")
+        asyncio.run(manager.refresh())
+        manager._last_fetched -= 60  # past the refresh cooldown
+
+        endpoint.publish("k2")
+
+        async def run():
+            return await asyncio.gather(*(manager.get_key("k2") for _ in range(5)))
+
+        keys = asyncio.run(run())
+        assert len({id(key) for key in keys}) == 1
+        assert endpoint.fetches == 2
+
+    def test_verified_token_cache_expires_at_exp(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        cache.put("a", "user-a", "k1", time.time() + 60)
+        cache.put("b", "user-b", "k1", time.time() - 1)
+        cache.put("c", "user-c", "k1", time.time() + 60)
+
+        assert cache.get("a") is None  # evicted (LRU bound)
+        assert cache.get("b") is None  # expired
+        assert cache.get("c") == ("user-c", "k1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Tests for the inverted-index BM25 engine.
+
+Run with: pytest tests/test_bm25_index.py
+"""
+
+import pytest
+
+from app.core.bm25_index import BM25Index, corpus_checksum
+from app.core.retriever import get_retriever
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+PARITY_QUERIES = [
+    "theft punishment",
+    "murder culpable homicide death",
+    "section 420 cheating dishonestly inducing delivery of property",
+    "dowry death dowry death wife husband cruelty",
+    "criminal breach of trust by public servant",
+    "zzz unknown tokens only",
+    "",
+]
+
+
+class TestBM25Index:
+    """Test suite for BM25Index."""
+
+    def _corpus_tokens(self):
+        retriever = get_retriever()
+        return [
+            retriever._tokenize_text(
+                f"section {doc.get('section_number', '')} {doc.get('title', '')} {doc.get('text', '')}"
+            )
+            for doc in retriever.store.iter_dicts()
+        ]
+
+    def test_scores_match_bm25okapi(self):
+        """Per-document scores are identical to rank_bm25.BM25Okapi."""
+        corpus = self._corpus_tokens()
+        reference = rank_bm25.BM25Okapi(corpus)
+        index = BM25Index.build(corpus)
+        retriever = get_retriever()
+
+        for query in PARITY_QUERIES:
+            tokens = retriever._tokenize_text(query)
+            expected = reference.get_scores(tokens)
+            actual = index.score(tokens)
+            assert actual.tolist() == expected.tolist(), query
+
+    def test_top_k_matches_full_sort(self):
+        """Top-k selection matches a stable descending sort, including ties."""
+        corpus = self._corpus_tokens()
+        reference = rank_bm25.BM25Okapi(corpus)
+        index = BM25Index.build(corpus)
+        retriever = get_retriever()
+
+        for query in PARITY_QUERIES:
+            tokens = retriever._tokenize_text(query)
+            scores = reference.get_scores(tokens)
+            expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+
+            for k in (1, 5, 20, 100):
+                doc_ids, top_scores = index.top_k(tokens, k)
+                assert doc_ids.tolist() == expected[:k], (query, k)
+                assert top_scores.tolist() == [scores[i] for i in expected[:k]]
+
+    def test_bm25_search_normalizes_scores(self):
+        """bm25_search keeps scores in [0, 1] with the best hit at 1.0."""
+        retriever = get_retriever()
+        results = retriever.bm25_search("theft punishment", top_k=5)
+
+        assert len(results) == 5
+        assert results[0].score == pytest.approx(1.0)
+        assert all(0.0 <= r.score <= 1.0 for r in results)
+
+    def test_artifact_roundtrip(self, tmp_path):
+        """A saved artifact memory-maps back to an index with identical rankings."""
+        corpus = self._corpus_tokens()
+        index = BM25Index.build(corpus)
+        path = tmp_path / "bm25.idx"
+        index.save(path, corpus_checksum=corpus_checksum(b"corpus"))
+
+        loaded = BM25Index.load(path, expected_checksum=corpus_checksum(b"corpus"))
+        assert loaded is not None
+        assert loaded.vocab == index.vocab
+
+        retriever = get_retriever()
+        for query in PARITY_QUERIES:
+            tokens = retriever._tokenize_text(query)
+            assert loaded.score(tokens).tolist() == index.score(tokens).tolist()
+
+    def test_stale_or_missing_artifact_returns_none(self, tmp_path):
+        """load() signals a rebuild when the corpus checksum differs or the file is absent."""
+        index = BM25Index.build([["theft"], ["murder", "theft"]])
+        path = tmp_path / "bm25.idx"
+        index.save(path, corpus_checksum=corpus_checksum(b"old corpus"))
+
+        assert BM25Index.load(path, expected_checksum=corpus_checksum(b"new corpus")) is None
+        assert BM25Index.load(tmp_path / "missing.idx") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
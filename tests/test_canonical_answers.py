@@ -0,0 +1,68 @@
+"""
+Tests for the pre-generated canonical answers artifact.
+
+Run with: pytest tests/test_canonical_answers.py
+"""
+
+import json
+
+import pytest
+
+from app.core.canonical_answers import (
+    CanonicalAnswerStore,
+    artifact_header,
+    match_canonical_section,
+)
+
+
+def _write_artifact(path, **header_overrides):
+    header = artifact_header("m", "p1", "c1")
+    header.update(header_overrides)
+    data = dict(header, answers={"302": {"answer": "A302", "sections": ["302", "300"], "usage": {}}})
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+class TestCanonicalQueryMatching:
+    """Test suite for recognizing bare section questions."""
+
+    @pytest.mark.parametrize("query,section", [
+        ("What is Section 302?", "302"),
+        ("what is section 302 of IPC", "302"),
+        ("explain sec 420", "420"),
+        ("Section 498a", "498A"),
+        ("tell me about IPC section 376?", "376"),
+    ])
+    def test_bare_questions_match(self, query, section):
+        assert match_canonical_section(query) == section
+
+    @pytest.mark.parametrize("query", [
+        "Is section 302 bailable?",
+        "what is section 302 and 304",
+        "punishment for section 302",
+    ])
+    def test_specific_questions_do_not_match(self, query):
+        assert match_canonical_section(query) is None
+
+
+class TestCanonicalAnswerStore:
+    """Test suite for loading and serving the artifact."""
+
+    def test_serves_only_matching_context(self, tmp_path):
+        """An entry is served only for the sections it was generated from."""
+        store = CanonicalAnswerStore.load(_write_artifact(tmp_path / "a.json"), "m", "p1", "c1")
+        assert store.get("302", ["300", "302"])["answer"] == "A302"
+        assert store.get("302", ["302"]) is None
+        assert store.get("420", ["420"]) is None
+
+    def test_stale_or_missing_artifact_is_ignored(self, tmp_path):
+        """A header mismatch or a missing file disables the store."""
+        path = _write_artifact(tmp_path / "a.json")
+        assert CanonicalAnswerStore.load(path, "m", "p2", "c1") is None
+        assert CanonicalAnswerStore.load(path, "m", "p1", "c2") is None
+        assert CanonicalAnswerStore.load(path, "other", "p1", "c1") is None
+        assert CanonicalAnswerStore.load(tmp_path / "missing.json", "m", "p1", "c1") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
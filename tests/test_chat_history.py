@@ -0,0 +1,136 @@
+"""
+Tests for the Redis chat history store.
+
+Run with: pytest tests/test_chat_history.py
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.chat_history import AsyncChatHistoryManager, ChatHistoryManager
+from app.utils import InvalidSessionError
+
+fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis[lua] (requirements.dev.txt)")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def manager(server):
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    return ChatHistoryManager(max_history_length=4, redis_client=client)
+
+
+class TestChatHistoryManager:
+    """Test suite for the hash + list session layout."""
+
+    def test_turns_append_and_trim(self, manager):
+        """A turn appends both messages; history keeps the last max_history_length."""
+        session_id = manager.create_session("alice")
+        for n in range(3):
+            manager.add_turn("alice", session_id, [("user", f"q{n}"), ("assistant", f"a{n}")])
+
+        history = manager.get_history("alice", session_id)
+        assert [m["content"] for m in history] == ["q1", "a1", "q2", "a2"]
+        assert history[0] == {"role": "user", "content": "q1"}
+
+        client = manager.redis_client
+        assert client.type(f"session:{session_id}:messages") == "list"
+        assert client.ttl(f"session:{session_id}:messages") > 0
+        assert client.hget(f"session:{session_id}:meta", "user_id") == "alice"
+
+    def test_reply_status_stored(self, manager):
+        """A reply cut short keeps its status marker; complete messages have none."""
+        session_id = manager.create_session("alice")
+        manager.add_turn("alice", session_id, [("user", "q"), ("assistant", "", "cancelled")])
+
+        assert manager.get_history("alice", session_id) == [
+            {"role": "user", "content": "q"},
+            {"role": "assistant", "content": "", "status": "cancelled"},
+        ]
+
+    def test_ownership_enforced(self, manager):
+        session_id = manager.create_session("alice")
+        with pytest.raises(InvalidSessionError, match="does not belong"):
+            manager.add_turn("mallory", session_id, [("user", "hi")])
+        with pytest.raises(InvalidSessionError, match="does not belong"):
+            manager.get_history("mallory", session_id)
+        with pytest.raises(InvalidSessionError, match="not found"):
+            manager.add_turn("alice", "missing", [("user", "hi")])
+        assert manager.get_history("alice", session_id) == []
+
+    def test_legacy_session_migrated_lazily(self, manager):
+        """A session:{id} JSON blob is converted on first access, keeping its TTL."""
+        client = manager.redis_client
+        legacy = {
+            "user_id": "alice",
+            "history": [{"role": "user", "content": f"m{n} — धारा"} for n in range(6)],
+            "created_at": "2024-01-01T00:00:00",
+            "last_activity": "2024-01-01T00:05:00",
+        }
+        client.setex("session:old", 600, json.dumps(legacy))
+        client.sadd("user_sessions:alice", "old")
+
+        history = manager.get_history("alice", "old")
+        assert [m["content"] for m in history] == [f"m{n} — धारा" for n in range(2, 6)]
+        assert not client.exists("session:old")
+        assert 0 < client.ttl("session:old:meta") <= 600
+
+        manager.add_turn("alice", "old", [("user", "next")])
+        assert manager.get_latest_session("alice")["history"][-1]["content"] == "next"
+        # The plain-set index became the sorted set on first read
+        assert client.type("user_sessions:alice") == "zset"
+        assert client.zrange("user_sessions:alice", 0, -1) == ["old"]
+
+    def test_sessions_ordered_by_activity(self, manager):
+        """Latest session and session pages follow last activity, not creation order."""
+        first, second, third = (manager.create_session("alice") for _ in range(3))
+        manager.add_turn("alice", first, [("user", "q"), ("assistant", "a")])
+
+        assert manager.get_latest_session("alice")["session_id"] == first
+
+        page = manager.list_sessions("alice", limit=2)
+        assert page["total"] == 3
+        assert [s["session_id"] for s in page["sessions"]] == [first, third]
+        assert page["sessions"][0]["message_count"] == 2
+        assert [s["session_id"] for s in manager.list_sessions("alice", limit=2, offset=2)["sessions"]] == [second]
+
+    def test_expired_sessions_reaped(self, manager):
+        client = manager.redis_client
+        live = manager.create_session("alice")
+        vanished = manager.create_session("alice")
+        client.delete(f"session:{vanished}:meta")
+        client.zadd("user_sessions:alice", {"long-expired": 1.0})
+
+        assert manager.get_latest_session("alice")["session_id"] == live
+        assert client.zrange("user_sessions:alice", 0, -1) == [live]
+        assert manager.list_sessions("alice")["total"] == 1
+
+    def test_async_manager_shares_layout(self, server, manager):
+        """Sessions written by the async manager read back through the sync one."""
+        async_manager = AsyncChatHistoryManager(
+            max_history_length=4,
+            redis_client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+        )
+
+        async def run():
+            session_id = await async_manager.create_session("bob")
+            await async_manager.add_turn("bob", session_id, [("user", "q"), ("assistant", "a")])
+            latest = await async_manager.get_latest_session("bob")
+            return session_id, latest
+
+        session_id, latest = asyncio.run(run())
+        assert latest == {
+            "session_id": session_id,
+            "history": [{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}],
+        }
+        assert manager.get_history("bob", session_id) == latest["history"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+Tests for token-budgeted context packing.
+
+Run with: pytest tests/test_context_packer.py
+"""
+
+import json
+
+import pytest
+
+from app.core.context_packer import ContextPacker, build_token_counts, count_tokens, split_parts
+from app.core.section_store import SectionStore
+from app.models import RetrievedDocument
+
+BODY = "Whoever commits theft shall be punished with imprisonment which may extend to three years."
+EXPLANATION = "Explanation 1.— A thing so long as it is attached to the earth is not the subject of theft."
+ILLUSTRATION = "Illustrations(a)A cuts down a tree on Z's ground with the intention of taking it. A has committed theft."
+
+DOCS = [
+    {"section_number": "378", "title": "Theft.—", "text": BODY + EXPLANATION + ILLUSTRATION},
+    {"section_number": "379", "title": "Punishment for theft.—", "text": "Whoever commits theft shall be punished."},
+    {"section_number": "464", "title": "Making a false document.—", "text": " ".join(["A person makes a false document."] * 60)},
+]
+
+
+def _doc(section: str) -> RetrievedDocument:
+    raw = next(d for d in DOCS if d["section_number"] == section)
+    return RetrievedDocument(section=section, title=raw["title"], text=raw["text"], score=0.5)
+
+
+@pytest.fixture
+def packer():
+    return ContextPacker.from_sections(SectionStore.from_docs(DOCS), build_token_counts(DOCS, "checksum")["sections"])
+
+
+class TestSplitParts:
+    """Test suite for section sub-part detection."""
+
+    def test_parts_cover_text_at_headings(self):
+        """Explanation / illustration headings start parts; the parts tile the text."""
+        text = DOCS[0]["text"]
+        parts = split_parts(text)
+        assert [kind for kind, _, _ in parts] == ["body", "explanation", "illustration"]
+        assert "".join(text[start:end] for _, start, end in parts) == text
+
+    def test_references_do_not_split(self):
+        """A mention such as "Explanation 1 to section 375" is not a heading."""
+        text = "For the purposes of this section, Explanation 1 to section 375 shall apply."
+        assert [kind for kind, _, _ in split_parts(text)] == ["body"]
+
+
+class TestContextPacker:
+    """Test suite for ContextPacker.pack."""
+
+    def test_everything_fits(self, packer):
+        packed = packer.pack([_doc("378"), _doc("379")], budget_tokens=1000)
+        assert packed.included == ["378", "379"]
+        assert packed.partial == [] and packed.dropped == []
+        assert packed.text.startswith("[Source 1]\nSection 378: Theft.—\n" + BODY + "\n" + EXPLANATION)
+        assert "[Source 2]\nSection 379" in packed.text
+
+    def test_whole_parts_by_priority(self, packer):
+        """Under pressure a section keeps its body and explanation, not its illustration."""
+        entry = packer.entries[0]
+        budget = entry["header"] + sum(part[3] for part in entry["parts"][:2])
+        packed = packer.pack([_doc("378")], budget_tokens=budget)
+        assert packed.partial == [{"section": "378", "kept": ["body", "explanation"], "omitted": ["illustration"]}]
+        assert ILLUSTRATION[:20] not in packed.text
+        assert packed.text.endswith(EXPLANATION)
+        assert packed.used_tokens == budget
+
+    def test_long_section_does_not_crowd_out_later_ones(self, packer):
+        """A section that does not fit is dropped and smaller later ones still go in."""
+        packed = packer.pack([_doc("378"), _doc("464"), _doc("379")], budget_tokens=120)
+        assert packed.dropped == ["464"]
+        assert "379" in packed.included
+        assert "[Source 2]\nSection 379" in packed.text
+        assert packed.used_tokens <= 120
+
+    def test_top_section_body_always_sent(self, packer):
+        packed = packer.pack([_doc("464"), _doc("379")], budget_tokens=20)
+        assert packed.included == ["464"]
+        assert packed.dropped == ["379"]
+        assert packed.used_tokens > 20
+
+    def test_unknown_text_is_counted_on_the_fly(self, packer):
+        """Text that is not the corpus text (e.g. a Qdrant payload) is split and counted live."""
+        doc = RetrievedDocument(section="378", title="Theft.—", text=BODY, score=1.0)
+        packed = packer.pack([doc], budget_tokens=1000)
+        assert packed.included == ["378"]
+        assert EXPLANATION not in packed.text
+
+    def test_stale_artifact_is_rebuilt(self, tmp_path):
+        path = tmp_path / "ipc_tokens.json"
+        path.write_text(json.dumps({**build_token_counts(DOCS, "old"), "sections": {}}))
+        packer = ContextPacker.load(path, SectionStore.from_docs(DOCS), corpus_checksum="new")
+        assert all(entry is not None for entry in packer.entries)
+        assert packer.entries[1]["parts"][0][3] == count_tokens(DOCS[1]["text"])
+
+
+class TestPromptContext:
+    """Test suite for reusing a packed context in the prompt."""
+
+    def test_prompt_uses_the_given_packed_context(self, monkeypatch):
+        """Generation sends the context the caller packed (and reported), without packing again."""
+        from app.core import llm_chain as llm_chain_module
+        from app.core.context_packer import PackedContext
+
+        def no_repack():
+            raise AssertionError("context packed twice")
+
+        monkeypatch.setattr(llm_chain_module, "get_context_packer", no_repack)
+        chain = llm_chain_module.LLMChain()
+        packed = PackedContext(text="[Source 1]\nSection 378: Theft.—", budget_tokens=1000)
+
+        messages = chain._build_messages("What is theft?", [_doc("378")], None, packed)
+        assert messages[-1]["content"].startswith("IPC CONTEXT:\n[Source 1]\nSection 378: Theft.—\n")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
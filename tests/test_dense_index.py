@@ -0,0 +1,78 @@
+"""
+Tests for the local exact dense index.
+
+Parity is checked against Qdrant's own search in local (":memory:") mode with
+the same COSINE configuration as the production collection.
+
+Run with: pytest tests/test_dense_index.py
+"""
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.core.dense_index import LocalDenseIndex
+
+DIM = 64
+NUM_POINTS = 300
+
+
+@pytest.fixture(scope="module")
+def qdrant_collection():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(NUM_POINTS, DIM)).astype(np.float32)
+    sections = [str(i + 1) for i in range(NUM_POINTS)]
+
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        collection_name="ipc_test",
+        vectors_config=VectorParams(size=DIM, distance=Distance.COSINE),
+    )
+    client.upsert(
+        collection_name="ipc_test",
+        points=[
+            PointStruct(id=i, vector=vectors[i].tolist(), payload={"section_number": sections[i]})
+            for i in range(NUM_POINTS)
+        ],
+    )
+    return client, rng
+
+
+class TestLocalDenseIndex:
+    """Test suite for LocalDenseIndex."""
+
+    def test_parity_with_qdrant(self, qdrant_collection):
+        """Top-k sections and scores match Qdrant's cosine search."""
+        client, rng = qdrant_collection
+        index = LocalDenseIndex.from_qdrant(client, "ipc_test")
+
+        for _ in range(20):
+            query = rng.normal(size=DIM).astype(np.float32)
+            query /= np.linalg.norm(query)
+
+            expected = client.query_points(collection_name="ipc_test", query=query.tolist(), limit=10).points
+            rows, scores = index.search(query, top_k=10)
+
+            assert [index.sections[r] for r in rows] == [p.payload["section_number"] for p in expected]
+            assert scores.tolist() == pytest.approx([p.score for p in expected], abs=1e-5)
+
+    def test_save_and_load_roundtrip(self, qdrant_collection, tmp_path):
+        """A saved snapshot memory-maps back with the same results; wrong model is rejected."""
+        client, _ = qdrant_collection
+        index = LocalDenseIndex.from_qdrant(client, "ipc_test", model="e5")
+        path = tmp_path / "vectors.npy"
+        index.save(path)
+
+        loaded = LocalDenseIndex.load(path, expected_model="e5", expected_dimension=DIM)
+        assert loaded is not None
+        assert loaded.sections == index.sections
+        query = index.vectors[3]
+        assert loaded.search(query, 5)[0].tolist() == index.search(query, 5)[0].tolist()
+
+        assert LocalDenseIndex.load(path, expected_model="other-model") is None
+        assert LocalDenseIndex.load(tmp_path / "missing.npy") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
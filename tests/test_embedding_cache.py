@@ -0,0 +1,85 @@
+"""
+Tests for the two-tier query-embedding cache.
+
+Run with: pytest tests/test_embedding_cache.py
+"""
+
+import pytest
+
+from app.core import embedding_cache
+from app.core.embedding_cache import EmbeddingCache
+
+
+class DictRedis:
+    """Minimal in-memory stand-in for the two Redis calls the cache makes."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+class TestEmbeddingCache:
+    """Test suite for EmbeddingCache."""
+
+    def test_normalized_text_shares_entry(self):
+        """Case and whitespace variants of a query hit the same entry."""
+        calls = []
+        cache = EmbeddingCache(model_id="m")
+        compute = lambda text: calls.append(text) or [0.6, 0.8]
+
+        cache.get_or_compute("Punishment for  murder", compute)
+        cache.get_or_compute("punishment for murder ", compute)
+
+        assert len(calls) == 1
+        assert cache.stats()["local_hits"] == 1
+
+    def test_lru_eviction_and_ttl(self):
+        """Oldest entries are evicted past max_entries; expired entries miss."""
+        cache = EmbeddingCache(model_id="m", max_entries=2)
+        for q in ("a", "b", "c"):
+            cache.put(q, [1.0])
+        assert cache.get("a") is None
+        assert cache.get("c") == [1.0]
+
+        expired = EmbeddingCache(model_id="m", ttl_seconds=-1)
+        expired.put("a", [1.0])
+        assert expired.get("a") is None
+
+    def test_redis_tier_shared_across_instances(self):
+        """A vector computed by one worker is served from Redis to another, as float16."""
+        redis = DictRedis()
+        worker_a = EmbeddingCache(model_id="m", redis_client=redis)
+        worker_b = EmbeddingCache(model_id="m", redis_client=redis)
+
+        worker_a.put("theft", [0.1, 0.2, 0.3])
+        vector = worker_b.get("theft")
+
+        assert vector == pytest.approx([0.1, 0.2, 0.3], abs=1e-3)
+        assert worker_b.stats()["redis_hits"] == 1
+
+    def test_model_id_is_part_of_key(self):
+        """Vectors from another embedding model are never reused."""
+        redis = DictRedis()
+        EmbeddingCache(model_id="model-a", redis_client=redis).put("theft", [1.0])
+        assert EmbeddingCache(model_id="model-b", redis_client=redis).get("theft") is None
+
+    def test_unreachable_redis_counts_misses_without_disabling_tier(self, monkeypatch):
+        """The client is built without a ping; an outage is a miss, not a tier turned off for good."""
+        monkeypatch.setattr(embedding_cache.settings, "REDIS_URL", "redis://127.0.0.1:1/0")
+        client = embedding_cache._create_redis_client()
+        assert client is not None
+
+        cache = EmbeddingCache(model_id="m", redis_client=client)
+        cache.put("theft", [1.0])
+        assert cache.get("other") is None
+        assert cache.redis_client is client
+        assert cache.stats()["redis_errors"] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,131 @@
+"""
+Tests for the shared Groq key pool.
+
+Run with: pytest tests/test_groq_pool.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.core.groq_pool import GroqKeyPool, KeyPoolExhausted, Priority, parse_duration
+
+
+def _headers(remaining_requests, remaining_tokens, reset="30s"):
+    return {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-remaining-requests": str(remaining_requests),
+        "x-ratelimit-remaining-tokens": str(remaining_tokens),
+        "x-ratelimit-reset-requests": reset,
+        "x-ratelimit-reset-tokens": reset,
+    }
+
+
+class RateLimited(Exception):
+    """Stands in for groq.RateLimitError (the pool reads response headers)."""
+
+    def __init__(self, retry_after):
+        super().__init__("Error code: 429 - rate_limit_exceeded")
+        self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)}})()
+
+
+class TestGroqKeyPool:
+    """Test suite for GroqKeyPool scheduling."""
+
+    def test_parse_duration(self):
+        """Groq reset headers in every format the API sends."""
+        assert parse_duration("7.66s") == pytest.approx(7.66)
+        assert parse_duration("2m59.56s") == pytest.approx(179.56)
+        assert parse_duration("120ms") == pytest.approx(0.12)
+        assert parse_duration("3") == 3.0
+        assert parse_duration(None) is None
+
+    def test_picks_key_with_most_headroom(self):
+        """Header state steers calls; a 429 cools its key and traffic moves on."""
+        pool = GroqKeyPool(["k1", "k2"])
+        pool._keys[0].update(_headers(90, 5000), time.monotonic())
+        pool._keys[1].update(_headers(10, 5000), time.monotonic())
+
+        lease = pool.acquire(Priority.INTERACTIVE)
+        assert lease.index == 0
+        pool.release(lease, error=RateLimited(retry_after=60))
+
+        lease = pool.acquire(Priority.INTERACTIVE)
+        assert lease.index == 1
+        pool.release(lease, headers=_headers(9, 4000))
+
+        stats = pool.stats()
+        assert stats["keys"][0]["rate_limited"] == 1
+        assert stats["keys"][0]["cooldown_s"] > 50
+        assert stats["keys"][1]["remaining_requests"] == 9
+        assert stats["keys"][1]["utilization"] == pytest.approx(0.91)
+
+    def test_interactive_preempts_queued_background(self):
+        """Callers queue for a cooling key and are served by priority, not arrival."""
+        pool = GroqKeyPool(["k1"])
+        lease = pool.acquire(Priority.INTERACTIVE)
+        pool.release(lease, error=RateLimited(retry_after=0.3))
+
+        order = []
+
+        def call(priority):
+            granted = pool.acquire(priority, max_wait=5)
+            order.append(priority)
+            pool.release(granted)
+
+        background = threading.Thread(target=call, args=(Priority.BACKGROUND,))
+        interactive = threading.Thread(target=call, args=(Priority.INTERACTIVE,))
+        started = time.perf_counter()
+        background.start()
+        time.sleep(0.05)
+        interactive.start()
+        background.join()
+        interactive.join()
+
+        assert order == [Priority.INTERACTIVE, Priority.BACKGROUND]
+        assert time.perf_counter() - started >= 0.25
+        assert pool.stats()["queued"]["background"] == 1
+
+    def test_reserve_held_for_interactive(self, monkeypatch):
+        """Background calls stop short of the reserve; interactive calls may use it."""
+        monkeypatch.setattr(settings, "GROQ_POOL_INTERACTIVE_RESERVE", 0.1)
+        pool = GroqKeyPool(["k1"])
+        lease = pool.acquire(Priority.INTERACTIVE)
+        pool.release(lease, headers=_headers(5, 5000, reset="1m"))
+
+        with pytest.raises(KeyPoolExhausted):
+            pool.acquire(Priority.BACKGROUND, max_wait=0.05)
+        pool.release(pool.acquire(Priority.INTERACTIVE, max_wait=0.05))
+        assert pool.stats()["exhausted"]["background"] == 1
+
+    def test_async_acquire_queues_without_blocking(self):
+        """aacquire waits out a cooldown on the event loop instead of blocking it."""
+        pool = GroqKeyPool(["k1"])
+        pool.release(pool.acquire(Priority.INTERACTIVE), error=RateLimited(retry_after=0.3))
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker_task = asyncio.create_task(ticker())
+            lease = await pool.aacquire(Priority.CONDENSER, max_wait=5)
+            ticker_task.cancel()
+            return lease, ticks
+
+        lease, ticks = asyncio.run(run())
+        pool.release(lease)
+        assert lease.index == 0
+        assert ticks >= 10, "event loop was blocked while queued for a key"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
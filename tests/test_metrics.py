@@ -0,0 +1,99 @@
+"""
+Tests for per-stage timings, the Server-Timing header and GET /metrics.
+
+Run with: pytest tests/test_metrics.py
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.utils.metrics import (
+    count_retry,
+    current_timings,
+    dependency,
+    stage,
+    start_request_timing,
+)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestStageTimings:
+    """Test suite for stage / dependency spans and ServerTimings."""
+
+    def test_spans_accumulate_across_tasks(self):
+        """Tasks spawned by the request report into its timings; repeated spans add up."""
+        before = _sample("legal_ai_stage_seconds_count", stage="bm25")
+
+        async def branch():
+            with stage("bm25"):
+                await asyncio.sleep(0.01)
+
+        async def run():
+            timings = start_request_timing()
+            await asyncio.gather(asyncio.create_task(branch()), asyncio.create_task(branch()))
+            with stage("rrf"):
+                pass
+            return timings
+
+        timings = asyncio.run(run())
+        assert list(timings.as_dict()) == ["bm25", "rrf"]
+        assert timings.as_dict()["bm25"] >= 20
+        assert _sample("legal_ai_stage_seconds_count", stage="bm25") == before + 2
+
+        header = timings.header(total_seconds=0.5)
+        assert header.startswith("bm25;dur=")
+        assert header.endswith("total;dur=500.0")
+
+    def test_dependency_outcome_and_retries(self):
+        labels = {"dependency": "qdrant", "operation": "query"}
+        ok_before = _sample("legal_ai_dependency_seconds_count", outcome="ok", **labels)
+        error_before = _sample("legal_ai_dependency_seconds_count", outcome="error", **labels)
+        retries_before = _sample("legal_ai_retries_total", dependency="qdrant")
+
+        with pytest.raises(ConnectionError):
+            with dependency("qdrant", "query"):
+                raise ConnectionError("refused")
+        count_retry("qdrant")
+        with dependency("qdrant", "query"):
+            pass
+
+        assert _sample("legal_ai_dependency_seconds_count", outcome="error", **labels) == error_before + 1
+        assert _sample("legal_ai_dependency_seconds_count", outcome="ok", **labels) == ok_before + 1
+        assert _sample("legal_ai_retries_total", dependency="qdrant") == retries_before + 1
+
+    def test_spans_outside_a_request_only_reach_histograms(self):
+        async def run():
+            with stage("embed"):
+                pass
+            return current_timings()
+
+        assert asyncio.run(run()) is None
+
+
+class TestMetricsEndpoint:
+    """Test suite for the HTTP middleware and GET /metrics."""
+
+    def test_metrics_exposition_and_server_timing(self):
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/")
+                return await client.get("/metrics")
+
+        response = asyncio.run(run())
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.headers["server-timing"].startswith("total;dur=")
+        assert 'legal_ai_request_seconds_count{method="GET",route="/",status="200"}' in response.text
+        assert "legal_ai_stage_seconds_bucket" in response.text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
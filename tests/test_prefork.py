@@ -0,0 +1,55 @@
+"""
+Tests for pre-fork serving: state loaded in the master, reset in workers.
+
+Run with: pytest tests/test_prefork.py
+"""
+
+import gc
+import os
+import sys
+
+import pytest
+
+from app.core.retriever import get_retriever
+from app.prefork import preload_shared_state, reset_process_state
+from app.utils import http_client
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+class TestPrefork:
+    """Test suite for preload_shared_state / reset_process_state."""
+
+    def test_forked_worker_shares_state_and_drops_clients(self):
+        preload_shared_state()
+        try:
+            assert gc.get_freeze_count() > 0
+            retriever = get_retriever()
+            parent_client = http_client.get_http_client()
+            parent_pool = retriever._dense_pool
+
+            pid = os.fork()
+            if pid == 0:
+                # Worker: same corpus object, fresh per-process resources
+                code = 1
+                try:
+                    reset_process_state()
+                    ok = (
+                        get_retriever() is retriever
+                        and retriever._dense_pool is not parent_pool
+                        and retriever._async_client is None
+                        and http_client.get_http_client() is not parent_client
+                        and retriever.bm25_search("punishment for murder", top_k=3)
+                    )
+                    code = 0 if ok else 1
+                finally:
+                    sys.stdout.flush()
+                    os._exit(code)
+
+            _, status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(status) == 0
+        finally:
+            gc.unfreeze()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
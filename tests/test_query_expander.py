@@ -0,0 +1,65 @@
+"""
+Tests for the compiled query expansion matcher.
+
+Run with: pytest tests/test_query_expander.py
+"""
+
+import pytest
+
+from app.core.query_expander import (
+    ExpansionMatcher,
+    expand_query,
+    expand_query_with_trace,
+    expansion_cache_info,
+    tokenize_query,
+)
+
+
+@pytest.fixture
+def matcher():
+    return ExpansionMatcher(
+        vocabulary_map={"hatya": ["murder"], "dahej hatya": ["dowry death"], "dahej": ["dowry"]},
+        synonym_map={"hit and run": ["rash driving", "304A"], "run": ["escape"]},
+        concept_map={"murder": ["300", "302"], "rash driving": ["279"], "dowry": ["304B"]},
+    )
+
+
+class TestExpansionMatcher:
+    """Test suite for the token-level automaton."""
+
+    def test_overlapping_phrases_and_concepts(self, matcher):
+        """Every key in the query matches, including nested ones, with one-hop concepts."""
+        terms, trace = matcher.match(tokenize_query("Dahej hatya case"))
+        assert terms == {"dowry", "304B", "dowry death", "murder", "300", "302"}
+        assert "dahej hatya -> dowry death" in trace
+        assert "murder -> 300,302" in trace
+
+    def test_phrases_match_whole_words_only(self, matcher):
+        """A key inside a longer word, or a broken phrase, does not match."""
+        assert matcher.match(tokenize_query("rerun the hatyaa report"))[0] == set()
+        assert matcher.match(tokenize_query("hit and then run"))[0] == {"escape"}
+        assert matcher.match(tokenize_query("a hit and run case"))[0] == {
+            "rash driving", "304A", "279", "escape",
+        }
+
+
+class TestExpandQuery:
+    """Test suite for the public expansion API."""
+
+    def test_expansion_is_additive(self):
+        """The original query is preserved and the trace lists the matched rules."""
+        expanded, trace = expand_query_with_trace("Punishment for chori")
+        assert expanded.startswith("Punishment for chori ")
+        assert "theft" in expanded.split()
+        assert trace
+
+    def test_memoized_per_normalized_query(self):
+        """Case and punctuation variants reuse one computation."""
+        expand_query("what is the punishment for qatl")
+        hits = expansion_cache_info().hits
+        assert expand_query("What is the punishment for QATL?").startswith("What is the punishment for QATL? ")
+        assert expansion_cache_info().hits == hits + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,98 @@
+"""
+Tests for the per-user Redis GCRA rate limiter.
+
+Run with: pytest tests/test_rate_limiter.py
+"""
+
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.rate_limiter import RateLimiter
+
+fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis[lua] (requirements.dev.txt)")
+
+
+def _limiter(requests=5, tokens=1000, redis_client=None):
+    return RateLimiter(
+        redis_client=redis_client or fakeredis.FakeAsyncRedis(decode_responses=True),
+        requests_per_window=requests,
+        tokens_per_window=tokens,
+    )
+
+
+class TestRateLimiter:
+    """Test suite for admission checks, token charges and headers."""
+
+    def test_request_burst_then_retry_after(self):
+        """A full window of requests is admitted at once; the next one waits one interval."""
+        limiter = _limiter(requests=5)
+
+        async def run():
+            return [await limiter.check("alice") for _ in range(6)], await limiter.check("bob")
+
+        decisions, other_user = asyncio.run(run())
+        assert [d.allowed for d in decisions] == [True] * 5 + [False]
+        assert [d.request_remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+
+        denied = decisions[-1]
+        assert denied.limited_by == "requests"
+        assert 1 <= denied.retry_after <= 12  # one emission interval: 60s / 5
+        headers = denied.headers()
+        assert headers["Retry-After"] == str(denied.retry_after)
+        assert headers["RateLimit-Remaining"] == "0"
+        assert other_user.allowed and other_user.request_remaining == 4
+
+    def test_token_budget_charged_after_generation(self):
+        """Requests are admitted while tokens remain; an overdraft blocks until it drains."""
+        limiter = _limiter(requests=100, tokens=1000)
+
+        async def run():
+            first = await limiter.check("alice")
+            await limiter.charge("alice", 600)
+            second = await limiter.check("alice")
+            await limiter.charge("alice", 900)
+            third = await limiter.check("alice")
+            return first, second, third
+
+        first, second, third = asyncio.run(run())
+        assert first.allowed and first.token_remaining == 1000
+        assert second.allowed and 399 <= second.token_remaining <= 400
+        assert not third.allowed and third.limited_by == "tokens"
+        # ~500 tokens of debt at 1000 tokens/minute
+        assert 29 <= third.retry_after <= 31
+        assert third.headers()["RateLimit-Limit"] == "1000"
+
+    def test_batch_costs_one_request_per_question(self):
+        """A batch spends its size in requests; one over the burst needs a full budget and leaves debt."""
+        limiter = _limiter(requests=10)
+
+        async def run():
+            weighted = [await limiter.check("alice", cost=4) for _ in range(3)]
+            oversized = await limiter.check("bob", cost=15)
+            after = await limiter.check("bob")
+            return weighted, oversized, after
+
+        weighted, oversized, after = asyncio.run(run())
+        assert [d.allowed for d in weighted] == [True, True, False]
+        assert weighted[1].request_remaining == 2
+        assert 12 <= weighted[2].retry_after <= 13  # two intervals short: 2 * 60s / 10
+        assert oversized.allowed and oversized.request_remaining == 0
+        assert not after.allowed and after.limited_by == "requests"
+        assert 36 <= after.retry_after <= 37  # five intervals of debt plus one
+
+    def test_fails_open_without_redis(self):
+        class DownRedis:
+            def register_script(self, script):
+                async def call(keys, args):
+                    raise RedisConnectionError("connection refused")
+                return call
+
+        limiter = _limiter(redis_client=DownRedis())
+        assert asyncio.run(limiter.check("alice")) is None
+        asyncio.run(limiter.charge("alice", 100))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -6,6 +6,7 @@ Run with: pytest tests/test_retriever.py
 
 import pytest
 from app.core.retriever import DocumentRetriever, get_retriever
+from app.core.query_expander import expand_query
 
 
 class TestDocumentRetriever:
@@ -39,20 +40,157 @@ class TestDocumentRetriever:
         sections = retriever.detect_sections("What are punishments for theft?")
         assert len(sections) == 0
     
-    @pytest.mark.asyncio
-    async def test_search_by_section(self):
-        """Test direct section lookup."""
+    def test_search_by_section(self):
+        """Test direct section lookup (served from the in-memory corpus)."""
         retriever = get_retriever()
         
-        # This will fail if data is not indexed
-        try:
-            results = retriever.search_by_section("302", limit=1)
-            assert len(results) <= 1
-            if results:
-                assert results[0].section == "302"
-        except Exception as e:
-            pytest.skip(f"Qdrant not available or data not indexed: {e}")
+        results = retriever.search_by_section("302", limit=1)
+        assert len(results) == 1
+        assert results[0].section == "302"
+        assert results[0].score == 1.0
+
+    def test_search_by_sections_batched(self, monkeypatch):
+        """Test multi-section lookup keeps request order without touching Qdrant."""
+        retriever = get_retriever()
+        monkeypatch.setattr(
+            retriever, "_qdrant_sections", lambda *a, **k: pytest.fail("Qdrant should not be called")
+        )
+
+        results = retriever.search_by_sections(["420", "498a", "302"])
+        assert [r.section for r in results] == ["420", "498A", "302"]
     
+    def test_hybrid_search_dense_deadline(self, monkeypatch):
+        """Test a dense branch past its deadline degrades to BM25-only results."""
+        import time
+        from app.config import settings
+
+        retriever = get_retriever()
+        monkeypatch.setattr(settings, "DENSE_TIMEOUT_SECONDS", 0.2)
+        monkeypatch.setattr(retriever, "_semantic_hits", lambda *a, **k: time.sleep(2) or ([], []))
+
+        started = time.perf_counter()
+        results, trace = retriever.hybrid_search_with_trace("punishment for theft")
+        assert time.perf_counter() - started < 1.0
+        assert trace["degraded"] is True
+        assert trace["dense"] == "timeout"
+        expected = retriever.bm25_search(expand_query("punishment for theft"), top_k=settings.DEFAULT_TOP_K)
+        assert [r.section for r in results] == [r.section for r in expected]
+
+    def test_async_hybrid_search_dense_deadline(self, monkeypatch):
+        """Test the async path degrades the same way without blocking the event loop."""
+        import asyncio
+        from app.config import settings
+
+        retriever = get_retriever()
+        monkeypatch.setattr(settings, "DENSE_TIMEOUT_SECONDS", 0.2)
+
+        async def slow_dense(*args, **kwargs):
+            await asyncio.sleep(2)
+            return [], []
+
+        monkeypatch.setattr(retriever, "_asemantic_hits", slow_dense)
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker_task = asyncio.create_task(ticker())
+            result = await retriever.ahybrid_search_with_trace("punishment for theft")
+            ticker_task.cancel()
+            return result, ticks
+
+        (results, trace), ticks = asyncio.run(run())
+        assert trace["degraded"] is True
+        assert trace["dense"] == "timeout"
+        assert ticks >= 10, "event loop was blocked while waiting on the dense branch"
+        expected = retriever.bm25_search(expand_query("punishment for theft"), top_k=settings.DEFAULT_TOP_K)
+        assert [r.section for r in results] == [r.section for r in expected]
+
+    def test_async_hybrid_search_runs_branches_concurrently(self, monkeypatch):
+        """The dense branch reaches its remote call while BM25 is still scoring."""
+        import asyncio
+        import time
+
+        retriever = get_retriever()
+        events = []
+
+        async def dense(*args, **kwargs):
+            await asyncio.sleep(0)  # e.g. the embedding cache lookup
+            events.append("dense_request")
+            return [], []
+
+        def slow_bm25(*args, **kwargs):
+            time.sleep(0.2)
+            events.append("bm25_done")
+            return [], []
+
+        monkeypatch.setattr(retriever, "_asemantic_hits", dense)
+        monkeypatch.setattr(retriever, "_bm25_hits", slow_bm25)
+
+        asyncio.run(retriever.ahybrid_search_with_trace("punishment for theft"))
+        assert events == ["dense_request", "bm25_done"]
+
+    def test_hybrid_search_batch_matches_single(self, monkeypatch):
+        """Test the batched path returns what per-query hybrid search returns, in order."""
+        import asyncio
+        import hashlib
+        import numpy as np
+        from app.core import retriever as retriever_module
+        from app.core.dense_index import LocalDenseIndex
+        from app.core.embedding_cache import EmbeddingCache
+
+        retriever = get_retriever()
+        sections = list(retriever.store.sections)
+        rng = np.random.default_rng(0)
+        monkeypatch.setattr(
+            retriever,
+            "dense_index",
+            LocalDenseIndex(LocalDenseIndex.normalize_rows(rng.normal(size=(len(sections), 16))), sections),
+        )
+
+        class FakeProvider:
+            def __init__(self):
+                self.calls = []
+
+            def embed_query(self, text):
+                seed = int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+                return LocalDenseIndex.normalize_rows(
+                    np.random.default_rng(seed).normal(size=(1, 16))
+                )[0].tolist()
+
+            def embed_queries(self, texts):
+                self.calls.append(len(texts))
+                return [self.embed_query(t) for t in texts]
+
+            async def aembed_query(self, text):
+                return self.embed_query(text)
+
+            async def aembed_queries(self, texts):
+                return self.embed_queries(texts)
+
+        provider = FakeProvider()
+        cache = EmbeddingCache("fake")
+        monkeypatch.setattr(retriever_module, "get_embedding_provider", lambda: provider)
+        monkeypatch.setattr(retriever_module, "get_embedding_cache", lambda: cache)
+
+        queries = ["punishment for theft", "What is Section 302?", "chori ki saza", "punishment for theft"]
+        batch = retriever.hybrid_search_batch(queries)
+        # One provider call for the two distinct hybrid queries; the section query needs none
+        assert provider.calls == [2]
+
+        expected = [retriever.hybrid_search_with_trace(q) for q in queries]
+        for results in (batch, asyncio.run(retriever.ahybrid_search_batch(queries))):
+            assert [[d.section for d in docs] for docs, _ in results] == [
+                [d.section for d in docs] for docs, _ in expected
+            ]
+            assert [trace["route"] for _, trace in results] == ["hybrid", "section", "hybrid", "hybrid"]
+        assert provider.calls == [2]
+
     @pytest.mark.asyncio
     async def test_semantic_search(self):
         """Test semantic search functionality."""
@@ -0,0 +1,74 @@
+"""
+Tests for the array-backed section store.
+
+Run with: pytest tests/test_section_store.py
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.section_store import SectionStore
+
+IPC_DATA_PATH = Path(__file__).parent.parent / "data" / "ipc_clean.json"
+
+DOCS = [
+    {
+        "section_number": "378",
+        "title": "Theft.—",
+        "chapter": "XVII",
+        "chapter_title": "OF OFFENCES AGAINST PROPERTY",
+        "text": "Whoever, intending to take dishonestly any moveable property… commits theft.",
+        "explanations": ["A thing so long as it is attached to the earth…", "A moving effected…"],
+        "illustrations": ["(a) A cuts down a tree on Z's ground…"],
+        "is_repealed": False,
+        "source": "ipc",
+    },
+    {
+        "section_number": "498A",
+        "title": "Husband or relative of husband of a woman subjecting her to cruelty.—",
+        "chapter": None,
+        "chapter_title": None,
+        "text": "Whoever, being the husband… shall be punished.",
+        "explanations": [],
+        "illustrations": [],
+        "is_repealed": False,
+        "source": "ipc",
+    },
+]
+
+
+class TestSectionStore:
+    """Test suite for SectionStore."""
+
+    def test_round_trip(self):
+        """Every field of every section comes back as it was packed."""
+        store = SectionStore.from_docs(DOCS)
+        assert len(store) == 2
+        assert list(store.iter_dicts()) == DOCS
+
+    def test_corpus_round_trip(self):
+        """The real corpus (non-ASCII text, empty lists, missing chapters) survives packing."""
+        docs = json.loads(IPC_DATA_PATH.read_bytes())
+        store = SectionStore.from_docs(docs)
+        for sid, doc in enumerate(docs):
+            assert store.as_dict(sid) == doc
+
+    def test_ids_are_case_insensitive(self):
+        store = SectionStore.from_docs(DOCS)
+        assert store.id_of("378") == 0
+        assert store.id_of("498a") == store.id_of("498A") == 1
+        assert store.id_of("999") is None
+        assert store.ids_of(["498a", "999", "378"]) == ([1, 0], ["999"])
+
+    def test_documents_materialize_requested_ids(self):
+        store = SectionStore.from_docs(DOCS)
+        docs = store.documents([1, 0], [0.9, 0.4])
+        assert [(d.section, d.score) for d in docs] == [("498A", 0.9), ("378", 0.4)]
+        assert docs[1].title == DOCS[0]["title"]
+        assert docs[1].text == DOCS[0]["text"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
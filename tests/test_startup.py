@@ -0,0 +1,101 @@
+"""
+Cold-start regression tests: time to the first accepted request stays under
+COLD_START_BUDGET_SECONDS, and the heavy SDKs stay off the import path.
+
+Run with: pytest tests/test_startup.py
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+import httpx
+import pytest
+
+from app.config import settings
+
+fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis (requirements.dev.txt)")
+
+ROOT = Path(__file__).parent.parent
+DEFERRED_IMPORTS = ["qdrant_client", "groq", "jose.jwk"]
+
+
+@pytest.fixture
+def redis_url():
+    """A fakeredis TCP server for the lifespan's Redis ping."""
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_first_accept(env: Dict[str, str], timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn to its first 200 on GET /."""
+    port = _free_port()
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+        try:
+            while time.perf_counter() - started < timeout:
+                if proc.poll() is not None:
+                    stderr.seek(0)
+                    pytest.fail(f"uvicorn exited with {proc.returncode}:\n{stderr.read()[-2000:]}")
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/", timeout=1.0).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+            pytest.fail(f"no response after {timeout:.0f}s")
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+class TestColdStart:
+    """Test suite for time-to-first-accept and the lazy imports."""
+
+    def test_first_accept_within_budget(self, redis_url):
+        """Best of two cold launches, so one slow run on a busy machine does not fail it."""
+        env = {**os.environ, "REDIS_URL": redis_url}
+        best = min(_time_to_first_accept(env) for _ in range(2))
+        assert best <= settings.COLD_START_BUDGET_SECONDS, (
+            f"first accept after {best:.2f}s, budget {settings.COLD_START_BUDGET_SECONDS:.2f}s "
+            "(see scripts/profile_startup.py)"
+        )
+
+    def test_heavy_sdks_are_imported_on_first_use(self):
+        code = (
+            "import sys, app.main; "
+            f"print('loaded=' + ','.join(m for m in {DEFERRED_IMPORTS!r} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        # Logs go to stdout too: the marker line is the last one
+        assert result.stdout.strip().splitlines()[-1] == "loaded="
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,246 @@
+"""
+Tests for the streamed answers behind POST /api/query/stream (SSE) and
+POST /api/query/batch (NDJSON).
+
+The LLM chain, history writes and rate-limit token charges are replaced
+with in-process fakes, so these run without Groq or Redis.
+
+Run with: pytest tests/test_streaming.py
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.api import chat
+from app.core.context_packer import count_tokens
+from app.models import ChatRequest, RetrievedDocument
+
+
+class FakeLLMChain:
+    def __init__(self, deltas, delay=0.0):
+        self.deltas = deltas
+        self.delay = delay
+        self.last_token_usage = None
+
+    async def astream_answer(self, query, documents, chat_history=None, packed=None):
+        for delta in self.deltas:
+            await asyncio.sleep(self.delay)
+            yield delta
+        self.last_token_usage = {"total_tokens": 42}
+
+
+def _turn():
+    return {
+        "session_id": "s-1",
+        "chat_history": [],
+        "documents": [RetrievedDocument(section="302", title="Murder", text="...", score=1.0)],
+        "packed": None,
+        "metadata": {"retrieval": {"route": "section", "degraded": False}},
+    }
+
+
+def _parse(chunks):
+    events = []
+    for chunk in chunks:
+        event_line, data_line = chunk.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def _stage_count(name: str) -> float:
+    return REGISTRY.get_sample_value("legal_ai_stage_seconds_count", {"stage": name}) or 0.0
+
+
+@pytest.fixture(autouse=True)
+def no_answer_cache(monkeypatch):
+    monkeypatch.setattr(chat.settings, "ANSWER_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def charged(monkeypatch):
+    calls = []
+
+    class FakeRateLimiter:
+        async def charge(self, user_id, tokens):
+            calls.append((user_id, tokens))
+
+    monkeypatch.setattr(chat, "get_rate_limiter", lambda: FakeRateLimiter())
+    return calls
+
+
+@pytest.fixture
+def persisted(monkeypatch):
+    calls = []
+
+    async def fake_persist(user_id, session_id, query, answer, status=None):
+        calls.append((session_id, query, answer, status))
+
+    monkeypatch.setattr(chat, "_persist_turn", fake_persist)
+    return calls
+
+
+class TestAnswerStream:
+    """Test suite for the SSE event sequence and history persistence."""
+
+    def test_event_sequence(self, monkeypatch, persisted, charged):
+        """Sources first, then tokens, then done with TTFT; the turn is persisted, charged and timed in /metrics."""
+        monkeypatch.setattr(chat, "get_llm_chain", lambda: FakeLLMChain(["Section ", "302"]))
+        request = ChatRequest(user_id="u", query="What is Section 302?")
+        stages = ("ttft", "stream_total", "llm")
+        observed = [_stage_count(name) for name in stages]
+
+        async def run():
+            return [c async for c in chat._stream_answer(request, "u", _turn(), started=0.0)]
+
+        events = _parse(asyncio.run(run()))
+        assert [name for name, _ in events] == ["sources", "token", "token", "done"]
+        assert events[0][1]["sources"][0]["section"] == "302"
+        assert events[-1][1]["usage"] == {"total_tokens": 42}
+        assert events[-1][1]["ttft_ms"] <= events[-1][1]["total_ms"]
+        assert persisted == [("s-1", "What is Section 302?", "Section 302", None)]
+        assert charged == [("u", 42)]
+        assert [_stage_count(name) - before for name, before in zip(stages, observed)] == [1, 1, 1]
+
+    def test_cancelled_stream_persists_partial_answer(self, monkeypatch, persisted):
+        """A client disconnect mid-stream still stores the turn with the partial answer."""
+        monkeypatch.setattr(
+            chat, "get_llm_chain", lambda: FakeLLMChain(["partial ", "answer ", "never"], delay=0.05)
+        )
+        request = ChatRequest(user_id="u", query="theft?")
+
+        async def run():
+            received = []
+
+            async def consume():
+                async for chunk in chat._stream_answer(request, "u", _turn(), started=0.0):
+                    received.append(chunk)
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.12)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)  # let the shielded write finish
+            return received
+
+        received = asyncio.run(run())
+        assert "done" not in [name for name, _ in _parse(received)]
+        assert persisted == [("s-1", "theft?", "partial answer", "cancelled")]
+
+    def test_cancelled_stream_charges_estimate(self, monkeypatch, persisted, charged):
+        """A stream cut short is charged its packed context plus the text streamed so far."""
+        monkeypatch.setattr(
+            chat, "get_llm_chain", lambda: FakeLLMChain(["partial ", "answer ", "never"], delay=0.05)
+        )
+        request = ChatRequest(user_id="u", query="theft?")
+        turn = dict(_turn(), packed=SimpleNamespace(used_tokens=300))
+
+        async def run():
+            async def consume():
+                async for _ in chat._stream_answer(request, "u", turn, started=0.0):
+                    pass
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.12)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.gather(*chat._pending_writes)
+
+        asyncio.run(run())
+        assert charged == [("u", 300 + count_tokens("partial answer "))]
+
+    def test_cancel_before_first_token_persists_user_message(self, monkeypatch, persisted):
+        """A disconnect before any token still stores the question, with an empty cancelled reply."""
+        monkeypatch.setattr(chat, "get_llm_chain", lambda: FakeLLMChain(["late"], delay=0.3))
+        request = ChatRequest(user_id="u", query="theft?")
+
+        async def run():
+            received = []
+
+            async def consume():
+                async for chunk in chat._stream_answer(request, "u", _turn(), started=0.0):
+                    received.append(chunk)
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)  # let the shielded write finish
+            return received
+
+        received = asyncio.run(run())
+        assert [name for name, _ in _parse(received)] == ["sources"]
+        assert persisted == [("s-1", "theft?", "", "cancelled")]
+
+    def test_failed_stream_marks_reply(self, monkeypatch, persisted):
+        """A generation error mid-stream sends an error event and stores the partial reply as failed."""
+        from app.utils import LLMError
+
+        class FailingLLMChain(FakeLLMChain):
+            async def astream_answer(self, query, documents, chat_history=None, packed=None):
+                yield "partial"
+                raise LLMError("boom")
+
+        monkeypatch.setattr(chat, "get_llm_chain", lambda: FailingLLMChain([]))
+        request = ChatRequest(user_id="u", query="theft?")
+
+        async def run():
+            return [c async for c in chat._stream_answer(request, "u", _turn(), started=0.0)]
+
+        events = _parse(asyncio.run(run()))
+        assert [name for name, _ in events] == ["sources", "token", "error"]
+        assert persisted == [("s-1", "theft?", "partial", "failed")]
+
+
+class TestBatchStream:
+    """Test suite for the NDJSON stream behind POST /api/query/batch."""
+
+    def test_bounded_concurrency_and_per_item_errors(self, monkeypatch, charged):
+        """LLM calls never exceed the limit; a failed item is reported, not fatal; each answer is charged."""
+        from app.models import BatchQueryRequest
+        from app.utils import LLMError
+
+        monkeypatch.setattr(chat.settings, "BATCH_LLM_CONCURRENCY", 2)
+
+        class ConcurrencyProbe:
+            last_token_usage = {"total_tokens": 10}
+            active = peak = 0
+
+            async def agenerate_answer(self, query, documents, chat_history=None, priority=None, packed=None):
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                await asyncio.sleep(0.01)
+                self.active -= 1
+                if query == "q3":
+                    raise LLMError("boom")
+                return f"answer to {query}"
+
+        probe = ConcurrencyProbe()
+        monkeypatch.setattr(chat, "get_llm_chain", lambda: probe)
+        queries = [f"q{i}" for i in range(6)]
+        request = BatchQueryRequest(queries=queries)
+        turns = [dict(_turn(), chat_history=[], search_query=q) for q in queries]
+
+        async def run():
+            lines = [json.loads(line) async for line in chat._stream_batch(request, "u", turns, started=0.0)]
+            await asyncio.gather(*chat._pending_writes)
+            return lines
+
+        lines = asyncio.run(run())
+        items, summary = lines[:-1], lines[-1]
+        assert probe.peak == 2
+        assert sorted(item["index"] for item in items) == list(range(6))
+        assert [item["error"] for item in items if "error" in item] == ["boom"]
+        assert all(item["answer"] == f"answer to {item['query']}" for item in items if "error" not in item)
+        assert summary["done"] is True and summary["total"] == 6 and summary["failed"] == 1
+        assert charged == [("u", 10)] * 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
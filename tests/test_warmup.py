@@ -0,0 +1,121 @@
+"""
+Tests for the startup warmup, /ready and the popular-query ranking.
+
+Run with: pytest tests/test_warmup.py
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app import warmup
+from app.core.popular_queries import PopularQueries
+from app.main import app
+from app.warmup import WarmupState
+
+fakeredis = pytest.importorskip("fakeredis", reason="needs fakeredis (requirements.dev.txt)")
+
+DAY = 86400.0
+
+
+async def _ok(**detail):
+    return detail
+
+
+async def _fail():
+    raise RuntimeError("unreachable")
+
+
+async def _hang():
+    await asyncio.sleep(10)
+
+
+@pytest.fixture
+def fake_steps(monkeypatch):
+    """Replaces every warmup step; returns the names of the steps that ran."""
+    ran = []
+
+    def step(name, work):
+        async def run():
+            ran.append(name)
+            return await work()
+
+        monkeypatch.setattr(warmup, name, run)
+
+    step("_warm_embedding", lambda: _ok(provider="fake"))
+    step("_warm_qdrant", _fail)
+    step("_warm_search", _hang)
+    step("_prime_query_cache", lambda: _ok(queries=3))
+    step("_warm_jwks", _ok)
+    step("_warm_groq", lambda: _ok(keys=2, connected=2))
+    step("_warm_redis_clients", _ok)
+    return ran
+
+
+class TestWarmup:
+    """Test suite for WarmupState and GET /ready."""
+
+    def test_failed_and_slow_steps_do_not_block_readiness(self, fake_steps):
+        """Every step runs; errors and timeouts are recorded, then the instance is ready."""
+        state = WarmupState(step_timeout_seconds=0.2)
+        asyncio.run(state.run())
+
+        assert state.ready
+        assert len(fake_steps) == 7
+        assert state.steps["qdrant"]["status"] == "error"
+        assert state.steps["search"]["status"] == "timeout"
+        assert state.steps["groq"] == {"status": "ok", "keys": 2, "connected": 2, "ms": state.steps["groq"]["ms"]}
+        assert state.steps["query_cache"]["queries"] == 3
+
+    def test_ready_is_503_until_warmup_finishes(self, monkeypatch, fake_steps):
+        state = WarmupState(step_timeout_seconds=0.2)
+        monkeypatch.setattr(warmup, "_warmup", state)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                before = await client.get("/ready")
+                await state.run()
+                return before, await client.get("/ready")
+
+        before, after = asyncio.run(run())
+        assert before.status_code == 503
+        assert before.json()["status"] == "warming_up"
+        assert after.status_code == 200
+        assert after.json()["steps"]["embedding"]["status"] == "ok"
+
+
+class TestPopularQueries:
+    """Test suite for the decayed query ranking."""
+
+    def test_recent_queries_outrank_old_bursts(self):
+        popular = PopularQueries(fakeredis.FakeAsyncRedis(decode_responses=True), half_life_seconds=DAY)
+        now = 1_800_000_000.0
+
+        async def run():
+            for _ in range(3):
+                await popular.record("Punishment for theft", now=now - 5 * DAY)
+            await popular.record("what is  culpable homicide?", now=now)
+            await popular.record("What is culpable homicide?", now=now)
+            await popular.record("dowry death", now=now - DAY)
+            return await popular.top(2)
+
+        assert asyncio.run(run()) == ["what is culpable homicide?", "dowry death"]
+
+    def test_set_is_trimmed_to_max_tracked(self):
+        redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        popular = PopularQueries(redis_client, max_tracked=5)
+
+        async def run():
+            for i in range(11):
+                await popular.record(f"query {i}", now=1_800_000_000.0 + i)
+            return await redis_client.zcard("popular_queries"), await popular.top(1)
+
+        size, top = asyncio.run(run())
+        assert size == 5
+        assert top == ["query 10"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])